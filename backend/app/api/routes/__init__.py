@@ -5,7 +5,7 @@ Combines all route modules into a single router
 
 from fastapi import APIRouter
 
-from app.api.routes import auth, credit, companies
+from app.api.routes import auth, balance, batch, credit, companies, dashboard, fuel
 
 # Create main router
 router = APIRouter()
@@ -14,3 +14,7 @@ router = APIRouter()
 router.include_router(auth.router, prefix="/auth", tags=["auth"])
 router.include_router(credit.router, prefix="/credit", tags=["credit"])
 router.include_router(companies.router, prefix="/companies", tags=["companies"])
+router.include_router(balance.router, prefix="/balance", tags=["balance"])
+router.include_router(dashboard.router, prefix="/dashboard", tags=["dashboard"])
+router.include_router(fuel.router, prefix="/fuel", tags=["fuel"])
+router.include_router(batch.router, prefix="/batch", tags=["batch"])
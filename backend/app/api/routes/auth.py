@@ -3,6 +3,7 @@ Authentication Routes
 """
 
 from datetime import datetime, timedelta
+from typing import Dict
 from sqlalchemy import desc
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
@@ -26,6 +27,7 @@ from app.core.security import (
     generate_email_login_code,
 )
 from app.core.config import settings
+from app.core.etags import conditional
 
 router = APIRouter()
 
@@ -193,9 +195,10 @@ async def login(
 
 
 @router.get("/profile", response_model=UserResponse)
-async def get_profile(
+def get_profile(
     user_id: int = Depends(get_current_user_id),
     db: Session = Depends(get_db),
+    etag: Dict[str, str] = Depends(conditional("users")),
 ):
     """Get current user profile"""
     user = db.query(User).filter(User.id == user_id).first()
@@ -0,0 +1,173 @@
+"""
+Balance Routes
+"""
+
+from datetime import date
+from typing import Dict, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.db.database import get_db
+from app.db.models import Balance, Transaction
+from app.schemas.balance import (
+    AddFundsRequest,
+    BalanceResponse,
+    ReceivableCreate,
+    ReceivablePayment,
+    ReceivableResponse,
+    TransactionResponse,
+    TransferRequest,
+)
+from app.core.security import get_current_user_id
+from app.core.etags import conditional
+from app.core.pagination import NEXT_CURSOR_HEADER, keyset, page_of
+from app.core.projection import FIELDS_DESCRIPTION, Projection
+from app.core import aging, ledger
+
+router = APIRouter()
+
+# Entries are append-only, so id order is posting order
+TRANSACTION_KEYS = ((Transaction.id, int),)
+
+
+def _locked_balance(db: Session, user_id: int) -> Balance:
+    balance = ledger.lock_balance(db, user_id)
+    if not balance:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No balance found",
+        )
+    return balance
+
+
+@router.get("", response_model=BalanceResponse)
+def get_balance(
+    user_id: int = Depends(get_current_user_id),
+    db: Session = Depends(get_db),
+    etag: Dict[str, str] = Depends(conditional("balances")),
+):
+    """Get the user's receivables balance (one row, kept current by the aging engine)"""
+    balance = db.execute(select(Balance).where(Balance.user_id == user_id)).scalar_one_or_none()
+    if not balance:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No balance found",
+        )
+    return BalanceResponse.model_validate(balance)
+
+
+@router.post("/receivables", response_model=ReceivableResponse, status_code=status.HTTP_201_CREATED)
+def create_receivable(
+    payload: ReceivableCreate,
+    user_id: int = Depends(get_current_user_id),
+    db: Session = Depends(get_db),
+):
+    """Record an invoice and add it to the matching aging bucket"""
+    try:
+        receivable = aging.record_invoice(
+            db,
+            user_id,
+            payload.amount,
+            payload.invoice_date or date.today(),
+            invoice_number=payload.invoice_number,
+            mc_number=payload.mc_number,
+        )
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Invoice number already recorded",
+        )
+    db.refresh(receivable)
+    return ReceivableResponse.model_validate(receivable)
+
+
+@router.post("/receivables/{receivable_id}/payments", response_model=ReceivableResponse)
+def pay_receivable(
+    receivable_id: int,
+    payload: ReceivablePayment,
+    user_id: int = Depends(get_current_user_id),
+    db: Session = Depends(get_db),
+):
+    """Apply a payment to an invoice and take it off its aging bucket"""
+    receivable = aging.lock_receivable(db, user_id, receivable_id)
+    if not receivable:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Receivable not found",
+        )
+    try:
+        aging.record_payment(db, receivable, payload.amount)
+    except ValueError as exc:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    db.commit()
+    db.refresh(receivable)
+    return ReceivableResponse.model_validate(receivable)
+
+
+@router.get("/transactions", response_model=List[TransactionResponse])
+def list_transactions(
+    limit: int = Query(10, ge=1, le=100),
+    offset: int = Query(0, ge=0, description="Deprecated; use cursor"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    user_id: int = Depends(get_current_user_id),
+    db: Session = Depends(get_db),
+):
+    """List cash transactions, newest first"""
+    projection = Projection(Transaction, TransactionResponse, fields)
+    statement = keyset(
+        projection.select(*(column for column, _ in TRANSACTION_KEYS)).where(Transaction.user_id == user_id),
+        TRANSACTION_KEYS,
+        limit,
+        cursor=cursor,
+        offset=offset,
+    )
+    transactions, next_cursor = page_of(db.execute(statement).all(), TRANSACTION_KEYS, limit)
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+    return projection.response(transactions, headers=headers)
+
+
+@router.post("/add-funds", response_model=BalanceResponse)
+def add_funds(
+    payload: AddFundsRequest,
+    user_id: int = Depends(get_current_user_id),
+    db: Session = Depends(get_db),
+):
+    """Deposit funds into the cash balance"""
+    balance = _locked_balance(db, user_id)
+    ledger.post_transaction(db, balance, "credit", payload.amount, category="deposit", description="Deposit")
+    db.commit()
+    db.refresh(balance)
+    return BalanceResponse.model_validate(balance)
+
+
+@router.post("/transfer", response_model=TransactionResponse)
+def transfer(
+    payload: TransferRequest,
+    user_id: int = Depends(get_current_user_id),
+    db: Session = Depends(get_db),
+):
+    """Transfer funds out of the cash balance"""
+    balance = _locked_balance(db, user_id)
+    try:
+        transaction = ledger.post_transaction(
+            db,
+            balance,
+            "debit",
+            payload.amount,
+            category="transfer",
+            description=payload.description or f"Transfer to {payload.to_account}",
+            to_account=payload.to_account,
+        )
+    except ledger.InsufficientFunds as exc:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    db.commit()
+    db.refresh(transaction)
+    return TransactionResponse.model_validate(transaction)
@@ -0,0 +1,146 @@
+"""
+Request Batching Routes
+
+POST /batch runs several API calls in one round trip. Each sub-request is
+dispatched in-process through the ASGI app, so it goes through routing,
+validation, rate limits and metrics exactly like a standalone call, but
+without another network hop.
+
+The batch authenticates once: sub-requests carry the batch's Authorization
+header and share its request state, where get_current_user_id caches the
+decoded token. Runs of consecutive GETs execute concurrently; writes run
+alone, in order, so a later sub-request sees the effect of an earlier one.
+Read routes are plain functions that FastAPI runs in its threadpool (or,
+like /dashboard, move their queries to threads), so concurrent GETs
+overlap their database work instead of taking turns on the event loop.
+"""
+
+import asyncio
+from typing import Any, Dict, List, Optional
+
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+
+from app.core.config import settings
+from app.core.responses import FastJSONResponse
+from app.core.security import get_current_user_id
+from app.schemas.batch import BatchRequest, BatchResponse, BatchSubRequest
+
+router = APIRouter()
+
+# Request headers that describe the batch itself, not its sub-requests
+_BATCH_ONLY_HEADERS = {b"content-length", b"content-type", b"accept-encoding", b"origin"}
+_SCOPE_KEYS = ("asgi", "http_version", "scheme", "server", "client", "root_path")
+
+
+def _decode_body(headers: Dict[str, str], body: bytes) -> Any:
+    if not body:
+        return None
+    if headers.get("content-type", "").startswith("application/json"):
+        return orjson.loads(body)
+    return body.decode("utf-8", errors="replace")
+
+
+async def _dispatch(request: Request, sub: BatchSubRequest) -> Dict[str, Any]:
+    path, _, query = sub.path.partition("?")
+    body = b"" if sub.body is None else orjson.dumps(sub.body)
+
+    headers = [(name, value) for name, value in request.scope["headers"] if name not in _BATCH_ONLY_HEADERS]
+    for name, value in sub.headers.items():
+        name = name.lower()
+        if name in ("authorization", "cookie"):
+            continue
+        headers = [header for header in headers if header[0] != name.encode("latin-1")]
+        headers.append((name.encode("latin-1"), value.encode("latin-1")))
+    if body:
+        headers += [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+
+    full_path = f"{settings.API_V1_PREFIX}{path}"
+    scope = {key: request.scope[key] for key in _SCOPE_KEYS if key in request.scope}
+    scope.update(
+        type="http",
+        method=sub.method,
+        path=full_path,
+        raw_path=full_path.encode("utf-8"),
+        query_string=query.encode("latin-1"),
+        headers=headers,
+        # Shared with the batch so the cached authentication carries over
+        state=request.scope.setdefault("state", {}),
+    )
+
+    body_sent = False
+
+    async def receive():
+        nonlocal body_sent
+        if body_sent:
+            return {"type": "http.disconnect"}
+        body_sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    response: Dict[str, Any] = {"status": 500, "headers": {}}
+    chunks: List[bytes] = []
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = {
+                name.decode("latin-1"): value.decode("latin-1") for name, value in message.get("headers", [])
+            }
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    try:
+        await request.app(scope, receive, send)
+    except Exception:
+        # The error middleware has already sent a 500 if it could; keep the batch going
+        if not chunks:
+            response["status"] = status.HTTP_500_INTERNAL_SERVER_ERROR
+            chunks = [orjson.dumps({"detail": "Internal Server Error"})]
+            response["headers"] = {"content-type": "application/json"}
+
+    response["body"] = _decode_body(response["headers"], b"".join(chunks))
+    return response
+
+
+@router.post("", response_model=BatchResponse)
+async def run_batch(
+    batch: BatchRequest,
+    request: Request,
+    user_id: int = Depends(get_current_user_id),
+):
+    """Run up to BATCH_MAX_REQUESTS API calls and return all their responses"""
+    if len(batch.requests) > settings.BATCH_MAX_REQUESTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A batch may contain at most {settings.BATCH_MAX_REQUESTS} requests",
+        )
+    if any(sub.path.split("?", 1)[0].rstrip("/") == "/batch" for sub in batch.requests):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Batches cannot be nested",
+        )
+
+    results: List[Optional[Dict[str, Any]]] = [None] * len(batch.requests)
+    pending_reads: List[int] = []
+
+    async def flush_reads():
+        responses = await asyncio.gather(*(_dispatch(request, batch.requests[i]) for i in pending_reads))
+        for index, response in zip(pending_reads, responses):
+            results[index] = response
+        pending_reads.clear()
+
+    for index, sub in enumerate(batch.requests):
+        if sub.method == "GET":
+            pending_reads.append(index)
+            continue
+        await flush_reads()
+        results[index] = await _dispatch(request, sub)
+    await flush_reads()
+
+    return FastJSONResponse(
+        {
+            "responses": [
+                {"id": sub.id, **result} for sub, result in zip(batch.requests, results)
+            ]
+        }
+    )
@@ -11,6 +11,8 @@ from app.db.database import get_db
 from app.db.models import Company
 from app.schemas.company import CompanyAutocompleteResponse
 from app.core.security import get_current_user_id
+from app.core.projection import FIELDS_DESCRIPTION, Projection
+from app.core.responses import FastJSONResponse
 
 router = APIRouter()
 
@@ -53,12 +55,13 @@ def normalize_digits(query: str) -> Optional[int]:
 
 
 @router.get("/autocomplete", response_model=List[CompanyAutocompleteResponse])
-async def autocomplete_companies(
+def autocomplete_companies(
     query: str = Query(..., description="Search query for company name, MC number, or DOT number"),
     limit: int = Query(10, ge=1, le=100, description="Maximum number of results to return"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
     user_id: int = Depends(get_current_user_id),
     db: Session = Depends(get_db),
-) -> List[CompanyAutocompleteResponse]:
+):
     """
     Autocomplete companies by name, MC number, or DOT number.
     
@@ -74,9 +77,12 @@ async def autocomplete_companies(
     - Removes trailing zeros for numeric queries
     - Supports both numeric and text searches
     """
+    projection = Projection(Company, CompanyAutocompleteResponse, fields)
     if not query or not query.strip():
-        return []
+        return FastJSONResponse([])
     
+    # Only the projected columns, plus name for ranking
+    entities = projection.entities(Company.name)
     normalized_int = normalize_digits(query)
     results = []
     seen_ids = set()
@@ -89,7 +95,7 @@ async def autocomplete_companies(
     
     # 1. Exact MC match (rank 1)
     if normalized_int is not None:
-        mc_exact = db.query(Company).filter(
+        mc_exact = db.query(*entities).filter(
             base_filter,
             Company.mc_number == normalized_int
         ).all()
@@ -100,7 +106,7 @@ async def autocomplete_companies(
     
     # 2. Exact DOT match (rank 2)
     if normalized_int is not None:
-        dot_exact = db.query(Company).filter(
+        dot_exact = db.query(*entities).filter(
             base_filter,
             Company.dot_number == normalized_int
         ).all()
@@ -111,7 +117,7 @@ async def autocomplete_companies(
     
     # 3. MC prefix match (rank 3)
     if normalized_int is not None:
-        mc_prefix = db.query(Company).filter(
+        mc_prefix = db.query(*entities).filter(
             base_filter,
             Company.mc_number.isnot(None),
             cast(Company.mc_number, String).like(f"{normalized_int}%")
@@ -123,7 +129,7 @@ async def autocomplete_companies(
     
     # 4. DOT prefix match (rank 4)
     if normalized_int is not None:
-        dot_prefix = db.query(Company).filter(
+        dot_prefix = db.query(*entities).filter(
             base_filter,
             Company.dot_number.isnot(None),
             cast(Company.dot_number, String).like(f"{normalized_int}%")
@@ -134,7 +140,7 @@ async def autocomplete_companies(
                 seen_ids.add(company.id)
     
     # 5. Text match in search_text (rank 5)
-    text_matches = db.query(Company).filter(
+    text_matches = db.query(*entities).filter(
         base_filter,
         Company.search_text.isnot(None),
         Company.search_text.ilike(f"%{query}%")
@@ -151,4 +157,4 @@ async def autocomplete_companies(
     # Limit results
     limited_results = [company for _, company in results[:limit]]
     
-    return limited_results
+    return projection.response(limited_results)
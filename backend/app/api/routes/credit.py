@@ -2,13 +2,19 @@
 Credit Score Routes
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+import asyncio
+import time
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
-from typing import List
+from sqlalchemy import desc, func, select
+from starlette.background import BackgroundTask
+from starlette.responses import StreamingResponse
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 
-from app.db.database import get_db
+from app.db.database import SessionLocal, get_db
 from app.db.models import CreditCheckHistory, CreditCheck
 from app.schemas.credit import (
     CreditScoreResponse,
@@ -16,12 +22,32 @@ from app.schemas.credit import (
     CreditCheckResponse,
     CreditCheckRequest,
     CreditCheckRecordResponse,
+    CreditCheckSyncResponse,
+)
+from app.core.config import settings
+from app.core.etags import conditional
+from app.core.events import (
+    EVENT_STREAM_HEADERS,
+    Subscription,
+    TooManyStreams,
+    broker,
+    format_comment,
+    format_event,
+    format_retry,
 )
 from app.core.security import get_current_user_id, generate_uuid
 from app.core.factors_network import FactorsNetworkClient
+from app.core.pagination import decode_cursor, encode_cursor, keyset, page_of
+from app.core.projection import FIELDS_DESCRIPTION, Projection
+from app.core.responses import FastJSONResponse, dumps
 
 router = APIRouter()
 
+credit_check_list_adapter = TypeAdapter(List[CreditCheckRecordResponse])
+
+# Delta sync position: every insert and update moves a row to the end
+CREDIT_CHECK_SYNC_KEYS = ((CreditCheck.updated_at, datetime.fromisoformat), (CreditCheck.id, int))
+
 
 def calculate_approved_amount(status_value: str, load_amount: float) -> int:
     """Calculate approved amount based on credit status and load amount"""
@@ -51,9 +77,10 @@ def calculate_expiration_date(status_value: str) -> datetime:
 
 
 @router.get("/score", response_model=CreditScoreResponse)
-async def get_current_score(
+def get_current_score(
     user_id: int = Depends(get_current_user_id),
     db: Session = Depends(get_db),
+    etag: Dict[str, str] = Depends(conditional("credit_check_history")),
 ):
     """Get user's current credit score"""
     credit_history = (
@@ -157,25 +184,178 @@ async def check_credit_score(
 
 
 @router.get("/checks", response_model=List[CreditCheckRecordResponse])
-async def list_credit_checks(
+def list_credit_checks(
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
     user_id: int = Depends(get_current_user_id),
     db: Session = Depends(get_db),
+    etag: Dict[str, str] = Depends(conditional("credit_checks")),
 ):
-    checks = (
-        db.query(CreditCheck)
-        .filter(CreditCheck.user_id == user_id)
+    projection = Projection(CreditCheck, CreditCheckRecordResponse, fields)
+    checks = db.execute(
+        projection.select()
+        .where(CreditCheck.user_id == user_id)
         .order_by(desc(CreditCheck.created_at))
-        .all()
+    ).all()
+
+    return projection.response(checks, headers=etag)
+
+
+@router.get("/checks/sync", response_model=CreditCheckSyncResponse)
+def sync_credit_checks(
+    since: Optional[str] = Query(None, description="Watermark returned by the previous sync"),
+    limit: int = Query(settings.SYNC_PAGE_SIZE, ge=1, le=1000),
+    user_id: int = Depends(get_current_user_id),
+    db: Session = Depends(get_db),
+):
+    """
+    Credit checks created, updated or soft-deleted since `since`.
+
+    Without a watermark this returns the live rows. Call again with the
+    returned watermark while `has_more` is true. Rows updated in the last
+    SYNC_SAFETY_WINDOW_SECONDS are sent again on the next sync, so a write
+    whose transaction commits late is never skipped; clients apply changes
+    by id, so repeats are harmless.
+    """
+    statement = select(CreditCheck).where(CreditCheck.user_id == user_id)
+    if since is None:
+        statement = statement.where(CreditCheck.deleted_at.is_(None))
+    statement = keyset(statement, CREDIT_CHECK_SYNC_KEYS, limit, cursor=since, descending=False)
+    checks, next_cursor = page_of(db.scalars(statement).all(), CREDIT_CHECK_SYNC_KEYS, limit)
+
+    watermark = next_cursor or since
+    if checks and not next_cursor:
+        position = [checks[-1].updated_at, checks[-1].id]
+        safe_until = db.execute(select(func.now())).scalar_one() - timedelta(
+            seconds=settings.SYNC_SAFETY_WINDOW_SECONDS
+        )
+        if position[0] > safe_until:
+            position = [safe_until, 0]
+        if since is None or position > decode_cursor(since, CREDIT_CHECK_SYNC_KEYS):
+            watermark = encode_cursor(position)
+
+    return FastJSONResponse(
+        {
+            "changes": credit_check_list_adapter.dump_python(
+                credit_check_list_adapter.validate_python(checks, from_attributes=True)
+            ),
+            "watermark": watermark,
+            "has_more": next_cursor is not None,
+        }
     )
 
-    return [CreditCheckRecordResponse.model_validate(check) for check in checks]
+
+def _read_check_changes(user_id: int, cursor: str) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """One sync page after `cursor`, rendered, on its own short-lived session"""
+    db = SessionLocal()
+    try:
+        limit = settings.SYNC_PAGE_SIZE
+        statement = keyset(
+            select(CreditCheck).where(CreditCheck.user_id == user_id),
+            CREDIT_CHECK_SYNC_KEYS,
+            limit,
+            cursor=cursor,
+            descending=False,
+        )
+        checks, next_cursor = page_of(db.scalars(statement).all(), CREDIT_CHECK_SYNC_KEYS, limit)
+        rendered = credit_check_list_adapter.dump_python(
+            credit_check_list_adapter.validate_python(checks, from_attributes=True)
+        )
+        return rendered, next_cursor
+    finally:
+        db.close()
+
+
+def _read_now() -> datetime:
+    db = SessionLocal()
+    try:
+        return db.execute(select(func.now())).scalar_one()
+    finally:
+        db.close()
+
+
+async def _credit_check_events(user_id: int, position: List[Any], subscription: Subscription) -> AsyncIterator[bytes]:
+    """
+    Changes after `position`, then more each time the subscription wakes.
+
+    Like /checks/sync, every read goes back SYNC_SAFETY_WINDOW_SECONDS so a
+    write whose transaction commits late is still sent; rows already sent
+    at the same version are skipped. Each event id is the sync watermark up
+    to and including that event.
+    """
+    window = timedelta(seconds=settings.SYNC_SAFETY_WINDOW_SECONDS)
+    deadline = time.monotonic() + settings.SSE_MAX_STREAM_SECONDS
+    sent: Dict[int, datetime] = {}
+    try:
+        yield format_retry(settings.SSE_RETRY_MS)
+        while True:
+            cursor = encode_cursor([position[0] - window, 0])
+            while cursor is not None:
+                changes, cursor = await asyncio.to_thread(_read_check_changes, user_id, cursor)
+                for change in changes:
+                    if sent.get(change["id"]) == change["updated_at"]:
+                        continue
+                    sent[change["id"]] = change["updated_at"]
+                    position = max(position, [change["updated_at"], change["id"]])
+                    yield format_event(dumps(change), event="credit_check", event_id=encode_cursor(position))
+            horizon = position[0] - window
+            sent = {check_id: updated_at for check_id, updated_at in sent.items() if updated_at >= horizon}
+
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                if await subscription.wait(min(settings.SSE_HEARTBEAT_SECONDS, remaining)):
+                    break
+                yield format_comment("heartbeat")
+    finally:
+        broker.unsubscribe(subscription)
+
+
+@router.get("/checks/stream", response_class=StreamingResponse)
+async def stream_credit_checks(
+    since: Optional[str] = Query(None, description="Watermark from /checks/sync to resume from"),
+    last_event_id: Optional[str] = Header(None, description="Sent by EventSource clients when reconnecting"),
+    user_id: int = Depends(get_current_user_id),
+):
+    """
+    Server-sent `credit_check` events as the user's credit checks are
+    created, change status, or are deleted, so clients need not poll.
+
+    Each event's data is the full record, as in /checks/sync. Reconnecting
+    with Last-Event-ID (or `since`) replays what was missed; without either
+    the stream starts from now. Idle streams get a heartbeat comment every
+    SSE_HEARTBEAT_SECONDS, and are closed after SSE_MAX_STREAM_SECONDS so
+    clients reconnect with a fresh token.
+    """
+    cursor = last_event_id or since
+    if cursor:
+        position = decode_cursor(cursor, CREDIT_CHECK_SYNC_KEYS)
+    else:
+        position = [await asyncio.to_thread(_read_now), 0]
+
+    try:
+        subscription = broker.subscribe(user_id)
+    except TooManyStreams as exc:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(exc),
+        )
+
+    return StreamingResponse(
+        _credit_check_events(user_id, position, subscription),
+        media_type="text/event-stream",
+        headers=EVENT_STREAM_HEADERS,
+        # Runs even if the client disconnects before the stream starts
+        background=BackgroundTask(broker.unsubscribe, subscription),
+    )
 
 
 @router.get("/history", response_model=List[CreditHistory])
-async def get_credit_history(
+def get_credit_history(
     months: int = 6,
     user_id: int = Depends(get_current_user_id),
     db: Session = Depends(get_db),
+    etag: Dict[str, str] = Depends(conditional("credit_check_history")),
 ):
     """Get credit score history"""
     history_records = (
@@ -0,0 +1,86 @@
+"""
+Dashboard Routes
+"""
+
+import asyncio
+from typing import Dict
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import desc, select
+
+from app.db.database import SessionLocal
+from app.db.models import Balance, CreditCheck, CreditCheckHistory, User
+from app.schemas.dashboard import DashboardResponse
+from app.core.security import get_current_user_id
+from app.core.etags import conditional
+from app.core.responses import FastJSONResponse
+
+router = APIRouter()
+
+
+def _read(statement):
+    """Run one read on its own short-lived session so reads can overlap"""
+    db = SessionLocal()
+    try:
+        return db.execute(statement).all()
+    finally:
+        db.close()
+
+
+@router.get("", response_model=DashboardResponse)
+async def get_dashboard(
+    months: int = Query(6, ge=1, le=24),
+    checks: int = Query(5, ge=0, le=50),
+    user_id: int = Depends(get_current_user_id),
+    etag: Dict[str, str] = Depends(conditional("users", "balances", "credit_checks", "credit_check_history")),
+):
+    """
+    Profile, balance, latest credit decision, recent checks and history.
+
+    Replaces the five calls the app makes on start. The three reads are
+    independent, so they run concurrently in worker threads; the latest
+    decision is the head of the history read.
+    """
+    profile, history, recent_checks = await asyncio.gather(
+        asyncio.to_thread(
+            _read,
+            select(User, Balance).outerjoin(Balance, Balance.user_id == User.id).where(User.id == user_id),
+        ),
+        asyncio.to_thread(
+            _read,
+            select(CreditCheckHistory)
+            .where(CreditCheckHistory.user_id == user_id)
+            .order_by(desc(CreditCheckHistory.created_at))
+            .limit(months),
+        ),
+        asyncio.to_thread(
+            _read,
+            select(CreditCheck)
+            .where(CreditCheck.user_id == user_id)
+            .order_by(desc(CreditCheck.created_at))
+            .limit(checks),
+        ),
+    )
+
+    if not profile:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found",
+        )
+
+    user, balance = profile[0]
+    history_records = [row[0] for row in history]
+    payload = DashboardResponse.model_validate(
+        {
+            "user": user,
+            "balance": balance,
+            "credit_score": history_records[0] if history_records else None,
+            "recent_checks": [row[0] for row in recent_checks],
+            "history": [
+                {"month": record.created_at.strftime("%b"), "result": record.status}
+                for record in reversed(history_records)
+            ],
+        },
+        from_attributes=True,
+    )
+    return FastJSONResponse(payload.model_dump(), headers=etag)
@@ -0,0 +1,99 @@
+"""
+Fuel Routes
+"""
+
+from datetime import datetime, timezone
+from typing import List, Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy.orm import Session
+
+from app.db.database import get_db
+from app.db.models import FuelPurchase
+from app.schemas.fuel import FuelPurchaseCreate, FuelPurchaseResponse, FuelSummaryResponse
+from app.core.security import get_current_user_id
+from app.core.pagination import NEXT_CURSOR_HEADER, keyset, page_of
+from app.core.projection import FIELDS_DESCRIPTION, Projection
+from app.core import fuel
+
+router = APIRouter()
+
+FUEL_HISTORY_KEYS = ((FuelPurchase.purchased_at, datetime.fromisoformat), (FuelPurchase.id, int))
+
+
+@router.get("/summary", response_model=FuelSummaryResponse)
+def get_fuel_summary(
+    period: Literal["day", "week", "month", "year"] = "month",
+    user_id: int = Depends(get_current_user_id),
+    db: Session = Depends(get_db),
+):
+    """Fuel totals for the current period, read from the rollups"""
+    summary = fuel.summarize(db, user_id, period, datetime.now(timezone.utc).date())
+    last = fuel.last_purchase(db, user_id)
+    return FuelSummaryResponse(
+        **summary,
+        last_fill_up=FuelPurchaseResponse.model_validate(last) if last else None,
+    )
+
+
+@router.get("/history", response_model=List[FuelPurchaseResponse])
+def get_fuel_history(
+    limit: int = Query(10, ge=1, le=100),
+    offset: int = Query(0, ge=0, description="Deprecated; use cursor"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    user_id: int = Depends(get_current_user_id),
+    db: Session = Depends(get_db),
+):
+    """List fill-ups, newest first"""
+    projection = Projection(FuelPurchase, FuelPurchaseResponse, fields)
+    statement = keyset(
+        projection.select(*(column for column, _ in FUEL_HISTORY_KEYS)).where(FuelPurchase.user_id == user_id),
+        FUEL_HISTORY_KEYS,
+        limit,
+        cursor=cursor,
+        offset=offset,
+    )
+    purchases, next_cursor = page_of(db.execute(statement).all(), FUEL_HISTORY_KEYS, limit)
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+    return projection.response(purchases, headers=headers)
+
+
+@router.post("/purchase", response_model=FuelPurchaseResponse, status_code=status.HTTP_201_CREATED)
+async def add_fuel_purchase(
+    payload: FuelPurchaseCreate,
+    user_id: int = Depends(get_current_user_id),
+    db: Session = Depends(get_db),
+):
+    """Record a fill-up and add it to the rollups"""
+    purchased_at = payload.date or datetime.now(timezone.utc)
+    if purchased_at.tzinfo is None:
+        purchased_at = purchased_at.replace(tzinfo=timezone.utc)
+    purchase = fuel.record_purchase(
+        db,
+        user_id,
+        payload.station,
+        payload.gallons,
+        payload.price_per_gallon,
+        purchased_at,
+        retail_price_per_gallon=payload.retail_price_per_gallon,
+    )
+    db.commit()
+    db.refresh(purchase)
+    return FuelPurchaseResponse.model_validate(purchase)
+
+
+@router.delete("/purchase/{purchase_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_fuel_purchase(
+    purchase_id: int,
+    user_id: int = Depends(get_current_user_id),
+    db: Session = Depends(get_db),
+):
+    """Delete a fill-up and remove it from the rollups"""
+    if not fuel.delete_purchase(db, user_id, purchase_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Fuel purchase not found",
+        )
+    db.commit()
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,253 @@
+"""
+Receivables aging
+
+Each user's Balance row holds the outstanding receivables total and its
+split into aging buckets. Instead of summing the ledger on every read, the
+row is adjusted in place whenever an invoice or payment is recorded, and a
+nightly roll moves outstanding amounts to the next bucket as invoices age.
+Reading a balance is then a single-row lookup regardless of ledger size.
+
+All adjustments are relative (`column = column + delta`) so concurrent
+events for the same user cannot overwrite each other. Paths that lock
+rows take the user's Balance row first and their receivables second, so
+payments and the roll cannot deadlock.
+"""
+
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, bindparam, case, func, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.db import versioning
+from app.db.models import Balance, Receivable
+
+# (bucket column, oldest age in days it holds), youngest first
+BUCKETS: Tuple[Tuple[str, Optional[int]], ...] = (
+    ("age_0_30", 30),
+    ("age_31_60", 60),
+    ("age_61_90", 90),
+    ("age_90_plus", None),
+)
+BUCKET_COLUMNS = tuple(column for column, _ in BUCKETS)
+
+# Users rolled per transaction; keeps balance locks short for live payments
+ROLL_CHUNK_USERS = 500
+
+
+def bucket_for(invoice_date: date, today: date) -> str:
+    """Bucket column for an invoice dated `invoice_date` as of `today`"""
+    age = (today - invoice_date).days
+    for column, max_age in BUCKETS:
+        if max_age is None or age <= max_age:
+            return column
+    return BUCKET_COLUMNS[-1]
+
+
+def adjust_balance(db: Session, user_id: int, deltas: Dict[str, Decimal]) -> None:
+    """
+    Add `deltas` (bucket column -> amount) to a user's balance.
+
+    total_account_receivable moves by the sum of the deltas. A missing
+    balance row is created; a concurrent insert falls back to the update.
+    """
+    total = sum(deltas.values(), Decimal("0"))
+    values = {column: getattr(Balance, column) + delta for column, delta in deltas.items()}
+    values["total_account_receivable"] = Balance.total_account_receivable + total
+    values["updated_at"] = func.now()
+    statement = update(Balance).where(Balance.user_id == user_id).values(**values)
+
+    if db.execute(statement).rowcount:
+        versioning.bump(db, {"balances": [user_id]})
+        return
+    try:
+        with db.begin_nested():
+            row = {column: Decimal("0") for column in BUCKET_COLUMNS}
+            row.update(deltas)
+            db.add(Balance(user_id=user_id, total_account_receivable=total, **row))
+    except IntegrityError:
+        db.execute(statement)
+        versioning.bump(db, {"balances": [user_id]})
+
+
+def record_invoice(
+    db: Session,
+    user_id: int,
+    amount: Decimal,
+    invoice_date: date,
+    invoice_number: Optional[str] = None,
+    mc_number: Optional[int] = None,
+    today: Optional[date] = None,
+) -> Receivable:
+    """Add an invoice to the ledger and to the matching balance bucket"""
+    bucket = bucket_for(invoice_date, today or date.today())
+    receivable = Receivable(
+        user_id=user_id,
+        mc_number=mc_number,
+        invoice_number=invoice_number,
+        amount=amount,
+        paid_amount=Decimal("0"),
+        invoice_date=invoice_date,
+        bucket=bucket,
+        status="open",
+    )
+    db.add(receivable)
+    db.flush()
+    adjust_balance(db, user_id, {bucket: amount})
+    return receivable
+
+
+def lock_receivable(db: Session, user_id: int, receivable_id: int) -> Optional[Receivable]:
+    """
+    Load a user's receivable with a row lock, so payments and the roll
+    serialize. The user's balance is locked first, in the roll's order.
+    """
+    db.execute(select(Balance.user_id).where(Balance.user_id == user_id).with_for_update())
+    return db.execute(
+        select(Receivable)
+        .where(Receivable.id == receivable_id, Receivable.user_id == user_id)
+        .with_for_update()
+    ).scalar_one_or_none()
+
+
+def record_payment(db: Session, receivable: Receivable, amount: Decimal) -> Receivable:
+    """
+    Apply a payment to a locked receivable (see `lock_receivable`).
+
+    The amount comes off the bucket the invoice currently sits in. Raises
+    ValueError when it exceeds what is outstanding.
+    """
+    outstanding = receivable.amount - receivable.paid_amount
+    if amount > outstanding:
+        raise ValueError(f"Payment exceeds outstanding amount {outstanding}")
+    receivable.paid_amount = receivable.paid_amount + amount
+    if receivable.paid_amount >= receivable.amount:
+        receivable.status = "paid"
+    db.flush()
+    adjust_balance(db, receivable.user_id, {receivable.bucket: -amount})
+    return receivable
+
+
+def roll_buckets(db: Session, today: date, chunk_size: int = ROLL_CHUNK_USERS) -> List[Tuple[str, str, int]]:
+    """
+    Move open receivables that aged past their bucket into the next one.
+
+    Users with due receivables are rolled `chunk_size` at a time, each
+    chunk in its own committed transaction. A chunk locks its balances in
+    user_id order before touching receivables, the same order payments
+    use, and holds them only until that chunk commits. Transitions run
+    youngest first, so an invoice missed by earlier runs can advance
+    several buckets in one pass. Returns (from, to, moved rows) per
+    transition.
+    """
+    transitions = [(source, max_age, target) for (source, max_age), (target, _) in zip(BUCKETS, BUCKETS[1:])]
+    due = or_(
+        *[
+            and_(Receivable.bucket == source, Receivable.invoice_date < today - timedelta(days=max_age))
+            for source, max_age, _ in transitions
+        ]
+    )
+    outstanding = Receivable.amount - Receivable.paid_amount
+    balances = Balance.__table__
+    moved_counts = [0] * len(transitions)
+    last_user_id = 0
+    while True:
+        user_ids = db.execute(
+            select(Receivable.user_id)
+            .where(Receivable.status == "open", due, Receivable.user_id > last_user_id)
+            .group_by(Receivable.user_id)
+            .order_by(Receivable.user_id)
+            .limit(chunk_size)
+        ).scalars().all()
+        if not user_ids:
+            break
+        last_user_id = user_ids[-1]
+
+        db.execute(
+            select(Balance.user_id).where(Balance.user_id.in_(user_ids)).order_by(Balance.user_id).with_for_update()
+        ).all()
+        for index, (source, max_age, target) in enumerate(transitions):
+            moved = db.execute(
+                update(Receivable)
+                .where(
+                    Receivable.user_id.in_(user_ids),
+                    Receivable.status == "open",
+                    Receivable.bucket == source,
+                    Receivable.invoice_date < today - timedelta(days=max_age),
+                )
+                .values(bucket=target, updated_at=func.now())
+                .returning(Receivable.user_id, outstanding)
+                .execution_options(synchronize_session=False)
+            ).all()
+
+            totals: Dict[int, Decimal] = defaultdict(Decimal)
+            for user_id, amount in moved:
+                totals[user_id] += amount
+            if totals:
+                # Core table so the per-user updates run as one executemany
+                db.execute(
+                    update(balances)
+                    .where(balances.c.user_id == bindparam("uid"))
+                    .values(
+                        {
+                            source: balances.c[source] - bindparam("amount"),
+                            target: balances.c[target] + bindparam("amount"),
+                            "updated_at": func.now(),
+                        }
+                    ),
+                    [{"uid": user_id, "amount": amount} for user_id, amount in totals.items()],
+                )
+                versioning.bump(db, {"balances": totals})
+            moved_counts[index] += len(moved)
+        db.commit()
+
+    return [(source, target, count) for (source, _, target), count in zip(transitions, moved_counts)]
+
+
+def rebuild_balances(db: Session, today: date, user_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    Recompute buckets from the ledger, for reconciliation and backfill.
+
+    Locks the selected balances (all by default), re-buckets their open
+    receivables by date, then overwrites the bucket columns and receivable
+    totals. Returns the number of balances rebuilt.
+    """
+    age_bucket = case(
+        *[
+            (Receivable.invoice_date >= today - timedelta(days=max_age), column)
+            for column, max_age in BUCKETS
+            if max_age is not None
+        ],
+        else_=BUCKET_COLUMNS[-1],
+    )
+    rebucket = update(Receivable).where(Receivable.status == "open").values(bucket=age_bucket)
+    balances = update(Balance)
+    locked = select(Balance.user_id).order_by(Balance.user_id).with_for_update()
+    if user_ids is not None:
+        user_ids = list(user_ids)
+        rebucket = rebucket.where(Receivable.user_id.in_(user_ids))
+        balances = balances.where(Balance.user_id.in_(user_ids))
+        locked = locked.where(Balance.user_id.in_(user_ids))
+    # Balances before receivables, in user_id order, like payments and the roll
+    db.execute(locked).all()
+    db.execute(rebucket.execution_options(synchronize_session=False))
+
+    zero = {column: 0 for column in BUCKET_COLUMNS + ("total_account_receivable",)}
+    rebuilt = db.execute(
+        balances.values(**zero, updated_at=func.now())
+        .returning(Balance.user_id)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+    versioning.bump(db, {"balances": rebuilt})
+
+    sums = select(Receivable.user_id, Receivable.bucket, func.sum(Receivable.amount - Receivable.paid_amount)).where(
+        Receivable.status == "open"
+    )
+    if user_ids is not None:
+        sums = sums.where(Receivable.user_id.in_(user_ids))
+    for user_id, bucket, amount in db.execute(sums.group_by(Receivable.user_id, Receivable.bucket)).all():
+        adjust_balance(db, user_id, {bucket: Decimal(amount)})
+    return len(rebuilt)
@@ -0,0 +1,180 @@
+"""
+Response compression
+
+ASGI middleware that gzip- or brotli-compresses responses for clients that
+accept it. Brotli is used when the optional `brotli` package is installed
+and the client prefers or equally accepts it; otherwise gzip.
+
+Only allowlisted content types at or above a minimum size are compressed;
+tiny bodies would gain little and cost a compressor each. Event streams are
+never compressed (buffering would hold back events). Large buffered bodies
+are compressed in a worker thread so they don't stall the event loop.
+Strong ETags become weak once the body is re-encoded.
+
+Run scripts/bench_compression.py to compare levels on real payload shapes.
+"""
+
+import zlib
+from typing import Dict, Iterable, Optional
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+# Buffered bodies larger than this are compressed off the event loop
+_OFFLOAD_BYTES = 64 * 1024
+_NEVER_COMPRESS = ("text/event-stream",)
+
+
+def negotiate(accept_encoding: str, supported: Iterable[str]) -> Optional[str]:
+    """Pick the best supported coding from an Accept-Encoding header, or None"""
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[coding] = weight
+
+    best, best_weight = None, 0.0
+    for coding in supported:  # in preference order, so ties go to the earlier one
+        weight = weights.get(coding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = coding, weight
+    return best
+
+
+class _Compressor:
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=brotli_quality)
+            self._compress, self._finish = self._compressor.process, self._compressor.finish
+        else:
+            # wbits 16+ writes a gzip header and trailer
+            self._compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            self._compress, self._finish = self._compressor.compress, self._compressor.flush
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compress(data)
+
+    def finish(self) -> bytes:
+        return self._finish()
+
+    def compress_all(self, data: bytes) -> bytes:
+        return self._compress(data) + self._finish()
+
+
+class CompressionMiddleware:
+    """Compress allowlisted responses with gzip or brotli"""
+
+    def __init__(
+        self,
+        app,
+        minimum_size: Optional[int] = None,
+        gzip_level: Optional[int] = None,
+        brotli_quality: Optional[int] = None,
+        content_types: Optional[Iterable[str]] = None,
+    ):
+        self.app = app
+        self.minimum_size = settings.COMPRESSION_MIN_SIZE if minimum_size is None else minimum_size
+        self.gzip_level = settings.COMPRESSION_GZIP_LEVEL if gzip_level is None else gzip_level
+        self.brotli_quality = settings.COMPRESSION_BROTLI_QUALITY if brotli_quality is None else brotli_quality
+        content_types = settings.COMPRESSION_CONTENT_TYPES if content_types is None else content_types
+        self.content_types = tuple(content_type.lower() for content_type in content_types)
+        self.supported = ("br", "gzip") if brotli is not None else ("gzip",)
+
+    def _compressible(self, headers: Headers) -> bool:
+        media_type = headers.get("content-type", "").split(";", 1)[0].strip().lower()
+        if not media_type or media_type in _NEVER_COMPRESS:
+            return False
+        return any(
+            media_type == allowed or (allowed.endswith("/*") and media_type.startswith(allowed[:-1]))
+            for allowed in self.content_types
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""), self.supported)
+        start_message = None
+        compressor: Optional[_Compressor] = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, compressor, passthrough
+
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is not None:
+                # Streaming response already being compressed
+                data = compressor.compress(body)
+                if not more_body:
+                    data += compressor.finish()
+                if data or not more_body:
+                    await send({"type": "http.response.body", "body": data, "more_body": more_body})
+                return
+
+            headers = MutableHeaders(raw=start_message["headers"])
+            compressible = self._compressible(headers)
+            if compressible:
+                headers.add_vary_header("Accept-Encoding")
+            if (
+                not compressible
+                or encoding is None
+                or "content-encoding" in headers
+                or start_message["status"] in (204, 304)
+                or (not more_body and len(body) < self.minimum_size)
+            ):
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            headers["Content-Encoding"] = encoding
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                headers["ETag"] = f"W/{etag}"
+            compressor = _Compressor(encoding, self.gzip_level, self.brotli_quality)
+
+            if not more_body:
+                if len(body) > _OFFLOAD_BYTES:
+                    data = await run_in_threadpool(compressor.compress_all, body)
+                else:
+                    data = compressor.compress_all(body)
+                headers["Content-Length"] = str(len(data))
+                await send(start_message)
+                await send({"type": "http.response.body", "body": data, "more_body": False})
+                return
+
+            del headers["Content-Length"]
+            await send(start_message)
+            await send({"type": "http.response.body", "body": compressor.compress(body), "more_body": True})
+
+        await self.app(scope, receive, send_wrapper)
@@ -4,7 +4,7 @@ Manages environment variables and settings
 """
 
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List
 import os
 
 
@@ -61,6 +61,63 @@ class Settings(BaseSettings):
     FACTORS_NETWORK_VERIFY_SSL: bool = os.getenv("FACTORS_NETWORK_VERIFY_SSL", "true").lower() == "true"
     FACTORS_NETWORK_TIMEOUT_SECONDS: float = float(os.getenv("FACTORS_NETWORK_TIMEOUT_SECONDS", "30.0"))
     
+    # FMCSA SAFER API Settings
+    SAFER_WEB_KEY: str = os.getenv("SAFER_WEB_KEY", "")
+    SAFER_REQUESTS_PER_SECOND: float = float(os.getenv("SAFER_REQUESTS_PER_SECOND", "1.0"))  # account quota
+    
+    # Rate Limiting & Load Shedding
+    RATE_LIMIT_ENABLED: bool = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+    RATE_LIMIT_BACKEND: str = os.getenv("RATE_LIMIT_BACKEND", "memory")  # "memory" or "postgres"
+    RATE_LIMIT_DEFAULT: str = os.getenv("RATE_LIMIT_DEFAULT", "120/minute")  # per user, all routes
+    RATE_LIMIT_ROUTES: Dict[str, str] = {  # per user, per route (paths relative to API_V1_PREFIX)
+        "/credit/check": "10/minute",
+        "/companies/autocomplete": "60/minute",
+    }
+    LOAD_SHED_MAX_IN_FLIGHT: int = int(os.getenv("LOAD_SHED_MAX_IN_FLIGHT", "200"))  # 0 disables
+    
+    # Request Batching
+    BATCH_MAX_REQUESTS: int = int(os.getenv("BATCH_MAX_REQUESTS", "20"))  # sub-requests per /batch call
+    
+    # Delta Sync
+    SYNC_PAGE_SIZE: int = int(os.getenv("SYNC_PAGE_SIZE", "500"))
+    SYNC_SAFETY_WINDOW_SECONDS: float = float(os.getenv("SYNC_SAFETY_WINDOW_SECONDS", "5"))  # re-send rows this recent
+    
+    # Server-Sent Events
+    STREAMING_ROUTES: List[str] = [  # long-lived; not load shed or reported as slow (paths relative to API_V1_PREFIX)
+        "/credit/checks/stream",
+    ]
+    SSE_HEARTBEAT_SECONDS: float = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))  # keeps idle proxies from closing streams
+    SSE_RETRY_MS: int = int(os.getenv("SSE_RETRY_MS", "3000"))  # client reconnect delay
+    SSE_MAX_STREAM_SECONDS: float = float(os.getenv("SSE_MAX_STREAM_SECONDS", "3600"))  # then clients reconnect and re-authenticate
+    SSE_MAX_STREAMS_PER_USER: int = int(os.getenv("SSE_MAX_STREAMS_PER_USER", "5"))  # 0 disables
+    
+    # Response Compression (brotli is used when the brotli package is installed)
+    COMPRESSION_ENABLED: bool = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+    COMPRESSION_MIN_SIZE: int = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))  # bytes; smaller bodies go out as-is
+    COMPRESSION_GZIP_LEVEL: int = int(os.getenv("COMPRESSION_GZIP_LEVEL", "3"))  # 1-9; see scripts/bench_compression.py
+    COMPRESSION_BROTLI_QUALITY: int = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))  # 0-11
+    COMPRESSION_CONTENT_TYPES: List[str] = [
+        "application/json",
+        "application/javascript",
+        "image/svg+xml",
+        "text/*",
+    ]
+    
+    # Observability
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    SQL_SLOW_QUERY_MS: float = float(os.getenv("SQL_SLOW_QUERY_MS", "200"))
+    SLOW_REQUEST_MS: float = float(os.getenv("SLOW_REQUEST_MS", "1000"))
+    SQL_DETECT_N_PLUS_ONE: bool = os.getenv("SQL_DETECT_N_PLUS_ONE", "false").lower() == "true"  # development only
+    SQL_N_PLUS_ONE_THRESHOLD: int = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", "5"))
+    
+    # Request Profiling (send X-Profile-Token: <PROFILER_TOKEN> to profile a request)
+    PROFILER_TOKEN: str = os.getenv("PROFILER_TOKEN", "")  # empty disables header-triggered profiling
+    PROFILER_SAMPLE_RATE: float = float(os.getenv("PROFILER_SAMPLE_RATE", "0"))  # fraction of all requests
+    PROFILER_INTERVAL_MS: float = float(os.getenv("PROFILER_INTERVAL_MS", "5"))
+    PROFILER_OUTPUT_DIR: str = os.getenv("PROFILER_OUTPUT_DIR", "profiles")
+    PROFILER_MAX_FILES: int = int(os.getenv("PROFILER_MAX_FILES", "100"))
+    PROFILER_MAX_TOTAL_MB: int = int(os.getenv("PROFILER_MAX_TOTAL_MB", "200"))
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -0,0 +1,65 @@
+"""
+Conditional GET
+
+`conditional(*resources)` is a route dependency that derives a weak ETag
+from the caller's resource versions (see app.db.versioning), the request
+path and query, and the API version. When If-None-Match already matches,
+it short-circuits with `304 Not Modified` before the route body runs, so
+unchanged data is neither queried nor serialized.
+
+Otherwise it sets the ETag on the injected response and returns it; routes
+that return a Response object themselves pass it on in their headers.
+"""
+
+import hashlib
+from typing import Callable, Dict
+
+from fastapi import Depends, HTTPException, Request, Response, status
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.security import get_current_user_id
+from app.db import versioning
+from app.db.database import get_db
+
+# Clients must revalidate, and shared caches must not store per-user data
+CACHE_CONTROL = "private, no-cache"
+
+
+def compute_etag(request: Request, user_id: int, versions: Dict[str, int]) -> str:
+    parts = [settings.VERSION, request.url.path, request.url.query, str(user_id)]
+    parts += [f"{resource}:{version}" for resource, version in sorted(versions.items())]
+    digest = hashlib.blake2b("|".join(parts).encode("utf-8"), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison against an If-None-Match header value"""
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(","))
+
+
+def conditional(*resources: str) -> Callable:
+    """Dependency factory: 304 when none of `resources` changed for the user"""
+    unknown = set(resources) - set(versioning.TRACKED)
+    if unknown:
+        raise ValueError(f"Untracked resources: {', '.join(sorted(unknown))}")
+
+    # Plain function: FastAPI runs it in the threadpool, off the event loop
+    def dependency(
+        request: Request,
+        response: Response,
+        user_id: int = Depends(get_current_user_id),
+        db: Session = Depends(get_db),
+    ) -> Dict[str, str]:
+        etag = compute_etag(request, user_id, versioning.get_versions(db, user_id, resources))
+        headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and etag_matches(if_none_match, etag):
+            raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        response.headers.update(headers)
+        return headers
+
+    return dependency
@@ -0,0 +1,130 @@
+"""
+Server-sent events
+
+An in-process broker that wakes a user's open event streams when their
+data changes. Notifications carry only the user id: a woken stream reads
+what changed from the database itself, from the position it last sent, so
+missed or coalesced notifications never lose events.
+
+Writers publish after commit (see app.db.notifications). With Postgres,
+commits are fanned out through LISTEN/NOTIFY so a change made on one
+worker wakes streams held open by every other worker.
+"""
+
+import asyncio
+import threading
+from collections import defaultdict
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Set
+
+from app.core.config import settings
+
+EVENT_STREAM_HEADERS = {
+    "Cache-Control": "no-cache",
+    # Stop reverse proxies from buffering events
+    "X-Accel-Buffering": "no",
+}
+
+
+class TooManyStreams(ValueError):
+    """The user already has the maximum number of open streams"""
+
+
+def format_event(data: bytes, event: Optional[str] = None, event_id: Optional[str] = None) -> bytes:
+    """One event in text/event-stream framing; `data` must be a single line (e.g. JSON)"""
+    lines = []
+    if event_id is not None:
+        lines.append(b"id: " + event_id.encode("utf-8"))
+    if event is not None:
+        lines.append(b"event: " + event.encode("utf-8"))
+    lines.append(b"data: " + data)
+    return b"\n".join(lines) + b"\n\n"
+
+
+def format_comment(text: str) -> bytes:
+    """A comment line; clients ignore it, proxies see traffic"""
+    return f": {text}\n\n".encode("utf-8")
+
+
+def format_retry(milliseconds: int) -> bytes:
+    """Tell the client how long to wait before reconnecting"""
+    return f"retry: {milliseconds}\n\n".encode("utf-8")
+
+
+class Subscription:
+    """Wake-up signal for one open stream"""
+
+    def __init__(self, user_id: int):
+        self.user_id = user_id
+        self._loop = asyncio.get_running_loop()
+        self._event = asyncio.Event()
+
+    def notify(self) -> None:
+        """Wake the stream; safe to call from any thread"""
+        self._loop.call_soon_threadsafe(self._event.set)
+
+    async def wait(self, timeout: float) -> bool:
+        """True when notified, False after `timeout` seconds without a notification"""
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        self._event.clear()
+        return True
+
+
+class Broker:
+    """Open streams by user id, and the optional cross-worker listener"""
+
+    def __init__(self, max_streams_per_user: Optional[int] = None):
+        self.max_streams_per_user = (
+            settings.SSE_MAX_STREAMS_PER_USER if max_streams_per_user is None else max_streams_per_user
+        )
+        self.listener: Optional[Callable[["Broker"], Awaitable[None]]] = None
+        self._subscriptions: Dict[int, Set[Subscription]] = defaultdict(set)
+        # publish() runs after commit, which may be on a worker thread
+        self._lock = threading.Lock()
+        self._listener_task: Optional[asyncio.Task] = None
+
+    def subscribe(self, user_id: int) -> Subscription:
+        subscription = Subscription(user_id)
+        with self._lock:
+            subscriptions = self._subscriptions[user_id]
+            if self.max_streams_per_user and len(subscriptions) >= self.max_streams_per_user:
+                raise TooManyStreams(f"At most {self.max_streams_per_user} open streams per user")
+            subscriptions.add(subscription)
+        self._ensure_listener()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.user_id]
+
+    def publish(self, user_ids: Iterable[int]) -> None:
+        """Wake every stream held by `user_ids` in this process"""
+        with self._lock:
+            targets = [
+                subscription
+                for user_id in set(user_ids)
+                for subscription in self._subscriptions.get(user_id, ())
+            ]
+        for subscription in targets:
+            subscription.notify()
+
+    def publish_all(self) -> None:
+        """Wake every stream, e.g. after notifications may have been missed"""
+        with self._lock:
+            targets = [subscription for subscriptions in self._subscriptions.values() for subscription in subscriptions]
+        for subscription in targets:
+            subscription.notify()
+
+    def _ensure_listener(self) -> None:
+        # Started with the first stream, on the loop serving it
+        if self.listener is not None and (self._listener_task is None or self._listener_task.done()):
+            self._listener_task = asyncio.get_running_loop().create_task(self.listener(self))
+
+
+broker = Broker()
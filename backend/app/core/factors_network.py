@@ -2,10 +2,12 @@
 FactorsNetwork API Client
 """
 
+import time
 import httpx
 from typing import List, Dict, Any, Optional
 
 from app.core.config import settings
+from app.core.metrics import FACTORS_NETWORK_REQUEST_DURATION
 
 
 class FactorsNetworkClient:
@@ -24,6 +26,17 @@ class FactorsNetworkClient:
             return httpx.BasicAuth(self.username, self.password)
         return None
     
+    async def _get(self, client: httpx.AsyncClient, endpoint: str, url: str, **kwargs) -> httpx.Response:
+        """Issue a GET and record its latency under the endpoint name"""
+        status = "error"
+        start = time.perf_counter()
+        try:
+            response = await client.get(url, auth=self._get_auth(), **kwargs)
+            status = str(response.status_code)
+            return response
+        finally:
+            FACTORS_NETWORK_REQUEST_DURATION.observe(time.perf_counter() - start, endpoint, status)
+    
     async def search_debtors(
         self,
         mc_number: Optional[str] = None,
@@ -54,10 +67,11 @@ class FactorsNetworkClient:
             timeout=self.timeout,
             verify=self.verify_ssl
         ) as client:
-            response = await client.get(
+            response = await self._get(
+                client,
+                "search_debtors",
                 "/api/debtors.json",
                 params=params,
-                auth=self._get_auth()
             )
             response.raise_for_status()
             payload = response.json()
@@ -79,9 +93,10 @@ class FactorsNetworkClient:
             timeout=self.timeout,
             verify=self.verify_ssl
         ) as client:
-            response = await client.get(
+            response = await self._get(
+                client,
+                "credit_status",
                 f"/api/debtors/{debtor_uuid}/credit-status.json",
-                auth=self._get_auth()
             )
             response.raise_for_status()
             return response.json()
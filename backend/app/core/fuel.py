@@ -0,0 +1,174 @@
+"""
+Fuel purchase rollups
+
+Every purchase is added to (and on delete removed from) one FuelRollup row
+per grain: the UTC day, the ISO week (starting Monday) and the month it
+falls in. Summaries read those rows instead of scanning purchases, so a week or
+month is one row and a year is twelve, however many fill-ups they hold.
+
+Adjustments are relative (`column = column + delta`), so concurrent
+purchases for the same period cannot overwrite each other.
+"""
+
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.db.models import FuelPurchase, FuelRollup
+
+GRAINS = ("day", "week", "month")
+
+# Summary period -> (rollup grain, number of periods ending with the current one)
+PERIODS: Dict[str, Tuple[str, int]] = {
+    "day": ("day", 1),
+    "week": ("week", 1),
+    "month": ("month", 1),
+    "year": ("month", 12),
+}
+
+
+def period_start(grain: str, day: date) -> date:
+    if grain == "week":
+        return day - timedelta(days=day.weekday())
+    if grain == "month":
+        return day.replace(day=1)
+    return day
+
+
+def _months_back(start: date, months: int) -> date:
+    index = start.year * 12 + start.month - 1 - months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _adjust(db: Session, user_id: int, grain: str, start: date, deltas: Dict[str, Decimal]) -> None:
+    values = {column: getattr(FuelRollup, column) + delta for column, delta in deltas.items()}
+    statement = (
+        update(FuelRollup)
+        .where(FuelRollup.user_id == user_id, FuelRollup.grain == grain, FuelRollup.period_start == start)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    if db.execute(statement).rowcount:
+        return
+    try:
+        with db.begin_nested():
+            db.add(FuelRollup(user_id=user_id, grain=grain, period_start=start, **deltas))
+    except IntegrityError:
+        db.execute(statement)
+
+
+def apply_purchase(db: Session, purchase, sign: int = 1) -> None:
+    """Add a purchase to its day/week/month rollups, or remove it with sign=-1"""
+    deltas = {
+        "purchases": sign,
+        "gallons": sign * Decimal(purchase.gallons),
+        "spent": sign * Decimal(purchase.total),
+        "savings": sign * Decimal(purchase.savings),
+    }
+    purchased_at = purchase.purchased_at
+    if purchased_at.tzinfo is not None:
+        purchased_at = purchased_at.astimezone(timezone.utc)
+    day = purchased_at.date()
+    for grain in GRAINS:
+        _adjust(db, purchase.user_id, grain, period_start(grain, day), deltas)
+    if sign < 0:
+        db.execute(
+            delete(FuelRollup)
+            .where(FuelRollup.user_id == purchase.user_id, FuelRollup.purchases <= 0)
+            .execution_options(synchronize_session=False)
+        )
+
+
+def record_purchase(
+    db: Session,
+    user_id: int,
+    station: str,
+    gallons: Decimal,
+    price_per_gallon: Decimal,
+    purchased_at: datetime,
+    retail_price_per_gallon: Optional[Decimal] = None,
+) -> FuelPurchase:
+    total = (gallons * price_per_gallon).quantize(Decimal("0.01"))
+    savings = Decimal("0")
+    if retail_price_per_gallon is not None and retail_price_per_gallon > price_per_gallon:
+        savings = (gallons * (retail_price_per_gallon - price_per_gallon)).quantize(Decimal("0.01"))
+    purchase = FuelPurchase(
+        user_id=user_id,
+        station=station,
+        gallons=gallons,
+        price_per_gallon=price_per_gallon,
+        total=total,
+        savings=savings,
+        purchased_at=purchased_at,
+    )
+    db.add(purchase)
+    db.flush()
+    apply_purchase(db, purchase)
+    return purchase
+
+
+def delete_purchase(db: Session, user_id: int, purchase_id: int) -> bool:
+    """
+    Delete a purchase and take it out of its rollups.
+
+    DELETE ... RETURNING hands the row to exactly one of two concurrent
+    deletes, so it cannot be subtracted twice.
+    """
+    row = db.execute(
+        delete(FuelPurchase)
+        .where(FuelPurchase.id == purchase_id, FuelPurchase.user_id == user_id)
+        .returning(
+            FuelPurchase.user_id,
+            FuelPurchase.gallons,
+            FuelPurchase.total,
+            FuelPurchase.savings,
+            FuelPurchase.purchased_at,
+        )
+        .execution_options(synchronize_session=False)
+    ).first()
+    if row is None:
+        return False
+    apply_purchase(db, row, sign=-1)
+    return True
+
+
+def summarize(db: Session, user_id: int, period: str, today: date) -> Dict[str, Decimal]:
+    """Totals for the current day, week or month, or the last twelve months for a year"""
+    grain, periods = PERIODS[period]
+    current = period_start(grain, today)
+    first = _months_back(current, periods - 1) if grain == "month" else current
+    purchases, gallons, spent, savings = db.execute(
+        select(
+            func.coalesce(func.sum(FuelRollup.purchases), 0),
+            func.coalesce(func.sum(FuelRollup.gallons), 0),
+            func.coalesce(func.sum(FuelRollup.spent), 0),
+            func.coalesce(func.sum(FuelRollup.savings), 0),
+        ).where(
+            FuelRollup.user_id == user_id,
+            FuelRollup.grain == grain,
+            FuelRollup.period_start >= first,
+            FuelRollup.period_start <= current,
+        )
+    ).one()
+    gallons, spent = Decimal(gallons), Decimal(spent)
+    return {
+        "purchases": purchases,
+        "total_spent": spent,
+        "total_gallons": gallons,
+        "avg_price_per_gallon": (spent / gallons).quantize(Decimal("0.001")) if gallons else Decimal("0"),
+        "savings": Decimal(savings),
+    }
+
+
+def last_purchase(db: Session, user_id: int) -> Optional[FuelPurchase]:
+    return db.execute(
+        select(FuelPurchase)
+        .where(FuelPurchase.user_id == user_id)
+        .order_by(FuelPurchase.purchased_at.desc(), FuelPurchase.id.desc())
+        .limit(1)
+    ).scalar_one_or_none()
+
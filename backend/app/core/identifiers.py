@@ -0,0 +1,40 @@
+"""
+Carrier identifier normalization
+
+MC (docket) and DOT numbers arrive as "MC-012345", "012345", 12345, etc.
+They are stored as integers without prefixes or leading zeros, so every
+importer must normalize them the same way for lookups and unique
+constraints to match.
+"""
+
+from typing import Any, Optional
+
+
+def normalize_mc(value: Any) -> Optional[int]:
+    """Strip an "MC" prefix, separators and leading zeros: "MC-012345" -> 12345"""
+    if value is None:
+        return None
+    text = str(value).strip()
+    if not text:
+        return None
+    upper = text.upper()
+    if upper.startswith("MC"):
+        text = text[2:].strip().lstrip("-").strip()
+    text = text.lstrip("0")
+    if not text:
+        return None
+    if not text.isdigit():
+        return None
+    return int(text)
+
+
+def normalize_dot(value: Any) -> Optional[int]:
+    """Parse a DOT number: "0123456" -> 123456"""
+    if value is None:
+        return None
+    text = str(value).strip()
+    if not text:
+        return None
+    if not text.isdigit():
+        return None
+    return int(text)
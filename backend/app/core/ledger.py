@@ -0,0 +1,89 @@
+"""
+Cash ledger
+
+Transactions are append-only. A user's balance is never summed over the
+whole ledger: every CHECKPOINT_INTERVAL entries a BalanceCheckpoint records
+the running balance, so the authoritative balance is the latest checkpoint
+plus at most that many newer entries. The result is cached on the Balance
+row for single-row reads.
+
+Posting locks the user's Balance row (SELECT ... FOR UPDATE), so concurrent
+transfers for one user serialize and cannot overdraw or skip a checkpoint.
+"""
+
+from decimal import Decimal
+from typing import Optional
+
+from sqlalchemy import case, func, select
+from sqlalchemy.orm import Session
+
+from app.db.models import Balance, BalanceCheckpoint, Transaction
+
+CHECKPOINT_INTERVAL = 100
+
+
+class InsufficientFunds(ValueError):
+    """Debit larger than the available balance"""
+
+
+def lock_balance(db: Session, user_id: int) -> Optional[Balance]:
+    return db.execute(
+        select(Balance).where(Balance.user_id == user_id).with_for_update()
+    ).scalar_one_or_none()
+
+
+def ledger_position(db: Session, user_id: int):
+    """Return (balance, entries since the latest checkpoint) from checkpoint + tail"""
+    checkpoint = db.execute(
+        select(BalanceCheckpoint.transaction_id, BalanceCheckpoint.balance)
+        .where(BalanceCheckpoint.user_id == user_id)
+        .order_by(BalanceCheckpoint.transaction_id.desc())
+        .limit(1)
+    ).first()
+    since_id, balance = checkpoint if checkpoint else (0, Decimal("0"))
+
+    signed = case((Transaction.type == "credit", Transaction.amount), else_=-Transaction.amount)
+    count, tail = db.execute(
+        select(func.count(), func.coalesce(func.sum(signed), 0)).where(
+            Transaction.user_id == user_id, Transaction.id > since_id
+        )
+    ).one()
+    return Decimal(balance) + Decimal(tail), count
+
+
+def post_transaction(
+    db: Session,
+    balance: Balance,
+    type: str,
+    amount: Decimal,
+    category: str,
+    description: str = "",
+    to_account: Optional[str] = None,
+) -> Transaction:
+    """
+    Append a transaction for the owner of a locked Balance row.
+
+    Raises InsufficientFunds when a debit exceeds the balance. Writes a
+    checkpoint once CHECKPOINT_INTERVAL entries have accumulated.
+    """
+    current, since_checkpoint = ledger_position(db, balance.user_id)
+    new_balance = current + amount if type == "credit" else current - amount
+    if new_balance < 0:
+        raise InsufficientFunds(f"Insufficient funds: available {current}")
+
+    transaction = Transaction(
+        user_id=balance.user_id,
+        type=type,
+        amount=amount,
+        category=category,
+        description=description,
+        to_account=to_account,
+    )
+    db.add(transaction)
+    db.flush()
+
+    if since_checkpoint + 1 >= CHECKPOINT_INTERVAL:
+        db.add(BalanceCheckpoint(user_id=balance.user_id, transaction_id=transaction.id, balance=new_balance))
+    balance.current_balance = new_balance
+    db.flush()
+    return transaction
@@ -0,0 +1,81 @@
+"""
+Keyset pagination
+
+Offset pagination makes the database walk and discard every skipped row,
+so deep pages get slower as a table grows. Keyset pagination filters on the
+sort key of the last row already returned (`WHERE (created_at, id) < (...)`)
+instead, which an index on the same columns serves at the same cost for
+every page.
+
+Cursors are opaque to clients: the last row's sort key as base64url JSON.
+The next cursor travels in the X-Next-Cursor header so list bodies keep
+their existing shape, and `offset` keeps working for older clients.
+"""
+
+import base64
+import json
+from datetime import date, datetime
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import Select, tuple_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# (sort column, parser for its cursor value), most significant first
+Keys = Sequence[Tuple[Any, Callable[[Any], Any]]]
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    payload = [value.isoformat() if isinstance(value, (date, datetime)) else value for value in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, keys: Keys) -> List[Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError("wrong number of values")
+        return [parse(value) for (_, parse), value in zip(keys, values)]
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        )
+
+
+def keyset(
+    statement: Select,
+    keys: Keys,
+    limit: int,
+    cursor: Optional[str] = None,
+    offset: int = 0,
+    descending: bool = True,
+) -> Select:
+    """
+    Order `statement` by `keys` and select the page after `cursor`.
+
+    Fetches one extra row so `page_of` can tell whether another page
+    exists. `offset` is only applied when no cursor is given.
+    """
+    columns = [column for column, _ in keys]
+    if cursor:
+        values = decode_cursor(cursor, keys)
+        position = tuple_(*columns)
+        statement = statement.where(position < tuple_(*values) if descending else position > tuple_(*values))
+    elif offset:
+        statement = statement.offset(offset)
+    order = [column.desc() if descending else column.asc() for column in columns]
+    return statement.order_by(*order).limit(limit + 1)
+
+
+def page_of(rows: Sequence[Any], keys: Keys, limit: int) -> Tuple[List[Any], Optional[str]]:
+    """Trim the extra row fetched by `keyset` and build the next cursor"""
+    rows = list(rows)
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor([getattr(last, column.key) for column, _ in keys])
@@ -0,0 +1,210 @@
+"""
+Opt-in per-request sampling profiler
+
+Requests carrying a valid `X-Profile-Token` header, plus a configurable
+random fraction of all requests, are profiled by a background thread that
+samples stacks at a fixed interval. Results are written as folded stacks
+(one `frame;frame;frame count` line per unique stack), which flamegraph.pl,
+speedscope and inferno render directly.
+
+Each sample covers the event loop thread and every worker thread currently
+running work for the profiled request: plain `def` routes and dependencies
+(FastAPI's threadpool) and `asyncio.to_thread` calls. Both run their work
+in a copy of the request's context, which marks the request; worker stacks
+start at the thread's bootstrap frames, so they stay apart from the loop's
+in the flame graph.
+
+Because the event loop interleaves requests, loop samples taken while
+another request's coroutine is running are attributed to the profiled
+request. Only one request is profiled at a time.
+"""
+
+import logging
+import os
+import random
+import re
+import secrets
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import Context, ContextVar
+from datetime import datetime
+from typing import Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile-token"
+PROFILE_SUFFIX = ".folded"
+
+# Set to a fresh marker for the duration of a profiled request
+_profiled_request: ContextVar[Optional[object]] = ContextVar("profiled_request", default=None)
+
+# Worker frames holding the task's context sit this close to the thread's outermost frame
+_WORKER_FRAME_DEPTH = 8
+
+
+def _frame_label(code) -> str:
+    parts = code.co_filename.replace("\\", "/").rsplit("/", 2)
+    filename = "/".join(parts[-2:])
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(";", ":")
+
+
+def _task_context(frames) -> Optional[Context]:
+    """
+    The context a worker thread is running its current task in, found in the
+    worker loop's locals: anyio workers (run_in_threadpool) hold it as
+    `context`; concurrent.futures workers (asyncio.to_thread) run a
+    `partial(context.run, ...)` work item.
+    """
+    for frame in frames[:_WORKER_FRAME_DEPTH]:
+        f_locals = frame.f_locals
+        context = f_locals.get("context")
+        if isinstance(context, Context):
+            return context
+        work = getattr(f_locals.get("self"), "fn", None)
+        owner = getattr(getattr(work, "func", None), "__self__", None)
+        if isinstance(owner, Context):
+            return owner
+    return None
+
+
+class StackSampler:
+    """
+    Samples the event loop thread's Python stack, plus those of worker
+    threads running in a context marked with `request`, at a fixed interval
+    """
+
+    def __init__(self, thread_id: int, interval: float, request: Optional[object] = None):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.request = request
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def _record(self, frames) -> None:
+        if frames:
+            self.samples[";".join(_frame_label(frame.f_code) for frame in frames)] += 1
+
+    def _run(self) -> None:
+        max_depth = 512
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                frames = []
+                while frame is not None and len(frames) < max_depth:
+                    frames.append(frame)
+                    frame = frame.f_back
+                frames.reverse()  # outermost first
+                if thread_id == self.thread_id:
+                    self._record(frames)
+                elif self.request is not None:
+                    context = _task_context(frames)
+                    if context is not None and context.get(_profiled_request) is self.request:
+                        self._record(frames)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.samples
+
+
+def _enforce_retention(directory: str, max_files: int, max_bytes: int) -> None:
+    """Delete the oldest profiles beyond the file count or total size limits"""
+    entries = []
+    for entry in os.scandir(directory):
+        if entry.is_file() and entry.name.endswith(PROFILE_SUFFIX):
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+    entries.sort(reverse=True)
+
+    kept_files = 0
+    kept_bytes = 0
+    for _, size, path in entries:
+        if kept_files < max_files and kept_bytes + size <= max_bytes:
+            kept_files += 1
+            kept_bytes += size
+            continue
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def write_profile(samples: Counter, method: str, path: str, elapsed: float) -> Optional[str]:
+    """Write folded stacks to PROFILER_OUTPUT_DIR and apply retention"""
+    if not samples:
+        return None
+    directory = settings.PROFILER_OUTPUT_DIR
+    os.makedirs(directory, exist_ok=True)
+
+    slug = re.sub(r"[^A-Za-z0-9]+", "-", path).strip("-") or "root"
+    timestamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+    filename = f"{timestamp}-{method}-{slug[:80]}-{elapsed * 1000:.0f}ms{PROFILE_SUFFIX}"
+    file_path = os.path.join(directory, filename)
+    with open(file_path, "w", encoding="utf-8") as handle:
+        for stack, count in samples.most_common():
+            handle.write(f"{stack} {count}\n")
+
+    _enforce_retention(directory, settings.PROFILER_MAX_FILES, settings.PROFILER_MAX_TOTAL_MB * 1024 * 1024)
+    return file_path
+
+
+class ProfilerMiddleware:
+    """
+    ASGI middleware that profiles selected requests.
+
+    Unselected requests pay one header scan (only when a token is
+    configured) and, with a non-zero sample rate, one random() call.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.token = settings.PROFILER_TOKEN.encode("latin-1") if settings.PROFILER_TOKEN else None
+        self.sample_rate = settings.PROFILER_SAMPLE_RATE
+        self.interval = settings.PROFILER_INTERVAL_MS / 1000.0
+        self._active = False
+
+    def _selected(self, scope) -> bool:
+        if self._active:
+            return False
+        if self.token is not None:
+            for name, value in scope["headers"]:
+                if name == PROFILE_HEADER:
+                    return secrets.compare_digest(value, self.token)
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._selected(scope):
+            await self.app(scope, receive, send)
+            return
+
+        self._active = True
+        request = object()
+        marker = _profiled_request.set(request)
+        sampler = StackSampler(threading.get_ident(), self.interval, request)
+        start = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            samples = sampler.stop()
+            _profiled_request.reset(marker)
+            self._active = False
+            elapsed = time.perf_counter() - start
+            try:
+                file_path = await run_in_threadpool(write_profile, samples, scope["method"], scope["path"], elapsed)
+                if file_path:
+                    logger.info("Profiled %s %s in %.1f ms: %s", scope["method"], scope["path"], elapsed * 1000, file_path)
+            except OSError:
+                logger.exception("Failed to write request profile")
@@ -0,0 +1,85 @@
+"""
+Response field projection
+
+List endpoints accept `fields=a,b,c` to return only those response fields.
+A Projection maps response fields to model columns, so the SELECT reads
+just those columns without loading ORM objects. Rows are validated in
+bulk against a model holding just the requested fields of the response
+schema, so types and Literals still hold, and rendered by list_response.
+Without `fields`, the whole response schema is selected the same way.
+`id` is always included so clients can key rows.
+"""
+
+from functools import lru_cache
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple, Type
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel, TypeAdapter, create_model
+from sqlalchemy import Select, select
+
+from app.core.responses import FastJSONResponse, list_response
+
+FIELDS_DESCRIPTION = "Comma-separated response fields to return (default: all)"
+
+
+@lru_cache(maxsize=256)
+def _resolve(schema: Type[BaseModel], fields: Optional[str]) -> Tuple[Tuple[str, str], ...]:
+    """(response field, model attribute) pairs in schema order"""
+    available = {
+        name: info.validation_alias if isinstance(info.validation_alias, str) else name
+        for name, info in schema.model_fields.items()
+    }
+    if not fields:
+        return tuple(available.items())
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested - set(available)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}. Available: {', '.join(available)}",
+        )
+    requested.add("id")
+    return tuple((name, attribute) for name, attribute in available.items() if name in requested)
+
+
+@lru_cache(maxsize=256)
+def _adapter(schema: Type[BaseModel], names: Tuple[str, ...]) -> TypeAdapter:
+    """Bulk validator for rows holding `names` of `schema`, keyed by field name (no aliases)"""
+    fields = {
+        name: (info.annotation, ... if info.is_required() else info.default)
+        for name, info in schema.model_fields.items()
+        if name in names
+    }
+    subset = create_model(f"{schema.__name__}Projection", **fields)
+    return TypeAdapter(List[subset])
+
+
+class Projection:
+    """Requested response fields of `schema`, read from columns of `model`"""
+
+    def __init__(self, model, schema: Type[BaseModel], fields: Optional[str] = None):
+        self.pairs = _resolve(schema, fields)
+        self.names = [name for name, _ in self.pairs]
+        self.columns = [getattr(model, attribute).label(name) for name, attribute in self.pairs]
+        self.adapter = _adapter(schema, tuple(self.names))
+
+    def entities(self, *extra) -> List[Any]:
+        """
+        Labelled columns to select, followed by any `extra` columns not
+        already selected (e.g. sort keys needed for pagination or ranking).
+        Extras are selected under their own attribute names.
+        """
+        selected = {name for name, attribute in self.pairs if name == attribute}
+        return self.columns + [column for column in extra if column.key not in selected]
+
+    def select(self, *extra) -> Select:
+        return select(*self.entities(*extra))
+
+    def rows(self, rows: Sequence[Any]) -> List[Dict[str, Any]]:
+        """Rows as dicts of the requested fields; extra columns are dropped"""
+        names = self.names
+        return [dict(zip(names, row)) for row in rows]
+
+    def response(self, rows: Sequence[Any], headers: Optional[Mapping[str, str]] = None) -> FastJSONResponse:
+        """Validate the requested fields of `rows` in bulk and render them"""
+        return list_response(self.adapter, self.rows(rows), headers=headers)
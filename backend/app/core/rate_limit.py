@@ -0,0 +1,331 @@
+"""
+Rate limiting and load shedding middleware
+
+Token buckets are keyed by user id (taken from the JWT) or client IP for
+anonymous requests, with an additional bucket per configured route. Limits
+are kept in process memory by default; the Postgres backend shares them
+across workers.
+"""
+
+import asyncio
+import math
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+
+from app.core.config import settings
+from app.core.security import decode_access_token
+from app.db.database import engine as default_engine
+
+_PERIODS = {
+    "second": 1.0,
+    "minute": 60.0,
+    "hour": 3600.0,
+    "day": 86400.0,
+}
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """A token bucket limit: `capacity` requests, refilled at `rate` per second"""
+    capacity: float
+    rate: float
+
+    @classmethod
+    def parse(cls, value: str) -> "RateLimit":
+        """
+        Parse a limit string such as "60/minute" or "5/second".
+
+        The count is also the burst size.
+        """
+        count, _, period = value.partition("/")
+        seconds = _PERIODS.get(period.strip().lower())
+        if seconds is None or not count.strip().isdigit() or int(count) <= 0:
+            raise ValueError(f"Invalid rate limit: {value!r}")
+        return cls(capacity=float(count), rate=float(count) / seconds)
+
+
+class TokenBucket:
+    """Classic token bucket; not thread-safe, callers serialize access"""
+
+    __slots__ = ("capacity", "rate", "tokens", "updated_at")
+
+    def __init__(self, capacity: float, rate: float, now: Optional[float] = None):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity
+        self.updated_at = time.monotonic() if now is None else now
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self.updated_at
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated_at = now
+
+    def try_acquire(self, tokens: float = 1.0, now: Optional[float] = None) -> float:
+        """
+        Take tokens from the bucket.
+
+        Returns 0 when granted, otherwise the seconds until enough tokens
+        will be available.
+        """
+        self._refill(time.monotonic() if now is None else now)
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return 0.0
+        return (tokens - self.tokens) / self.rate
+
+    def is_full(self, now: float) -> bool:
+        return self.tokens + (now - self.updated_at) * self.rate >= self.capacity
+
+
+class AdaptiveRateLimiter:
+    """
+    Async client-side limiter for calls to rate-limited upstream APIs.
+
+    Paces callers with a token bucket and adapts the rate AIMD-style:
+    throttling responses halve it and pause all callers, and each success
+    adds back a small step up to `max_rate`.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: float = 1.0,
+        min_rate: Optional[float] = None,
+        max_rate: Optional[float] = None,
+        increase_step: Optional[float] = None,
+    ):
+        self.max_rate = max_rate or rate
+        self.min_rate = min_rate or rate / 16
+        self.increase_step = increase_step or self.max_rate / 20
+        self.bucket = TokenBucket(burst, rate)
+        self._paused_until = 0.0
+
+    @property
+    def rate(self) -> float:
+        return self.bucket.rate
+
+    async def acquire(self) -> None:
+        while True:
+            now = time.monotonic()
+            if now < self._paused_until:
+                await asyncio.sleep(self._paused_until - now)
+                continue
+            wait = self.bucket.try_acquire(now=now)
+            if wait == 0:
+                return
+            await asyncio.sleep(wait)
+
+    def throttled(self, retry_after: Optional[float] = None) -> None:
+        """Record a 429/5xx: halve the rate and pause for `retry_after` seconds"""
+        self.bucket.rate = max(self.min_rate, self.bucket.rate / 2)
+        pause = retry_after if retry_after is not None else 1.0 / self.bucket.rate
+        self._paused_until = max(self._paused_until, time.monotonic() + pause)
+
+    def succeeded(self) -> None:
+        self.bucket.rate = min(self.max_rate, self.bucket.rate + self.increase_step)
+
+
+class InMemoryRateLimitBackend:
+    """
+    Per-process buckets.
+
+    The middleware runs on the event loop thread, so a bucket is never
+    touched concurrently and no locking is needed.
+    """
+
+    SWEEP_INTERVAL_SECONDS = 60.0
+
+    def __init__(self):
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._next_sweep = time.monotonic() + self.SWEEP_INTERVAL_SECONDS
+
+    async def hit(self, key: str, limit: RateLimit) -> float:
+        now = time.monotonic()
+        if now >= self._next_sweep:
+            self._sweep(now)
+
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(limit.capacity, limit.rate, now)
+        return bucket.try_acquire(now=now)
+
+    def _sweep(self, now: float) -> None:
+        """Drop buckets that have refilled completely; they carry no state."""
+        self._buckets = {key: bucket for key, bucket in self._buckets.items() if not bucket.is_full(now)}
+        self._next_sweep = now + self.SWEEP_INTERVAL_SECONDS
+
+
+class PostgresRateLimitBackend:
+    """
+    Buckets stored in the rate_limit_buckets table so every worker shares them.
+
+    Each hit is a single atomic upsert that refills, decides and decrements
+    in one round trip.
+    """
+
+    CLEANUP_INTERVAL_SECONDS = 300.0
+
+    _HIT_SQL = text(
+        """
+        INSERT INTO rate_limit_buckets AS b (key, tokens, allowed, updated_at)
+        VALUES (:key, :capacity - 1, true, clock_timestamp())
+        ON CONFLICT (key) DO UPDATE SET
+            tokens = CASE
+                WHEN LEAST(:capacity, b.tokens + EXTRACT(EPOCH FROM clock_timestamp() - b.updated_at) * :rate) >= 1
+                THEN LEAST(:capacity, b.tokens + EXTRACT(EPOCH FROM clock_timestamp() - b.updated_at) * :rate) - 1
+                ELSE LEAST(:capacity, b.tokens + EXTRACT(EPOCH FROM clock_timestamp() - b.updated_at) * :rate)
+            END,
+            allowed = LEAST(:capacity, b.tokens + EXTRACT(EPOCH FROM clock_timestamp() - b.updated_at) * :rate) >= 1,
+            updated_at = clock_timestamp()
+        RETURNING allowed, tokens
+        """
+    )
+
+    _CLEANUP_SQL = text("DELETE FROM rate_limit_buckets WHERE updated_at < now() - make_interval(secs => :max_age)")
+
+    def __init__(self, engine=None):
+        self.engine = engine or default_engine
+        self._next_cleanup = time.monotonic() + self.CLEANUP_INTERVAL_SECONDS
+        self._max_window = 0.0
+
+    def _hit_sync(self, key: str, limit: RateLimit) -> float:
+        with self.engine.begin() as connection:
+            allowed, tokens = connection.execute(
+                self._HIT_SQL,
+                {"key": key, "capacity": limit.capacity, "rate": limit.rate},
+            ).one()
+            now = time.monotonic()
+            if now >= self._next_cleanup:
+                self._next_cleanup = now + self.CLEANUP_INTERVAL_SECONDS
+                connection.execute(self._CLEANUP_SQL, {"max_age": max(self._max_window, 3600.0)})
+        if allowed:
+            return 0.0
+        return (1.0 - tokens) / limit.rate
+
+    async def hit(self, key: str, limit: RateLimit) -> float:
+        self._max_window = max(self._max_window, limit.capacity / limit.rate)
+        return await run_in_threadpool(self._hit_sync, key, limit)
+
+
+def create_backend(name: str):
+    """Build the backend named in RATE_LIMIT_BACKEND"""
+    if name == "memory":
+        return InMemoryRateLimitBackend()
+    if name == "postgres":
+        return PostgresRateLimitBackend()
+    raise ValueError(f"Unknown rate limit backend: {name!r}")
+
+
+@lru_cache(maxsize=4096)
+def _user_id_from_token(token: str) -> Optional[str]:
+    payload = decode_access_token(token)
+    if not payload:
+        return None
+    sub = payload.get("sub")
+    return str(sub) if sub is not None else None
+
+
+def _identity(scope) -> str:
+    """Key requests by JWT subject, falling back to the client address"""
+    for name, value in scope.get("headers", ()):
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer" and token:
+                user_id = _user_id_from_token(token.strip())
+                if user_id is not None:
+                    return f"user:{user_id}"
+            break
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+def _retry_after_header(seconds: float) -> str:
+    return str(max(1, math.ceil(seconds)))
+
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware enforcing per-user/per-route token buckets and
+    concurrency-based load shedding.
+
+    Rejected requests get `429 Too Many Requests` (rate limited) or
+    `503 Service Unavailable` (shed), both with a `Retry-After` header.
+    """
+
+    def __init__(
+        self,
+        app,
+        backend=None,
+        default_limit: Optional[str] = None,
+        route_limits: Optional[Dict[str, str]] = None,
+        max_in_flight: Optional[int] = None,
+        prefix: str = settings.API_V1_PREFIX,
+        exempt_paths: Tuple[str, ...] = ("/", "/health", "/metrics"),
+        streaming_routes: Optional[List[str]] = None,
+    ):
+        self.app = app
+        self.backend = backend or create_backend(settings.RATE_LIMIT_BACKEND)
+        default_limit = settings.RATE_LIMIT_DEFAULT if default_limit is None else default_limit
+        self.default_limit = RateLimit.parse(default_limit) if default_limit else None
+        route_limits = settings.RATE_LIMIT_ROUTES if route_limits is None else route_limits
+        self.route_limits = {f"{prefix}{path}": RateLimit.parse(value) for path, value in route_limits.items()}
+        self.max_in_flight = settings.LOAD_SHED_MAX_IN_FLIGHT if max_in_flight is None else max_in_flight
+        self.exempt_paths = frozenset(exempt_paths)
+        # Streams are still rate limited, but they are long-lived and mostly idle,
+        # so they are neither shed nor counted as in flight
+        streaming_routes = settings.STREAMING_ROUTES if streaming_routes is None else streaming_routes
+        self.streaming_paths = frozenset(f"{prefix}{path}" for path in streaming_routes)
+        self.in_flight = 0
+
+    def _limits_for(self, identity: str, path: str) -> List[Tuple[str, RateLimit]]:
+        limits = []
+        route_limit = self.route_limits.get(path)
+        if route_limit is not None:
+            limits.append((f"{identity}:{path}", route_limit))
+        if self.default_limit is not None:
+            limits.append((identity, self.default_limit))
+        return limits
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+
+        counted = scope["path"] not in self.streaming_paths
+        if counted and self.max_in_flight and self.in_flight >= self.max_in_flight:
+            response = JSONResponse(
+                {"detail": "Server is busy. Please retry shortly."},
+                status_code=503,
+                headers={"Retry-After": "1"},
+            )
+            await response(scope, receive, send)
+            return
+
+        identity = _identity(scope)
+        for key, limit in self._limits_for(identity, scope["path"]):
+            retry_after = await self.backend.hit(key, limit)
+            if retry_after > 0:
+                response = JSONResponse(
+                    {"detail": "Too many requests. Please slow down."},
+                    status_code=429,
+                    headers={"Retry-After": _retry_after_header(retry_after)},
+                )
+                await response(scope, receive, send)
+                return
+
+        if not counted:
+            await self.app(scope, receive, send)
+            return
+
+        self.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
@@ -0,0 +1,56 @@
+"""
+Fast JSON responses
+
+FastJSONResponse renders with orjson, which handles datetimes natively and
+serializes Pydantic models without going through jsonable_encoder. It is
+the application's default response class.
+
+For list endpoints, `list_response` validates rows (ORM objects, or the
+projected dicts from app.core.projection) in one TypeAdapter call instead
+of calling model_validate per row, and returning the response directly
+skips FastAPI's second validation pass over the response_model.
+"""
+
+from decimal import Decimal
+from typing import Any, Mapping, Optional, Sequence
+
+import orjson
+from pydantic import BaseModel, TypeAdapter
+from starlette.responses import JSONResponse
+
+_ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize `content` exactly as FastJSONResponse renders it"""
+    return orjson.dumps(content, default=_default, option=_ORJSON_OPTIONS)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with orjson"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def list_response(
+    adapter: TypeAdapter,
+    rows: Sequence[Any],
+    status_code: int = 200,
+    headers: Optional[Mapping[str, str]] = None,
+) -> FastJSONResponse:
+    """
+    Validate rows in bulk with a `TypeAdapter(List[Schema])` and render them.
+
+    Rows may be ORM objects (read via from_attributes) or dicts.
+    """
+    items = adapter.validate_python(rows, from_attributes=True)
+    return FastJSONResponse(adapter.dump_python(items), status_code=status_code, headers=headers)
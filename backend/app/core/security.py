@@ -8,7 +8,7 @@ from uuid import uuid4
 import secrets
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 
 from app.core.config import settings
@@ -54,8 +54,17 @@ def decode_access_token(token: str) -> Optional[dict]:
         return None
 
 
-async def get_current_user_id(token: str = Depends(oauth2_scheme)) -> int:
-    """Extract user ID from JWT token"""
+async def get_current_user_id(request: Request, token: str = Depends(oauth2_scheme)) -> int:
+    """
+    Extract user ID from JWT token.
+
+    The result is kept on request.state, keyed by the token, so /batch
+    sub-requests (which share the batch's state) skip decoding it again.
+    """
+    cached = getattr(request.state, "auth", None)
+    if cached is not None and cached[0] == token:
+        return cached[1]
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -70,6 +79,7 @@ async def get_current_user_id(token: str = Depends(oauth2_scheme)) -> int:
     if user_id is None:
         raise credentials_exception
     
+    request.state.auth = (token, int(user_id))
     return int(user_id)
 
 
@@ -5,18 +5,31 @@ Database connection and session management
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from app.core.config import settings
+from app.core.metrics import register_pool_gauges
+from app.db import instrumentation, notifications, versioning
 
 # Create SQLAlchemy engine
 engine = create_engine(
     settings.DATABASE_URL,
+    poolclass=instrumentation.InstrumentedQueuePool,
     pool_pre_ping=True,
     pool_recycle=3600,
     echo=False,  # Set to True for SQL debugging
 )
 
+# Per-request query counts/timings and pool metrics
+instrumentation.install(engine)
+register_pool_gauges(engine.pool)
+
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Per-user resource versions for ETags
+versioning.install(SessionLocal)
+
+# Wake server-sent event streams when their data changes
+notifications.install(SessionLocal, engine)
+
 # Create declarative base for models
 Base = declarative_base()
 
@@ -0,0 +1,174 @@
+"""
+Database instrumentation
+
+Hooks SQLAlchemy cursor events to attribute SQL work to the request being
+served: statement count, total DB time and the slowest statement. Slow
+statements and slow requests are logged, and in development the same
+statement repeated within one request is flagged as a probable N+1.
+Also times how long callers wait for a pooled connection.
+"""
+
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+
+from app.core.config import settings
+from app.core.metrics import DB_POOL_CHECKOUT_WAIT, DB_QUERIES_PER_REQUEST, DB_QUERY_DURATION_PER_REQUEST
+
+logger = logging.getLogger(__name__)
+
+_LOG_STATEMENT_CHARS = 500
+
+
+def _shorten(statement: str) -> str:
+    statement = " ".join(statement.split())
+    if len(statement) <= _LOG_STATEMENT_CHARS:
+        return statement
+    return f"{statement[:_LOG_STATEMENT_CHARS]}...<truncated>"
+
+
+class QueryStats:
+    """SQL statements executed within one request"""
+
+    __slots__ = ("count", "duration", "slowest_statement", "slowest_duration", "statements")
+
+    def __init__(self, detect_n_plus_one: bool = False):
+        self.count = 0
+        self.duration = 0.0
+        self.slowest_statement: Optional[str] = None
+        self.slowest_duration = 0.0
+        # Only populated in N+1 detection mode; keyed by the parameterized SQL
+        self.statements: Optional[Counter] = Counter() if detect_n_plus_one else None
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.count += 1
+        self.duration += elapsed
+        if elapsed > self.slowest_duration:
+            self.slowest_duration = elapsed
+            self.slowest_statement = statement
+        if self.statements is not None:
+            self.statements[statement] += 1
+
+    def repeated_statements(self, threshold: int) -> List[Tuple[str, int]]:
+        """Statements executed at least `threshold` times, most frequent first"""
+        if not self.statements:
+            return []
+        return [(statement, count) for statement, count in self.statements.most_common() if count >= threshold]
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """
+    Collect statistics for every statement run in this context.
+
+    Worker threads started through Starlette's threadpool inherit the
+    context, so sync dependencies are counted too.
+    """
+    stats = QueryStats(detect_n_plus_one=settings.SQL_DETECT_N_PLUS_ONE)
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    return _current_stats.get()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_WAIT.observe(time.perf_counter() - start)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(statement, elapsed)
+    if elapsed * 1000 >= settings.SQL_SLOW_QUERY_MS:
+        logger.warning("Slow SQL statement (%.1f ms): %s", elapsed * 1000, _shorten(statement))
+
+
+def _handle_error(exception_context):
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_start"):
+        connection.info["query_start"].pop()
+
+
+def install(engine) -> None:
+    """Attach the cursor event listeners to an engine"""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+def _report(stats: QueryStats, method: str, route: str, elapsed: float) -> None:
+    DB_QUERIES_PER_REQUEST.observe(stats.count, route)
+    DB_QUERY_DURATION_PER_REQUEST.observe(stats.duration, route)
+
+    if elapsed * 1000 >= settings.SLOW_REQUEST_MS:
+        logger.warning(
+            "Slow request %s %s: %.1f ms total, %d queries, %.1f ms in DB, slowest %.1f ms: %s",
+            method,
+            route,
+            elapsed * 1000,
+            stats.count,
+            stats.duration * 1000,
+            stats.slowest_duration * 1000,
+            _shorten(stats.slowest_statement or "-"),
+        )
+
+    for statement, count in stats.repeated_statements(settings.SQL_N_PLUS_ONE_THRESHOLD):
+        logger.warning(
+            "Probable N+1 in %s %s: statement executed %d times: %s",
+            method,
+            route,
+            count,
+            _shorten(statement),
+        )
+
+
+class QueryInstrumentationMiddleware:
+    """ASGI middleware scoping query statistics to each HTTP request"""
+
+    def __init__(self, app, streaming_routes: Optional[List[str]] = None, prefix: str = settings.API_V1_PREFIX):
+        self.app = app
+        # Streams stay open for minutes and re-query on every event; per-request
+        # totals and the slow request log would be meaningless for them
+        streaming_routes = settings.STREAMING_ROUTES if streaming_routes is None else streaming_routes
+        self.streaming_paths = frozenset(f"{prefix}{path}" for path in streaming_routes)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.streaming_paths:
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        with track_queries() as stats:
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                # The router stores the matched route in the scope
+                route = scope.get("route")
+                route_path = getattr(route, "path", None) or "unmatched"
+                _report(stats, scope["method"], route_path, time.perf_counter() - start)
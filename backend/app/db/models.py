@@ -2,7 +2,7 @@
 SQLAlchemy Database Models
 """
 
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Boolean, Enum, Text, SmallInteger
+from sqlalchemy import Column, Integer, String, Float, Numeric, Date, DateTime, ForeignKey, Boolean, Enum, Text, SmallInteger, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -50,6 +50,10 @@ class CreditCheckHistory(Base):
 class CreditCheck(Base):
     """Stored broker credit check details"""
     __tablename__ = "credit_checks"
+    __table_args__ = (
+        # Delta sync reads a user's changes in (updated_at, id) order
+        Index("ix_credit_checks_user_id_updated_at_id", "user_id", "updated_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -61,7 +65,8 @@ class CreditCheck(Base):
     source = Column(Enum("FactorsNetwork", "TransCredit", "Ansonia", name="credit_check_source"), nullable=False)
     expiration_date = Column(DateTime(timezone=True), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Set on insert too, so every row has a delta sync position
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
     deleted_at = Column(DateTime(timezone=True), nullable=True)
 
     user = relationship("User", back_populates="credit_checks")
@@ -88,21 +93,120 @@ class Balance(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), unique=True, nullable=False)
-    total_account_receivable = Column(Float, default=0.0)
-    reserve = Column(Float, default=10000.0)
-    age_0_30 = Column(Float, default=0.0)
-    age_31_60 = Column(Float, default=0.0)
-    age_61_90 = Column(Float, default=5000.0)
-    age_90_plus = Column(Float, default=0.0)
+    # Receivable totals are maintained by app.core.aging from the receivables ledger
+    total_account_receivable = Column(Numeric(14, 2), default=0)
+    reserve = Column(Numeric(14, 2), default=10000)
+    age_0_30 = Column(Numeric(14, 2), default=0)
+    age_31_60 = Column(Numeric(14, 2), default=0)
+    age_61_90 = Column(Numeric(14, 2), default=0)
+    age_90_plus = Column(Numeric(14, 2), default=0)
+    # Cash balance, written by app.core.ledger under this row's lock
+    current_balance = Column(Numeric(14, 2), nullable=False, default=0, server_default="0")
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     # Relationships
     user = relationship("User", back_populates="balance")
 
 
+class Receivable(Base):
+    """Invoice owed to a user, aged into one of the balance buckets"""
+    __tablename__ = "receivables"
+    __table_args__ = (
+        Index("uq_receivables_user_id_invoice_number", "user_id", "invoice_number", unique=True),
+        # Nightly roll scans open items per bucket by invoice date
+        Index("ix_receivables_status_bucket_invoice_date", "status", "bucket", "invoice_date"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    mc_number = Column(Integer, nullable=True)
+    invoice_number = Column(String(100), nullable=True)
+    amount = Column(Numeric(14, 2), nullable=False)
+    paid_amount = Column(Numeric(14, 2), nullable=False, default=0)
+    invoice_date = Column(Date, nullable=False)
+    # Balance column the outstanding amount is currently counted in
+    bucket = Column(String(20), nullable=False)
+    status = Column(String(20), nullable=False, default="open")
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+
+class Transaction(Base):
+    """Append-only cash ledger entry"""
+    __tablename__ = "transactions"
+    __table_args__ = (
+        # Keyset pagination and checkpoint tails scan a user's entries by id
+        Index("ix_transactions_user_id_id", "user_id", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    type = Column(Enum("credit", "debit", name="transaction_type"), nullable=False)
+    amount = Column(Numeric(14, 2), nullable=False)
+    description = Column(String(255), nullable=False, default="")
+    category = Column(String(50), nullable=False)
+    to_account = Column(String(100), nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+
+class BalanceCheckpoint(Base):
+    """Running cash balance as of a ledger entry"""
+    __tablename__ = "balance_checkpoints"
+    __table_args__ = (
+        Index("ix_balance_checkpoints_user_id_transaction_id", "user_id", "transaction_id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    transaction_id = Column(Integer, ForeignKey("transactions.id"), nullable=False)
+    balance = Column(Numeric(14, 2), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class FuelPurchase(Base):
+    """Fuel fill-up recorded by a user"""
+    __tablename__ = "fuel_purchases"
+    __table_args__ = (
+        Index("ix_fuel_purchases_user_id_purchased_at_id", "user_id", "purchased_at", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    station = Column(String(255), nullable=False)
+    gallons = Column(Numeric(10, 3), nullable=False)
+    price_per_gallon = Column(Numeric(8, 3), nullable=False)
+    total = Column(Numeric(12, 2), nullable=False)
+    # Discount against the pump's retail price, when the client reports one
+    savings = Column(Numeric(12, 2), nullable=False, default=0)
+    purchased_at = Column(DateTime(timezone=True), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class FuelRollup(Base):
+    """Per-user fuel totals for one day, week or month, kept by app.core.fuel"""
+    __tablename__ = "fuel_rollups"
+    __table_args__ = (
+        Index("uq_fuel_rollups_user_id_grain_period_start", "user_id", "grain", "period_start", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    grain = Column(Enum("day", "week", "month", name="fuel_rollup_grain"), nullable=False)
+    period_start = Column(Date, nullable=False)
+    purchases = Column(Integer, nullable=False, default=0)
+    gallons = Column(Numeric(14, 3), nullable=False, default=0)
+    spent = Column(Numeric(14, 2), nullable=False, default=0)
+    savings = Column(Numeric(14, 2), nullable=False, default=0)
+
+
 class Company(Base):
     """Company record linked to a user"""
     __tablename__ = "companies"
+    __table_args__ = (
+        # Importers upsert on these with INSERT ... ON CONFLICT
+        Index("uq_companies_factor_network_uuid", "factor_network_uuid", unique=True),
+        Index("uq_companies_mc_number", "mc_number", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -121,8 +225,73 @@ class Company(Base):
     safer_is_broker = Column(SmallInteger, nullable=True)
     factor_network_uuid = Column(String(255), nullable=True)
     status = Column(String(50), nullable=True)
+    merged_into_id = Column(Integer, ForeignKey("companies.id"), nullable=True, index=True)  # Set on merged duplicates
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     deleted_at = Column(DateTime(timezone=True), nullable=True)
 
     user = relationship("User", back_populates="companies")
+
+
+class CompanyMerge(Base):
+    """Audit record of a duplicate company merged into its canonical row"""
+    __tablename__ = "company_merges"
+
+    id = Column(Integer, primary_key=True, index=True)
+    canonical_id = Column(Integer, ForeignKey("companies.id"), nullable=False, index=True)
+    duplicate_id = Column(Integer, ForeignKey("companies.id"), nullable=False, index=True)
+    matched_on = Column(String(50), nullable=False)  # Blocking keys that linked the pair, e.g. "dot,name"
+    duplicate_data = Column(Text, nullable=False)  # JSON copy of the duplicate row before the merge
+    merged_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+
+class RateLimitBucket(Base):
+    """Shared token bucket state for the Postgres rate limit backend"""
+    __tablename__ = "rate_limit_buckets"
+
+    key = Column(String(255), primary_key=True)
+    tokens = Column(Float, nullable=False)
+    allowed = Column(Boolean, nullable=False, default=True)
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), index=True)
+
+
+class ResourceVersion(Base):
+    """Per-user change counter for a table, used to build ETags"""
+    __tablename__ = "resource_versions"
+
+    user_id = Column(Integer, primary_key=True)
+    resource = Column(String(50), primary_key=True)
+    version = Column(Integer, nullable=False, default=1)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class SyncState(Base):
+    """Incremental sync watermark for one external data source"""
+    __tablename__ = "sync_state"
+
+    source = Column(String(100), primary_key=True)
+    watermark = Column(DateTime(timezone=True), nullable=True)
+    position = Column(Integer, nullable=True)  # Catalog size seen by the last run, for offset-window syncs
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class SyncRun(Base):
+    """Statistics for one sync run"""
+    __tablename__ = "sync_runs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    source = Column(String(100), nullable=False)
+    mode = Column(String(20), nullable=False)
+    status = Column(String(20), nullable=False, default="running")
+    started_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    pages = Column(Integer, nullable=False, default=0)
+    fetched = Column(Integer, nullable=False, default=0)
+    inserted = Column(Integer, nullable=False, default=0)
+    updated = Column(Integer, nullable=False, default=0)
+    unchanged = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+
+    __table_args__ = (
+        Index("ix_sync_runs_source_started_at", "source", "started_at"),
+    )
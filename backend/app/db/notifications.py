@@ -0,0 +1,104 @@
+"""
+Change notifications for server-sent event streams
+
+ORM writes to a streamed table wake the owning user's open streams once
+the transaction commits (see app.core.events). On Postgres the session
+issues `pg_notify` inside the transaction, so the notification is only
+delivered if it commits, and every worker's LISTEN connection relays it to
+its local streams. Other databases publish in process after commit.
+
+Bulk UPDATE/DELETE statements bypass the unit of work, so code issuing
+them on a streamed table calls `notify` itself.
+"""
+
+import asyncio
+import logging
+from typing import Iterable, Set
+
+from sqlalchemy import event, text
+
+from app.core.events import Broker, broker
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "user_changes"
+
+# Streamed tables -> attribute holding the owning user's id
+STREAMED = {
+    "credit_checks": "user_id",
+}
+
+_PENDING_KEY = "notify_user_ids"
+_NOTIFY_SQL = text("SELECT pg_notify(:channel, :payload)")
+_MAX_RECONNECT_DELAY_SECONDS = 30.0
+
+
+def notify(connection, user_ids: Iterable[int]) -> None:
+    """Wake `user_ids`' streams when the transaction on `connection` commits (Postgres)"""
+    for user_id in sorted(set(user_ids)):
+        connection.execute(_NOTIFY_SQL, {"channel": CHANNEL, "payload": str(user_id)})
+
+
+def _after_flush(session, flush_context) -> None:
+    user_ids: Set[int] = set()
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        attribute = STREAMED.get(getattr(instance, "__tablename__", None))
+        if attribute is None:
+            continue
+        if instance in session.dirty and not session.is_modified(instance):
+            continue
+        user_id = getattr(instance, attribute, None)
+        if user_id is not None:
+            user_ids.add(user_id)
+    if not user_ids:
+        return
+    connection = session.connection()
+    if connection.dialect.name == "postgresql":
+        notify(connection, user_ids)
+    else:
+        session.info.setdefault(_PENDING_KEY, set()).update(user_ids)
+
+
+def _after_commit(session) -> None:
+    user_ids = session.info.pop(_PENDING_KEY, None)
+    if user_ids:
+        broker.publish(user_ids)
+
+
+def _after_rollback(session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+async def listen(target: Broker, url: str) -> None:
+    """Relay NOTIFYs on CHANNEL to `target`, reconnecting with backoff"""
+    import psycopg
+
+    delay = 1.0
+    while True:
+        try:
+            async with await psycopg.AsyncConnection.connect(url, autocommit=True) as connection:
+                await connection.execute(f"LISTEN {CHANNEL}")
+                delay = 1.0
+                # Anything committed while not listening was missed; streams re-read
+                target.publish_all()
+                async for notification in connection.notifies():
+                    try:
+                        target.publish([int(notification.payload)])
+                    except ValueError:
+                        logger.warning("Ignoring malformed %s notification: %r", CHANNEL, notification.payload)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Change notification listener failed; reconnecting in %.0f s", delay)
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, _MAX_RECONNECT_DELAY_SECONDS)
+
+
+def install(session_factory, engine) -> None:
+    """Publish changes made through `session_factory`; on Postgres, relay other workers' changes too"""
+    event.listen(session_factory, "after_flush", _after_flush)
+    event.listen(session_factory, "after_commit", _after_commit)
+    event.listen(session_factory, "after_rollback", _after_rollback)
+    if engine.dialect.name == "postgresql":
+        url = engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+        broker.listener = lambda target: listen(target, url)
@@ -0,0 +1,99 @@
+"""
+Per-user resource versions
+
+Keeps a counter per (user, table) in resource_versions that moves whenever
+one of the user's rows in a tracked table is inserted, updated or deleted.
+Read endpoints build their ETags from these counters, so checking whether
+a response changed costs one primary-key lookup instead of the full query.
+
+ORM writes are picked up automatically after each flush and bumped in the
+same transaction. Bulk UPDATE/DELETE statements bypass the unit of work,
+so code issuing them on a tracked table calls `bump` itself.
+"""
+
+from collections import defaultdict
+from typing import Dict, Iterable, Set
+
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+
+# Tracked tables -> attribute holding the owning user's id
+TRACKED = {
+    "users": "id",
+    "balances": "user_id",
+    "credit_checks": "user_id",
+    "credit_check_history": "user_id",
+}
+
+
+def _versions_table():
+    # Imported lazily: the models module imports app.db.database, which installs this
+    from app.db.models import ResourceVersion
+
+    return ResourceVersion.__table__
+
+
+def _upsert(dialect_name: str):
+    table = _versions_table()
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"Resource versions are not supported on {dialect_name}")
+    statement = insert(table)
+    return statement.on_conflict_do_update(
+        index_elements=[table.c.user_id, table.c.resource],
+        set_={"version": table.c.version + 1, "updated_at": func.now()},
+    )
+
+
+def bump(connection, changes: Dict[str, Iterable[int]]) -> None:
+    """
+    Increment versions for {resource: user ids} on a Connection or Session.
+
+    Rows are bumped in a fixed order so concurrent transactions touching
+    the same counters cannot deadlock.
+    """
+    rows = sorted({(user_id, resource) for resource, user_ids in changes.items() for user_id in user_ids})
+    if not rows:
+        return
+    dialect = connection.get_bind().dialect if isinstance(connection, Session) else connection.dialect
+    connection.execute(
+        _upsert(dialect.name),
+        [{"user_id": user_id, "resource": resource, "version": 1} for user_id, resource in rows],
+    )
+
+
+def get_versions(db, user_id: int, resources: Iterable[str]) -> Dict[str, int]:
+    table = _versions_table()
+    resources = list(resources)
+    versions = dict(
+        db.execute(
+            select(table.c.resource, table.c.version).where(
+                table.c.user_id == user_id, table.c.resource.in_(resources)
+            )
+        ).all()
+    )
+    return {resource: versions.get(resource, 0) for resource in resources}
+
+
+def _after_flush(session, flush_context) -> None:
+    changes: Dict[str, Set[int]] = defaultdict(set)
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        resource = getattr(instance, "__tablename__", None)
+        attribute = TRACKED.get(resource)
+        if attribute is None:
+            continue
+        if instance in session.dirty and not session.is_modified(instance):
+            continue
+        user_id = getattr(instance, attribute, None)
+        if user_id is not None:
+            changes[resource].add(user_id)
+    if changes:
+        bump(session.connection(), changes)
+
+
+def install(session_factory) -> None:
+    """Bump versions for ORM writes made through sessions from `session_factory`"""
+    event.listen(session_factory, "after_flush", _after_flush)
@@ -0,0 +1,392 @@
+"""
+Streaming ingestion pipeline
+
+A run is four stages connected by bounded asyncio queues:
+
+    source -> normalize -> dedupe -> batch sink
+
+Items travel between stages in chunks, so queue overhead stays negligible
+for multi-million row inputs. The queues are bounded, so a slow sink stalls
+normalization, which stalls the source: memory is proportional to the
+queue sizes, not to the input.
+
+- source: a sync iterable (consumed in one worker thread, so generators
+  holding a DB cursor or open file work unchanged) or an async iterable.
+- normalize: sync or async callable mapping one item to its normalized
+  form; returning None drops the item. Async callables run on
+  `normalize_concurrency` workers and may reorder items.
+- dedupe: optional `key` callable; later items with a seen key are dropped.
+- sink: a Sink whose methods run in worker threads; `write` receives
+  batches of `batch_size` items and returns counters for the run totals.
+
+Each stage keeps throughput and latency counters, printed periodically
+while the run progresses. `on_batch` is called after every successful
+sink write and is the place to persist checkpoints; in dry-run mode the
+sink is told not to write and `on_batch` is skipped.
+"""
+
+import asyncio
+import inspect
+import json
+import os
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Set, Union
+
+_DONE = object()
+
+
+class StageStats:
+    """Throughput and latency counters for one stage"""
+
+    __slots__ = ("name", "items_in", "items_out", "calls", "busy", "max_latency")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.items_in = 0
+        self.items_out = 0
+        self.calls = 0
+        self.busy = 0.0
+        self.max_latency = 0.0
+
+    @property
+    def dropped(self) -> int:
+        return self.items_in - self.items_out
+
+    def record(self, items_in: int, items_out: int, elapsed: float) -> None:
+        self.items_in += items_in
+        self.items_out += items_out
+        self.calls += 1
+        self.busy += elapsed
+        if elapsed > self.max_latency:
+            self.max_latency = elapsed
+
+    def describe(self, elapsed: float) -> str:
+        rate = self.items_out / max(elapsed, 1e-9)
+        average = self.busy / self.calls * 1000 if self.calls else 0.0
+        text = (
+            f"{self.name}: {self.items_out} out ({rate:.1f}/s), "
+            f"{average:.2f} ms avg / {self.max_latency * 1000:.1f} ms max per call"
+        )
+        if self.dropped:
+            text += f", {self.dropped} dropped"
+        return text
+
+
+class Sink:
+    """
+    Destination of a pipeline. Methods run in worker threads, one at a time.
+
+    `dry_run` is set by the pipeline before `open`; sinks must not persist
+    anything when it is true.
+    """
+
+    dry_run = False
+
+    def open(self) -> None:
+        pass
+
+    def write(self, batch: List[Any]) -> Dict[str, int]:
+        raise NotImplementedError
+
+    def close(self) -> Dict[str, int]:
+        """Finish the run; may return final counters (e.g. from a merge)"""
+        return {}
+
+    def abort(self) -> None:
+        """Release resources after a failed run"""
+
+
+class CallableSink(Sink):
+    """Sink that passes each batch to `write_batch`; nothing is written in dry-run mode"""
+
+    def __init__(self, write_batch: Callable[[List[Any]], Dict[str, int]]):
+        self.write_batch = write_batch
+
+    def write(self, batch: List[Any]) -> Dict[str, int]:
+        if self.dry_run:
+            return {}
+        return self.write_batch(batch)
+
+
+class OffsetCheckpoint:
+    """
+    Progress over a paged source, persisted as JSON.
+
+    `next_offset` is the low watermark: every page before it is done. Pages
+    finished out of order above it are kept in `completed`. `counters` and
+    `meta` are free-form and saved alongside.
+    """
+
+    def __init__(self, path: str, step: int, next_offset: int = 0):
+        self.path = path
+        self.step = step
+        self.next_offset = next_offset
+        self.completed: Set[int] = set()
+        self.counters: Counter = Counter()
+        self.meta: Dict[str, Any] = {}
+
+    @classmethod
+    def load(cls, path: str, step: int, start: Optional[int] = None, reset: bool = False) -> "OffsetCheckpoint":
+        if reset or not os.path.exists(path):
+            return cls(path, step, start or 0)
+        with open(path, encoding="utf-8") as handle:
+            data = json.load(handle)
+        if data.get("step") != step:
+            raise SystemExit(
+                f"Checkpoint {path} was written with page size {data.get('step')}; "
+                "rerun with the same page size or reset it."
+            )
+        checkpoint = cls(path, step, data.get("next_offset", 0))
+        checkpoint.completed = set(data.get("completed", []))
+        checkpoint.counters = Counter(data.get("counters", {}))
+        checkpoint.meta = data.get("meta", {})
+        if start is not None:
+            checkpoint.next_offset = start
+        return checkpoint
+
+    def mark_done(self, offset: int) -> None:
+        self.completed.add(offset)
+        while self.next_offset in self.completed:
+            self.completed.remove(self.next_offset)
+            self.next_offset += self.step
+
+    def is_done(self, offset: int) -> bool:
+        return offset < self.next_offset or offset in self.completed
+
+    def save(self) -> None:
+        data = {
+            "step": self.step,
+            "next_offset": self.next_offset,
+            "completed": sorted(self.completed),
+            "counters": dict(self.counters),
+            "meta": self.meta,
+        }
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as handle:
+            json.dump(data, handle)
+        os.replace(tmp_path, self.path)
+
+
+@dataclass
+class RunResult:
+    """Totals of a finished pipeline run"""
+
+    counters: Counter
+    stages: List[StageStats]
+    elapsed: float
+    dry_run: bool = False
+
+    def stage(self, name: str) -> StageStats:
+        return next(stats for stats in self.stages if stats.name == name)
+
+
+@dataclass
+class Pipeline:
+    """One ingestion run; see the module docstring for the stage contracts"""
+
+    name: str
+    source: Union[Iterable[Any], Any]
+    sink: Sink
+    normalize: Optional[Callable[[Any], Any]] = None
+    normalize_concurrency: int = 1
+    key: Optional[Callable[[Any], Optional[Hashable]]] = None
+    batch_size: int = 1000
+    chunk_size: int = 500
+    queue_chunks: int = 4
+    on_batch: Optional[Callable[[List[Any], Dict[str, int]], None]] = None
+    dry_run: bool = False
+    expected_items: Optional[int] = None
+    progress_interval: float = 10.0
+    counters: Counter = field(default_factory=Counter)
+
+    def __post_init__(self):
+        self.stats = {name: StageStats(name) for name in ("source", "normalize", "dedupe", "sink")}
+        self._stop = threading.Event()
+
+    async def run(self) -> RunResult:
+        started = time.monotonic()
+        raw: asyncio.Queue = asyncio.Queue(self.queue_chunks)
+        normalized: asyncio.Queue = asyncio.Queue(self.queue_chunks)
+        unique: asyncio.Queue = asyncio.Queue(self.queue_chunks)
+
+        self.sink.dry_run = self.dry_run
+        await asyncio.to_thread(self.sink.open)
+        tasks = [
+            asyncio.create_task(self._run_source(raw)),
+            asyncio.create_task(self._run_normalize(raw, normalized)),
+            asyncio.create_task(self._run_dedupe(normalized, unique)),
+            asyncio.create_task(self._run_sink(unique)),
+        ]
+        reporter = asyncio.create_task(self._report(started))
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            self._stop.set()
+            for task in tasks:
+                task.cancel()
+            # Unblock a source thread waiting on a full queue
+            for queue in (raw, normalized, unique):
+                while not queue.empty():
+                    queue.get_nowait()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await asyncio.to_thread(self.sink.abort)
+            raise
+        finally:
+            reporter.cancel()
+
+        self.counters.update(await asyncio.to_thread(self.sink.close))
+        elapsed = time.monotonic() - started
+        result = RunResult(self.counters, list(self.stats.values()), elapsed, self.dry_run)
+        self._print_progress(elapsed)
+        return result
+
+    # Stages
+
+    async def _run_source(self, outbox: asyncio.Queue) -> None:
+        stats = self.stats["source"]
+        if hasattr(self.source, "__aiter__"):
+            chunk: List[Any] = []
+            chunk_started = time.perf_counter()
+            async for item in self.source:
+                chunk.append(item)
+                if len(chunk) >= self.chunk_size:
+                    stats.record(len(chunk), len(chunk), time.perf_counter() - chunk_started)
+                    await outbox.put(chunk)
+                    chunk = []
+                    chunk_started = time.perf_counter()
+            if chunk:
+                stats.record(len(chunk), len(chunk), time.perf_counter() - chunk_started)
+                await outbox.put(chunk)
+        else:
+            await asyncio.to_thread(self._pump, asyncio.get_running_loop(), outbox)
+        await outbox.put(_DONE)
+
+    def _pump(self, loop: asyncio.AbstractEventLoop, outbox: asyncio.Queue) -> None:
+        """Read a sync iterable in this worker thread and hand chunks to the loop"""
+        stats = self.stats["source"]
+        iterator = iter(self.source)
+        try:
+            while not self._stop.is_set():
+                chunk_started = time.perf_counter()
+                chunk = []
+                for item in iterator:
+                    chunk.append(item)
+                    if len(chunk) >= self.chunk_size:
+                        break
+                if not chunk:
+                    return
+                stats.record(len(chunk), len(chunk), time.perf_counter() - chunk_started)
+                asyncio.run_coroutine_threadsafe(outbox.put(chunk), loop).result()
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+
+    async def _run_normalize(self, inbox: asyncio.Queue, outbox: asyncio.Queue) -> None:
+        normalize = self.normalize
+        if normalize is None or not inspect.iscoroutinefunction(normalize):
+            await self._normalize_worker(inbox, outbox)
+        else:
+            workers = max(1, self.normalize_concurrency)
+            await asyncio.gather(*(self._normalize_worker(inbox, outbox) for _ in range(workers)))
+            # Each worker re-queued the end marker for its siblings; consume the last one
+            await inbox.get()
+        await outbox.put(_DONE)
+
+    async def _normalize_worker(self, inbox: asyncio.Queue, outbox: asyncio.Queue) -> None:
+        stats = self.stats["normalize"]
+        normalize = self.normalize
+        is_async = normalize is not None and inspect.iscoroutinefunction(normalize)
+        while True:
+            chunk = await inbox.get()
+            if chunk is _DONE:
+                if is_async:
+                    await inbox.put(_DONE)
+                return
+            if is_async:
+                result = []
+                for item in chunk:
+                    call_started = time.perf_counter()
+                    value = await normalize(item)
+                    stats.record(1, 0 if value is None else 1, time.perf_counter() - call_started)
+                    if value is not None:
+                        result.append(value)
+            else:
+                # Sync normalization is timed per chunk to keep per-row overhead low
+                chunk_started = time.perf_counter()
+                values = chunk if normalize is None else [normalize(item) for item in chunk]
+                result = [value for value in values if value is not None]
+                stats.record(len(chunk), len(result), time.perf_counter() - chunk_started)
+            if result:
+                await outbox.put(result)
+
+    async def _run_dedupe(self, inbox: asyncio.Queue, outbox: asyncio.Queue) -> None:
+        stats = self.stats["dedupe"]
+        seen: Set[Hashable] = set()
+        while True:
+            chunk = await inbox.get()
+            if chunk is _DONE:
+                await outbox.put(_DONE)
+                return
+            if self.key is None:
+                stats.record(len(chunk), len(chunk), 0.0)
+                await outbox.put(chunk)
+                continue
+            chunk_started = time.perf_counter()
+            result = []
+            for item in chunk:
+                item_key = self.key(item)
+                if item_key is not None:
+                    if item_key in seen:
+                        continue
+                    seen.add(item_key)
+                result.append(item)
+            stats.record(len(chunk), len(result), time.perf_counter() - chunk_started)
+            if result:
+                await outbox.put(result)
+
+    async def _run_sink(self, inbox: asyncio.Queue) -> None:
+        batch: List[Any] = []
+        while True:
+            chunk = await inbox.get()
+            if chunk is _DONE:
+                if batch:
+                    await self._write(batch)
+                return
+            batch.extend(chunk)
+            while len(batch) >= self.batch_size:
+                await self._write(batch[: self.batch_size])
+                batch = batch[self.batch_size:]
+
+    async def _write(self, batch: List[Any]) -> None:
+        stats = self.stats["sink"]
+        write_started = time.perf_counter()
+        counts = await asyncio.to_thread(self.sink.write, batch) or {}
+        stats.record(len(batch), len(batch), time.perf_counter() - write_started)
+        self.counters.update(counts)
+        if self.on_batch is not None and not self.dry_run:
+            await asyncio.to_thread(self.on_batch, batch, counts)
+
+    # Progress
+
+    async def _report(self, started: float) -> None:
+        while True:
+            await asyncio.sleep(self.progress_interval)
+            self._print_progress(time.monotonic() - started)
+
+    def _print_progress(self, elapsed: float) -> None:
+        source = self.stats["source"]
+        line = f"[{self.name}] {elapsed:.0f}s"
+        if self.expected_items:
+            rate = source.items_out / max(elapsed, 1e-9)
+            remaining = max(self.expected_items - source.items_out, 0)
+            eta = f"{remaining / rate:.0f}s" if rate > 0 else "unknown"
+            line += f", {source.items_out}/{self.expected_items} read, ETA {eta}"
+        if self.counters:
+            line += ", " + ", ".join(f"{name}: {value}" for name, value in sorted(self.counters.items()))
+        print(line)
+        for stats in self.stats.values():
+            print(f"  {stats.describe(elapsed)}")
@@ -0,0 +1,60 @@
+"""
+PostgreSQL sinks for ingestion pipelines
+"""
+
+import os
+from typing import Dict, List, Sequence
+
+from app.ingest.pipeline import Sink
+
+
+class StagingCopySink(Sink):
+    """
+    COPY batches into an unlogged staging table, then apply them set-based.
+
+    Subclasses implement `apply`, which runs once on close with the staging
+    table fully loaded. Staging is created inside the sink's single
+    transaction, so a failed run leaves nothing behind. `apply` must honour
+    `self.dry_run` (count, don't write).
+    """
+
+    def __init__(self, engine, name: str, columns_ddl: str, columns: Sequence[str]):
+        self.engine = engine
+        self.staging = f"{name}_staging_{os.getpid()}"
+        self.columns_ddl = columns_ddl
+        self.columns = tuple(columns)
+        self.connection = None
+        self.cursor = None
+        self._copy_context = None
+        self._copy = None
+
+    def open(self) -> None:
+        self.connection = self.engine.raw_connection()
+        self.cursor = self.connection.cursor()
+        self.cursor.execute(f"DROP TABLE IF EXISTS {self.staging}")
+        self.cursor.execute(f"CREATE UNLOGGED TABLE {self.staging} ({self.columns_ddl})")
+        self._copy_context = self.cursor.copy(f"COPY {self.staging} ({', '.join(self.columns)}) FROM STDIN")
+        self._copy = self._copy_context.__enter__()
+
+    def write(self, batch: List[tuple]) -> Dict[str, int]:
+        write_row = self._copy.write_row
+        for row in batch:
+            write_row(row)
+        return {"staged": len(batch)}
+
+    def apply(self, cursor) -> Dict[str, int]:
+        raise NotImplementedError
+
+    def close(self) -> Dict[str, int]:
+        try:
+            self._copy_context.__exit__(None, None, None)
+            counts = self.apply(self.cursor)
+            self.cursor.execute(f"DROP TABLE {self.staging}")
+            self.connection.commit()
+        finally:
+            self.connection.close()
+        return counts
+
+    def abort(self) -> None:
+        if self.connection is not None:
+            self.connection.close()
@@ -5,8 +5,16 @@ FastAPI backend for the Reliance Factor mobile app
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
+from app.core.compression import CompressionMiddleware
 from app.core.config import settings
+from app.core.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsMiddleware, registry
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core.profiling import ProfilerMiddleware
+from app.core.rate_limit import RateLimitMiddleware
+from app.core.responses import FastJSONResponse
+from app.db.instrumentation import QueryInstrumentationMiddleware
 from app.api.routes import router as api_router
 from app.db.database import engine
 from app.db import models
@@ -21,8 +29,20 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    default_response_class=FastJSONResponse,
 )
 
+# Per-request SQL statistics, slow query logging and N+1 detection (innermost)
+app.add_middleware(QueryInstrumentationMiddleware)
+
+# Sampling profiler for opted-in requests; skipped entirely when unconfigured
+if settings.PROFILER_TOKEN or settings.PROFILER_SAMPLE_RATE > 0:
+    app.add_middleware(ProfilerMiddleware)
+
+# Per-user rate limits and load shedding (inside CORS so rejections carry CORS headers)
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(RateLimitMiddleware)
+
 # Configure CORS for mobile app access
 app.add_middleware(
     CORSMiddleware,
@@ -30,8 +50,17 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
+# gzip/brotli for clients that accept it (inside metrics, so latency includes compression)
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
+
+# Request latency, in-flight and per-request SQL metrics (outermost)
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware, router=app.router)
+
 
 @app.get("/")
 async def root():
@@ -49,6 +78,13 @@ async def health_check():
     return {"status": "healthy"}
 
 
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        """Prometheus scrape endpoint"""
+        return PlainTextResponse(registry.render(), media_type=METRICS_CONTENT_TYPE)
+
+
 # Include API routes
 app.include_router(api_router, prefix="/api/v1")
 
@@ -0,0 +1,78 @@
+"""
+Balance Schemas
+"""
+
+from pydantic import BaseModel, Field
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Literal, Optional
+
+
+class BalanceResponse(BaseModel):
+    """Receivables balance and aging buckets"""
+    total_account_receivable: float
+    reserve: float
+    age_0_30: float
+    age_31_60: float
+    age_61_90: float
+    age_90_plus: float
+    current_balance: float = 0
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class ReceivableCreate(BaseModel):
+    """Invoice to add to the receivables ledger"""
+    amount: Decimal = Field(gt=0, max_digits=14, decimal_places=2)
+    invoice_date: Optional[date] = None
+    invoice_number: Optional[str] = None
+    mc_number: Optional[int] = None
+
+
+class ReceivablePayment(BaseModel):
+    """Payment received against an invoice"""
+    amount: Decimal = Field(gt=0, max_digits=14, decimal_places=2)
+
+
+class ReceivableResponse(BaseModel):
+    """Receivables ledger entry"""
+    id: int
+    mc_number: Optional[int] = None
+    invoice_number: Optional[str] = None
+    amount: float
+    paid_amount: float
+    invoice_date: date
+    bucket: str
+    status: str
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class AddFundsRequest(BaseModel):
+    """Deposit into the user's cash balance"""
+    amount: Decimal = Field(gt=0, max_digits=14, decimal_places=2)
+
+
+class TransferRequest(BaseModel):
+    """Transfer out of the user's cash balance"""
+    amount: Decimal = Field(gt=0, max_digits=14, decimal_places=2)
+    to_account: str = Field(min_length=1, max_length=100)
+    description: Optional[str] = None
+
+
+class TransactionResponse(BaseModel):
+    """Cash ledger entry"""
+    id: int
+    user_id: int
+    type: Literal["credit", "debit"]
+    description: str
+    amount: float
+    category: str
+    date: datetime = Field(validation_alias="created_at")
+
+    class Config:
+        from_attributes = True
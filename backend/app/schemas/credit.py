@@ -4,7 +4,7 @@ Credit Score Schemas
 
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional, Union, Literal
+from typing import List, Optional, Union, Literal
 
 
 class CreditScoreBase(BaseModel):
@@ -70,3 +70,10 @@ class CreditCheckRecordResponse(CreditCheckRecordBase):
 
     class Config:
         from_attributes = True
+
+
+class CreditCheckSyncResponse(BaseModel):
+    """Credit checks changed since a client watermark"""
+    changes: List[CreditCheckRecordResponse]
+    watermark: Optional[str] = None
+    has_more: bool
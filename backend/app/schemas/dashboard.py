@@ -0,0 +1,19 @@
+"""
+Dashboard Schemas
+"""
+
+from pydantic import BaseModel
+from typing import List, Optional
+
+from app.schemas.balance import BalanceResponse
+from app.schemas.credit import CreditHistory, CreditScoreResponse, CreditCheckRecordResponse
+from app.schemas.user import UserResponse
+
+
+class DashboardResponse(BaseModel):
+    """Everything the home screen needs in one payload"""
+    user: UserResponse
+    balance: Optional[BalanceResponse] = None
+    credit_score: Optional[CreditScoreResponse] = None
+    recent_checks: List[CreditCheckRecordResponse]
+    history: List[CreditHistory]
@@ -0,0 +1,42 @@
+"""
+Fuel Schemas
+"""
+
+from pydantic import BaseModel, Field
+from datetime import datetime
+from decimal import Decimal
+from typing import Optional
+
+
+class FuelPurchaseCreate(BaseModel):
+    """Fill-up to record"""
+    station: str = Field(min_length=1, max_length=255)
+    gallons: Decimal = Field(gt=0, max_digits=10, decimal_places=3)
+    price_per_gallon: Decimal = Field(gt=0, max_digits=8, decimal_places=3)
+    retail_price_per_gallon: Optional[Decimal] = Field(None, gt=0, max_digits=8, decimal_places=3)
+    date: Optional[datetime] = None
+
+
+class FuelPurchaseResponse(BaseModel):
+    """Stored fill-up"""
+    id: int
+    user_id: int
+    station: str
+    gallons: float
+    price_per_gallon: float
+    total: float
+    savings: float
+    date: datetime = Field(validation_alias="purchased_at")
+
+    class Config:
+        from_attributes = True
+
+
+class FuelSummaryResponse(BaseModel):
+    """Fuel totals for a period"""
+    total_spent: float
+    total_gallons: float
+    avg_price_per_gallon: float
+    savings: float
+    purchases: int
+    last_fill_up: Optional[FuelPurchaseResponse] = None
@@ -0,0 +1,63 @@
+"""add transactions ledger and balance checkpoints
+
+Revision ID: a5c7e2f49d10
+Revises: f3a9d6b2c815
+Create Date: 2026-10-19 19:22:08.410562
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a5c7e2f49d10'
+down_revision: Union[str, None] = 'f3a9d6b2c815'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'balances',
+        sa.Column('current_balance', sa.Numeric(14, 2), nullable=False, server_default='0'),
+    )
+
+    op.create_table(
+        'transactions',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('type', sa.Enum('credit', 'debit', name='transaction_type'), nullable=False),
+        sa.Column('amount', sa.Numeric(14, 2), nullable=False),
+        sa.Column('description', sa.String(255), nullable=False),
+        sa.Column('category', sa.String(50), nullable=False),
+        sa.Column('to_account', sa.String(100), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    )
+    op.create_index('ix_transactions_id', 'transactions', ['id'])
+    op.create_index('ix_transactions_user_id_id', 'transactions', ['user_id', 'id'])
+
+    op.create_table(
+        'balance_checkpoints',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('transaction_id', sa.Integer(), sa.ForeignKey('transactions.id'), nullable=False),
+        sa.Column('balance', sa.Numeric(14, 2), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    )
+    op.create_index('ix_balance_checkpoints_id', 'balance_checkpoints', ['id'])
+    op.create_index(
+        'ix_balance_checkpoints_user_id_transaction_id', 'balance_checkpoints', ['user_id', 'transaction_id']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_balance_checkpoints_user_id_transaction_id', table_name='balance_checkpoints')
+    op.drop_index('ix_balance_checkpoints_id', table_name='balance_checkpoints')
+    op.drop_table('balance_checkpoints')
+    op.drop_index('ix_transactions_user_id_id', table_name='transactions')
+    op.drop_index('ix_transactions_id', table_name='transactions')
+    op.drop_table('transactions')
+    sa.Enum(name='transaction_type').drop(op.get_bind(), checkfirst=True)
+    op.drop_column('balances', 'current_balance')
@@ -0,0 +1,64 @@
+"""add fuel purchases and rollups
+
+Revision ID: b8d1f4a6e392
+Revises: a5c7e2f49d10
+Create Date: 2026-10-19 20:14:37.905118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8d1f4a6e392'
+down_revision: Union[str, None] = 'a5c7e2f49d10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'fuel_purchases',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('station', sa.String(255), nullable=False),
+        sa.Column('gallons', sa.Numeric(10, 3), nullable=False),
+        sa.Column('price_per_gallon', sa.Numeric(8, 3), nullable=False),
+        sa.Column('total', sa.Numeric(12, 2), nullable=False),
+        sa.Column('savings', sa.Numeric(12, 2), nullable=False),
+        sa.Column('purchased_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    )
+    op.create_index('ix_fuel_purchases_id', 'fuel_purchases', ['id'])
+    op.create_index(
+        'ix_fuel_purchases_user_id_purchased_at_id', 'fuel_purchases', ['user_id', 'purchased_at', 'id']
+    )
+
+    op.create_table(
+        'fuel_rollups',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('grain', sa.Enum('day', 'week', 'month', name='fuel_rollup_grain'), nullable=False),
+        sa.Column('period_start', sa.Date(), nullable=False),
+        sa.Column('purchases', sa.Integer(), nullable=False),
+        sa.Column('gallons', sa.Numeric(14, 3), nullable=False),
+        sa.Column('spent', sa.Numeric(14, 2), nullable=False),
+        sa.Column('savings', sa.Numeric(14, 2), nullable=False),
+    )
+    op.create_index('ix_fuel_rollups_id', 'fuel_rollups', ['id'])
+    op.create_index(
+        'uq_fuel_rollups_user_id_grain_period_start', 'fuel_rollups', ['user_id', 'grain', 'period_start'],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_fuel_rollups_user_id_grain_period_start', table_name='fuel_rollups')
+    op.drop_index('ix_fuel_rollups_id', table_name='fuel_rollups')
+    op.drop_table('fuel_rollups')
+    sa.Enum(name='fuel_rollup_grain').drop(op.get_bind(), checkfirst=True)
+    op.drop_index('ix_fuel_purchases_user_id_purchased_at_id', table_name='fuel_purchases')
+    op.drop_index('ix_fuel_purchases_id', table_name='fuel_purchases')
+    op.drop_table('fuel_purchases')
@@ -0,0 +1,46 @@
+"""unique company identifiers
+
+Revision ID: c41f8d2e6b17
+Revises: b7e21c94d0a3
+Create Date: 2026-10-19 11:40:03.518392
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41f8d2e6b17'
+down_revision: Union[str, None] = 'b7e21c94d0a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _assert_no_duplicates(column: str) -> None:
+    duplicates = op.get_bind().execute(sa.text(f"""
+        SELECT COUNT(*) FROM (
+            SELECT {column} FROM companies
+            WHERE {column} IS NOT NULL
+            GROUP BY {column}
+            HAVING COUNT(*) > 1
+        ) d
+    """)).scalar()
+    if duplicates:
+        raise RuntimeError(
+            f"companies has {duplicates} duplicated {column} values; "
+            "merge or delete the duplicates before adding the unique index."
+        )
+
+
+def upgrade() -> None:
+    _assert_no_duplicates('factor_network_uuid')
+    _assert_no_duplicates('mc_number')
+    op.create_index('uq_companies_factor_network_uuid', 'companies', ['factor_network_uuid'], unique=True)
+    op.create_index('uq_companies_mc_number', 'companies', ['mc_number'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('uq_companies_mc_number', table_name='companies')
+    op.drop_index('uq_companies_factor_network_uuid', table_name='companies')
@@ -0,0 +1,43 @@
+"""backfill credit_checks.updated_at and index it for delta sync
+
+Revision ID: c6e3a8d51f74
+Revises: b8d1f4a6e392
+Create Date: 2026-10-19 21:03:55.118240
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c6e3a8d51f74'
+down_revision: Union[str, None] = 'b8d1f4a6e392'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "UPDATE credit_checks SET updated_at = COALESCE(deleted_at, created_at, now()) WHERE updated_at IS NULL"
+    )
+    op.alter_column(
+        'credit_checks', 'updated_at',
+        existing_type=sa.DateTime(timezone=True),
+        nullable=False,
+        server_default=sa.text('now()'),
+    )
+    op.create_index(
+        'ix_credit_checks_user_id_updated_at_id', 'credit_checks', ['user_id', 'updated_at', 'id']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_credit_checks_user_id_updated_at_id', table_name='credit_checks')
+    op.alter_column(
+        'credit_checks', 'updated_at',
+        existing_type=sa.DateTime(timezone=True),
+        nullable=True,
+        server_default=None,
+    )
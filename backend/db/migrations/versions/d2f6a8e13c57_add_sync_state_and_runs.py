@@ -0,0 +1,52 @@
+"""add sync_state and sync_runs
+
+Revision ID: d2f6a8e13c57
+Revises: c41f8d2e6b17
+Create Date: 2026-10-19 14:05:48.517302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2f6a8e13c57'
+down_revision: Union[str, None] = 'c41f8d2e6b17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'sync_state',
+        sa.Column('source', sa.String(100), primary_key=True),
+        sa.Column('watermark', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('position', sa.Integer(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    )
+    op.create_table(
+        'sync_runs',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('source', sa.String(100), nullable=False),
+        sa.Column('mode', sa.String(20), nullable=False),
+        sa.Column('status', sa.String(20), nullable=False),
+        sa.Column('started_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('pages', sa.Integer(), nullable=False),
+        sa.Column('fetched', sa.Integer(), nullable=False),
+        sa.Column('inserted', sa.Integer(), nullable=False),
+        sa.Column('updated', sa.Integer(), nullable=False),
+        sa.Column('unchanged', sa.Integer(), nullable=False),
+        sa.Column('error', sa.Text(), nullable=True),
+    )
+    op.create_index('ix_sync_runs_id', 'sync_runs', ['id'])
+    op.create_index('ix_sync_runs_source_started_at', 'sync_runs', ['source', 'started_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_sync_runs_source_started_at', table_name='sync_runs')
+    op.drop_index('ix_sync_runs_id', table_name='sync_runs')
+    op.drop_table('sync_runs')
+    op.drop_table('sync_state')
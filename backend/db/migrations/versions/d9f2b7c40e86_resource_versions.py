@@ -0,0 +1,32 @@
+"""add per-user resource versions for etags
+
+Revision ID: d9f2b7c40e86
+Revises: c6e3a8d51f74
+Create Date: 2026-10-19 21:48:12.664093
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd9f2b7c40e86'
+down_revision: Union[str, None] = 'c6e3a8d51f74'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'resource_versions',
+        sa.Column('user_id', sa.Integer(), primary_key=True),
+        sa.Column('resource', sa.String(50), primary_key=True),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('resource_versions')
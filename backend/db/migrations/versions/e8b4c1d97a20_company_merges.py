@@ -0,0 +1,49 @@
+"""add company merge provenance
+
+Revision ID: e8b4c1d97a20
+Revises: d2f6a8e13c57
+Create Date: 2026-10-19 16:40:12.983145
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8b4c1d97a20'
+down_revision: Union[str, None] = 'd2f6a8e13c57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('companies', sa.Column('merged_into_id', sa.Integer(), nullable=True))
+    op.create_foreign_key(
+        'fk_companies_merged_into_id', 'companies', 'companies', ['merged_into_id'], ['id']
+    )
+    op.create_index('ix_companies_merged_into_id', 'companies', ['merged_into_id'])
+
+    op.create_table(
+        'company_merges',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('canonical_id', sa.Integer(), sa.ForeignKey('companies.id'), nullable=False),
+        sa.Column('duplicate_id', sa.Integer(), sa.ForeignKey('companies.id'), nullable=False),
+        sa.Column('matched_on', sa.String(50), nullable=False),
+        sa.Column('duplicate_data', sa.Text(), nullable=False),
+        sa.Column('merged_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    )
+    op.create_index('ix_company_merges_id', 'company_merges', ['id'])
+    op.create_index('ix_company_merges_canonical_id', 'company_merges', ['canonical_id'])
+    op.create_index('ix_company_merges_duplicate_id', 'company_merges', ['duplicate_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_company_merges_duplicate_id', table_name='company_merges')
+    op.drop_index('ix_company_merges_canonical_id', table_name='company_merges')
+    op.drop_index('ix_company_merges_id', table_name='company_merges')
+    op.drop_table('company_merges')
+    op.drop_index('ix_companies_merged_into_id', table_name='companies')
+    op.drop_constraint('fk_companies_merged_into_id', 'companies', type_='foreignkey')
+    op.drop_column('companies', 'merged_into_id')
@@ -0,0 +1,71 @@
+"""add receivables ledger and numeric balances
+
+Revision ID: f3a9d6b2c815
+Revises: e8b4c1d97a20
+Create Date: 2026-10-19 18:05:41.226731
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a9d6b2c815'
+down_revision: Union[str, None] = 'e8b4c1d97a20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BALANCE_COLUMNS = (
+    'total_account_receivable', 'reserve', 'age_0_30', 'age_31_60', 'age_61_90', 'age_90_plus'
+)
+
+
+def upgrade() -> None:
+    # Balances are adjusted incrementally from now on; floats would drift
+    for column in BALANCE_COLUMNS:
+        op.alter_column(
+            'balances', column,
+            type_=sa.Numeric(14, 2),
+            existing_type=sa.Float(),
+            postgresql_using=f'{column}::numeric(14,2)',
+        )
+
+    op.create_table(
+        'receivables',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('mc_number', sa.Integer(), nullable=True),
+        sa.Column('invoice_number', sa.String(100), nullable=True),
+        sa.Column('amount', sa.Numeric(14, 2), nullable=False),
+        sa.Column('paid_amount', sa.Numeric(14, 2), nullable=False, server_default='0'),
+        sa.Column('invoice_date', sa.Date(), nullable=False),
+        sa.Column('bucket', sa.String(20), nullable=False),
+        sa.Column('status', sa.String(20), nullable=False, server_default='open'),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index('ix_receivables_id', 'receivables', ['id'])
+    op.create_index('ix_receivables_user_id', 'receivables', ['user_id'])
+    op.create_index(
+        'uq_receivables_user_id_invoice_number', 'receivables', ['user_id', 'invoice_number'], unique=True
+    )
+    op.create_index(
+        'ix_receivables_status_bucket_invoice_date', 'receivables', ['status', 'bucket', 'invoice_date']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_receivables_status_bucket_invoice_date', table_name='receivables')
+    op.drop_index('uq_receivables_user_id_invoice_number', table_name='receivables')
+    op.drop_index('ix_receivables_user_id', table_name='receivables')
+    op.drop_index('ix_receivables_id', table_name='receivables')
+    op.drop_table('receivables')
+
+    for column in BALANCE_COLUMNS:
+        op.alter_column(
+            'balances', column,
+            type_=sa.Float(),
+            existing_type=sa.Numeric(14, 2),
+        )
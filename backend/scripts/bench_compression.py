@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Benchmark response compression levels.
+
+Renders /credit/checks and /companies/autocomplete shaped payloads exactly
+as those routes do (Projection over column tuples, validated by
+list_response and rendered with orjson), both full and with a typical
+`fields=` projection. It then reports compressed size, savings and CPU
+time per response for each gzip level and, when the brotli package is
+installed, each brotli quality. Use it to choose COMPRESSION_GZIP_LEVEL
+and COMPRESSION_BROTLI_QUALITY. No database is needed.
+
+Execution:
+  python scripts/bench_compression.py
+  python scripts/bench_compression.py --rows 10 50 500 --repeat 20
+"""
+
+import argparse
+import os
+import sys
+import time
+import zlib
+from typing import Callable, List, Tuple
+
+# Ensure app imports resolve when running from repo root or backend/
+CURRENT_DIR = os.path.dirname(__file__)
+BACKEND_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, ".."))
+sys.path.insert(0, BACKEND_ROOT)
+
+from app.core.projection import Projection
+from app.db.models import Company, CreditCheck
+from app.schemas.company import CompanyAutocompleteResponse
+from app.schemas.credit import CreditCheckRecordResponse
+from bench_json_responses import make_companies, make_credit_checks, projected_rows
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+GZIP_LEVELS = (1, 3, 5, 6, 9)
+BROTLI_QUALITIES = (1, 3, 4, 5, 7, 11)
+
+
+def codecs() -> List[Tuple[str, Callable[[bytes], bytes]]]:
+    result = []
+    for level in GZIP_LEVELS:
+        result.append((f"gzip-{level}", lambda data, level=level: _gzip(data, level)))
+    if brotli is not None:
+        for quality in BROTLI_QUALITIES:
+            result.append((f"br-{quality}", lambda data, quality=quality: brotli.compress(data, quality=quality)))
+    return result
+
+
+def _gzip(data: bytes, level: int) -> bytes:
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+def best_of(func: Callable[[bytes], bytes], data: bytes, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(data)
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark response compression levels.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10, 100, 1000], help="Rows per payload.")
+    parser.add_argument("--repeat", type=int, default=10, help="Runs per measurement (best is reported).")
+    args = parser.parse_args()
+
+    if brotli is None:
+        print("brotli is not installed; reporting gzip only\n")
+
+    # (label, model, response schema, rows, fields=)
+    payloads = [
+        ("credit_checks", CreditCheck, CreditCheckRecordResponse, make_credit_checks, None),
+        ("checks_status", CreditCheck, CreditCheckRecordResponse, make_credit_checks, "status,approved_amount,updated_at"),
+        ("autocomplete", Company, CompanyAutocompleteResponse, make_companies, None),
+        ("autocomplete_mc", Company, CompanyAutocompleteResponse, make_companies, "name,mc_number"),
+    ]
+    print(f"{'payload':<16}{'rows':>6}{'codec':>10}{'bytes':>10}{'saved':>9}{'ms':>9}{'MB/s':>9}")
+    for label, model, schema, factory, fields in payloads:
+        projection = Projection(model, schema, fields)
+        for count in args.rows:
+            body = projection.response(projected_rows(projection, factory(count))).body
+            print(f"{label:<16}{count:>6}{'identity':>10}{len(body):>10}{'-':>9}{'-':>9}{'-':>9}")
+            for name, compress in codecs():
+                size = len(compress(body))
+                elapsed_ms = best_of(compress, body, args.repeat)
+                throughput = len(body) / 1e6 / (elapsed_ms / 1000) if elapsed_ms else float("inf")
+                print(
+                    f"{'':<16}{'':>6}{name:>10}{size:>10}{1 - size / len(body):>8.0%} "
+                    f"{elapsed_ms:>8.3f}{throughput:>9.0f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Benchmark list response serialization.
+
+Compares the previous path (per-row model_validate, FastAPI response_model
+validation and dump, stdlib json) against the one the list routes use now
+(Projection: selected column tuples validated in bulk by list_response and
+rendered with orjson) for /credit/checks and /companies/autocomplete shaped
+payloads. --fields measures a `fields=` projection on the new path (the
+previous path always rendered full rows).
+No database is needed.
+
+Execution:
+  python scripts/bench_json_responses.py
+  python scripts/bench_json_responses.py --rows 1000 10000 --repeat 7
+  python scripts/bench_json_responses.py --fields status,approved_amount
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import Callable, List, Optional
+
+# Ensure app imports resolve when running from repo root or backend/
+CURRENT_DIR = os.path.dirname(__file__)
+BACKEND_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, ".."))
+sys.path.insert(0, BACKEND_ROOT)
+
+from pydantic import TypeAdapter
+from starlette.responses import JSONResponse
+
+from app.core.projection import Projection
+from app.db.models import Company, CreditCheck
+from app.schemas.company import CompanyAutocompleteResponse
+from app.schemas.credit import CreditCheckRecordResponse
+
+
+def make_credit_checks(count: int) -> List[SimpleNamespace]:
+    now = datetime.now(timezone.utc)
+    return [
+        SimpleNamespace(
+            id=idx,
+            user_id=1,
+            mc_number=100000 + idx,
+            status="APPROVED",
+            approved_amount=5000,
+            factor_cloud_uuid=f"8b1c2f0e-0000-4000-8000-{idx:012d}",
+            credit_check_uuid=f"5d7e9a1b-0000-4000-8000-{idx:012d}",
+            source="FactorsNetwork",
+            expiration_date=now + timedelta(days=90),
+            created_at=now,
+            updated_at=now,
+            deleted_at=None,
+        )
+        for idx in range(count)
+    ]
+
+
+def make_companies(count: int) -> List[SimpleNamespace]:
+    return [
+        SimpleNamespace(
+            id=idx,
+            name=f"Acme Logistics {idx}",
+            legal_name=f"Acme Logistics {idx} LLC",
+            mc_number=200000 + idx,
+            dot_number=3000000 + idx,
+        )
+        for idx in range(count)
+    ]
+
+
+def before(schema) -> Callable[[list], bytes]:
+    """Per-row model_validate, then FastAPI's response_model validate/dump and stdlib json"""
+    response_adapter = TypeAdapter(List[schema])
+
+    def render(rows: list) -> bytes:
+        items = [schema.model_validate(row) for row in rows]
+        value = response_adapter.validate_python(items)
+        return JSONResponse(response_adapter.dump_python(value, mode="json")).body
+
+    return render
+
+
+def projected_rows(projection: Projection, rows: list) -> list:
+    """The column tuples the projection's SELECT returns for `rows`"""
+    return [tuple(getattr(row, attribute) for _, attribute in projection.pairs) for row in rows]
+
+
+def after(projection: Projection) -> Callable[[list], bytes]:
+    """Projection path over column tuples, as the database returns them"""
+
+    def render(rows: list) -> bytes:
+        return projection.response(rows).body
+
+    return render
+
+
+def best_of(func: Callable[[list], bytes], rows: list, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(rows)
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark list response serialization.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000], help="Payload sizes.")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement (best is reported).")
+    parser.add_argument("--fields", default=None, help="Project these fields (ignored where a payload lacks them).")
+    args = parser.parse_args()
+
+    payloads = [
+        ("credit_checks", CreditCheck, CreditCheckRecordResponse, make_credit_checks),
+        ("autocomplete", Company, CompanyAutocompleteResponse, make_companies),
+    ]
+    print(f"{'payload':<15}{'rows':>8}{'before ms':>12}{'after ms':>12}{'speedup':>10}{'bytes':>12}")
+    for label, model, schema, factory in payloads:
+        fields = args.fields
+        if fields and not set(fields.split(",")) <= set(schema.model_fields):
+            fields = None
+        projection = Projection(model, schema, fields)
+        for count in args.rows:
+            rows = factory(count)
+            projected = projected_rows(projection, rows)
+            before_ms = best_of(before(schema), rows, args.repeat)
+            after_ms = best_of(after(projection), projected, args.repeat)
+            size = len(after(projection)(projected))
+            print(
+                f"{label:<15}{count:>8}{before_ms:>12.1f}{after_ms:>12.1f}"
+                f"{before_ms / after_ms:>9.1f}x{size:>12}"
+            )
+
+if __name__ == "__main__":
+    main()
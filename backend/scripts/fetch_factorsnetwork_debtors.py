@@ -2,18 +2,48 @@
 """
 Fetch all debtors from FactorsNetwork and insert into companies.
 
-This script paginates the /api/debtors.json endpoint, de-duplicates
-by factor_network_uuid or mc_number, and stores the results in the
-companies table using user_id=1. It is intended for one-off or batch
+This script pages the /api/debtors.json endpoint, de-duplicates
+by factor_network_uuid or mc_number (both unique in companies), and
+stores the results in the companies table using user_id=1. It is intended for one-off or batch
 imports when seeding the database from FactorsNetwork.
+
+Pages are fetched concurrently within a request-rate budget that backs off
+on 429/5xx responses. Progress is checkpointed after every page, so an
+interrupted sync resumes where it stopped when run again.
+
+--incremental refreshes only what changed and is cheap enough to run every
+few minutes. The per-source watermark lives in sync_state and every run is
+recorded in sync_runs. With --since-param the API is asked for debtors
+modified since the last watermark; otherwise a rolling window re-reads the
+newest --window records plus any appended since the last run. Changed
+debtors are upserted on factor_network_uuid (unchanged rows are not
+written), and companies matched by MC number that have no uuid yet get
+one attached.
+
+Both modes run as app.ingest pipelines: fetched pages -> debtor_rows() ->
+one upsert statement per page. --dry-run fetches and normalizes without
+writing companies, the checkpoint, or sync state.
+
+Execution:
+  python scripts/fetch_factorsnetwork_debtors.py
+  python scripts/fetch_factorsnetwork_debtors.py --concurrency 8 --rate 2
+  python scripts/fetch_factorsnetwork_debtors.py --reset --start 151000
+  python scripts/fetch_factorsnetwork_debtors.py --incremental
+  python scripts/fetch_factorsnetwork_debtors.py --incremental --since-param modifiedSince
+  python scripts/fetch_factorsnetwork_debtors.py --dry-run --max-pages 10
 """
 
+import argparse
+import asyncio
+import json
 import os
 import sys
-import time
-from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
 
 import httpx
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 # Ensure app imports resolve when running from repo root or backend/
 CURRENT_DIR = os.path.dirname(__file__)
@@ -21,8 +51,16 @@ BACKEND_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, ".."))
 sys.path.insert(0, BACKEND_ROOT)
 
 from app.db.database import SessionLocal
-from app.db.models import Company
+from app.db.models import Company, SyncRun, SyncState
 from app.core.config import settings
+from app.core.identifiers import normalize_dot, normalize_mc
+from app.core.rate_limit import AdaptiveRateLimiter
+from app.ingest.pipeline import CallableSink, OffsetCheckpoint, Pipeline
+
+DEFAULT_CHECKPOINT = os.path.join(BACKEND_ROOT, ".factorsnetwork_sync.json")
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+MAX_ATTEMPTS = 8
+SYNC_SOURCE = "factorsnetwork_debtors"
 
 
 def get_auth() -> Optional[httpx.BasicAuth]:
@@ -31,16 +69,45 @@ def get_auth() -> Optional[httpx.BasicAuth]:
     return None
 
 
-def fetch_page(client: httpx.Client, first_result: int, max_results: int) -> Tuple[List[Dict[str, Any]], int]:
-    response = client.get(
-        "/api/debtors.json",
-        params={
-            "firstResult": first_result,
-            "maxResults": max_results,
-            "includeBranches": "false",
-        },
-        auth=get_auth(),
-    )
+class RetryableError(Exception):
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+async def fetch_page(
+    client: httpx.AsyncClient,
+    first_result: int,
+    max_results: int,
+    extra_params: Optional[Dict[str, str]] = None,
+) -> Tuple[List[Dict[str, Any]], int]:
+    try:
+        response = await client.get(
+            "/api/debtors.json",
+            params={
+                "firstResult": first_result,
+                "maxResults": max_results,
+                "includeBranches": "false",
+                **(extra_params or {}),
+            },
+            auth=get_auth(),
+        )
+    except httpx.TransportError as exc:
+        raise RetryableError(f"transport error: {exc}") from exc
+    if response.status_code in RETRYABLE_STATUS:
+        raise RetryableError(
+            f"HTTP {response.status_code}",
+            retry_after=parse_retry_after(response.headers.get("Retry-After")),
+        )
     response.raise_for_status()
     payload = response.json()
     debtors = payload.get("debtors", []) if isinstance(payload, dict) else []
@@ -48,81 +115,462 @@ def fetch_page(client: httpx.Client, first_result: int, max_results: int) -> Tup
     return debtors, total_records
 
 
-def upsert_companies(records: List[Dict[str, Any]]) -> Tuple[int, int]:
-    inserted = 0
-    skipped = 0
+def debtor_rows(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Map debtors to companies rows; debtors without a uuid are dropped"""
+    rows = []
+    for debtor in records:
+        factor_uuid = debtor.get("uuid")
+        if not factor_uuid:
+            continue
+        rows.append(
+            {
+                "user_id": 1,
+                "name": debtor.get("companyName") or "Unknown",
+                "mc_number": normalize_mc(debtor.get("mcNumber")),
+                "dot_number": normalize_dot(debtor.get("dotNumber")),
+                "factor_network_uuid": factor_uuid,
+                "status": None,
+            }
+        )
+    return rows
+
+
+def upsert_companies(rows: List[Dict[str, Any]]) -> int:
+    """
+    Insert debtor rows in one statement and return how many were inserted.
+
+    Debtors whose uuid or MC number already exists (in the table or earlier
+    in the batch) are skipped by ON CONFLICT DO NOTHING; the inserted count
+    comes from RETURNING.
+    """
+    if not rows:
+        return 0
+
+    statement = (
+        pg_insert(Company)
+        .values(rows)
+        .on_conflict_do_nothing()
+        .returning(Company.id)
+    )
     session = SessionLocal()
     try:
-        for debtor in records:
-            factor_uuid = debtor.get("uuid")
-            if not factor_uuid:
-                skipped += 1
-                continue
+        inserted = len(session.execute(statement).all())
+        session.commit()
+    finally:
+        session.close()
 
-            mc_number = debtor.get("mcNumber")
-            exists = (
-                session.query(Company)
-                .filter(
-                    (Company.factor_network_uuid == factor_uuid)
-                    | (
-                        Company.mc_number.isnot(None)
-                        & (Company.mc_number == (str(mc_number) if mc_number is not None else None))
-                    )
-                )
-                .first()
-            )
-            if exists:
-                skipped += 1
-                continue
+    return inserted
 
-            company = Company(
-                user_id=1,
-                name=debtor.get("companyName") or "Unknown",
-                mc_number=str(mc_number) if mc_number is not None else None,
-                dot_number=str(debtor.get("dotNumber")) if debtor.get("dotNumber") is not None else None,
-                factor_network_uuid=factor_uuid,
-                status=None,
-            )
-            session.add(company)
-            inserted += 1
 
+# Companies that already carry a debtor's MC number but no uuid adopt the uuid,
+# unless another company has it already. Returns the attached uuids.
+ATTACH_UUIDS_SQL = text("""
+    WITH src AS (
+        SELECT * FROM jsonb_to_recordset(CAST(:rows AS jsonb))
+            AS r(factor_network_uuid text, name text, mc_number integer, dot_number integer)
+    )
+    UPDATE companies c
+    SET factor_network_uuid = src.factor_network_uuid, updated_at = now()
+    FROM src
+    WHERE c.mc_number = src.mc_number
+      AND c.factor_network_uuid IS NULL
+      AND NOT EXISTS (
+          SELECT 1 FROM companies other WHERE other.factor_network_uuid = src.factor_network_uuid
+      )
+    RETURNING c.factor_network_uuid
+""")
+
+# Debtors whose MC number belongs to a company with a different uuid are left
+# alone; otherwise insert, or update only when a synced column changed. Rows
+# whose uuid was just attached are not counted again as updates.
+UPSERT_CHANGED_SQL = text("""
+    WITH src AS (
+        SELECT * FROM jsonb_to_recordset(CAST(:rows AS jsonb))
+            AS r(factor_network_uuid text, name text, mc_number integer, dot_number integer)
+    ),
+    merged AS (
+        INSERT INTO companies (user_id, name, mc_number, dot_number, factor_network_uuid, status)
+        SELECT 1, src.name, src.mc_number, src.dot_number, src.factor_network_uuid, NULL
+        FROM src
+        WHERE NOT EXISTS (
+            SELECT 1 FROM companies other
+            WHERE other.mc_number = src.mc_number
+              AND other.factor_network_uuid IS DISTINCT FROM src.factor_network_uuid
+        )
+        ON CONFLICT (factor_network_uuid) DO UPDATE SET
+            name = EXCLUDED.name,
+            mc_number = EXCLUDED.mc_number,
+            dot_number = EXCLUDED.dot_number,
+            updated_at = now()
+        WHERE (companies.name, companies.mc_number, companies.dot_number)
+            IS DISTINCT FROM (EXCLUDED.name, EXCLUDED.mc_number, EXCLUDED.dot_number)
+        RETURNING (xmax = 0) AS inserted, factor_network_uuid
+    ),
+    attached AS (
+        SELECT jsonb_array_elements_text(CAST(:attached AS jsonb)) AS factor_network_uuid
+    )
+    SELECT
+        COUNT(*) FILTER (WHERE inserted),
+        COUNT(*) FILTER (
+            WHERE NOT inserted
+              AND merged.factor_network_uuid NOT IN (SELECT factor_network_uuid FROM attached)
+        )
+    FROM merged
+""")
+
+
+def upsert_changed_companies(rows: List[Dict[str, Any]]) -> Tuple[int, int]:
+    """
+    Apply debtor rows, writing only those that are new or changed.
+
+    Returns (inserted, updated); attaching a uuid to an existing company
+    counts as one update, even if the same pass also changes its columns.
+    """
+    # ON CONFLICT may touch each row once per statement: keep the last
+    # record per uuid, then the first per MC number
+    by_uuid = {row["factor_network_uuid"]: row for row in rows}
+    unique_rows = []
+    seen_mc: Set[int] = set()
+    for row in by_uuid.values():
+        if row["mc_number"] is not None:
+            if row["mc_number"] in seen_mc:
+                continue
+            seen_mc.add(row["mc_number"])
+        unique_rows.append(row)
+    if not unique_rows:
+        return 0, 0
+
+    payload = json.dumps(
+        [
+            {key: row[key] for key in ("factor_network_uuid", "name", "mc_number", "dot_number")}
+            for row in unique_rows
+        ]
+    )
+    session = SessionLocal()
+    try:
+        attached = session.execute(ATTACH_UUIDS_SQL, {"rows": payload}).scalars().all()
+        inserted, updated = session.execute(
+            UPSERT_CHANGED_SQL, {"rows": payload, "attached": json.dumps(attached)}
+        ).one()
         session.commit()
     finally:
         session.close()
 
-    return inserted, skipped
+    return inserted, updated + len(attached)
 
 
-def main() -> None:
-    if not settings.FACTORS_NETWORK_BASE_URL:
-        raise SystemExit("FACTORS_NETWORK_BASE_URL is required.")
+class DebtorPage(NamedTuple):
+    offset: int
+    rows: List[Dict[str, Any]]
+    fetched: int
+
+
+def normalize_page(page: Tuple[int, List[Dict[str, Any]]]) -> DebtorPage:
+    offset, debtors = page
+    return DebtorPage(offset, debtor_rows(debtors), len(debtors))
+
+
+def write_pages(pages: List[DebtorPage]) -> Dict[str, int]:
+    fetched = sum(page.fetched for page in pages)
+    inserted = upsert_companies([row for page in pages for row in page.rows])
+    return {"fetched": fetched, "inserted": inserted, "skipped": fetched - inserted}
+
+
+def write_changed_pages(pages: List[DebtorPage]) -> Dict[str, int]:
+    fetched = sum(page.fetched for page in pages)
+    inserted, updated = upsert_changed_companies([row for page in pages for row in page.rows])
+    return {
+        "fetched": fetched,
+        "inserted": inserted,
+        "updated": updated,
+        "unchanged": fetched - inserted - updated,
+    }
+
+
+async def fetch_with_retry(
+    client: httpx.AsyncClient,
+    limiter: AdaptiveRateLimiter,
+    offset: int,
+    page_size: int,
+    extra_params: Optional[Dict[str, str]] = None,
+) -> Tuple[List[Dict[str, Any]], int]:
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        await limiter.acquire()
+        try:
+            result = await fetch_page(client, offset, page_size, extra_params)
+        except RetryableError as exc:
+            if attempt == MAX_ATTEMPTS:
+                raise
+            backoff = exc.retry_after if exc.retry_after is not None else min(2 ** attempt, 120)
+            print(f"Page {offset}: {exc}; retrying in {backoff:.0f}s (attempt {attempt}/{MAX_ATTEMPTS})")
+            limiter.throttled(backoff)
+            continue
+        limiter.succeeded()
+        return result
+    raise AssertionError("unreachable")
+
+
+async def fetch_pages(
+    client: httpx.AsyncClient,
+    limiter: AdaptiveRateLimiter,
+    offsets: Sequence[int],
+    page_size: int,
+    concurrency: int,
+) -> AsyncIterator[Tuple[int, List[Dict[str, Any]]]]:
+    """Yield (offset, debtors) pages as they arrive, with at most `concurrency` requests in flight"""
+    pending_offsets = iter(offsets)
+    in_flight: Dict[asyncio.Task, int] = {}
 
-    max_results = 1000
-    first_result = 151000
-    total_records = None
-    total_inserted = 0
-    total_skipped = 0
+    def schedule() -> None:
+        for offset in pending_offsets:
+            in_flight[asyncio.create_task(fetch_with_retry(client, limiter, offset, page_size))] = offset
+            if len(in_flight) >= concurrency:
+                return
 
-    with httpx.Client(
+    schedule()
+    try:
+        while in_flight:
+            done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                offset = in_flight.pop(task)
+                debtors, _ = task.result()
+                yield offset, debtors
+            schedule()
+    finally:
+        for task in in_flight:
+            task.cancel()
+
+
+async def sync(args: argparse.Namespace) -> OffsetCheckpoint:
+    checkpoint = OffsetCheckpoint.load(args.checkpoint, args.page_size, args.start, args.reset)
+    limiter = AdaptiveRateLimiter(rate=args.rate, burst=args.concurrency)
+
+    async with httpx.AsyncClient(
         base_url=settings.FACTORS_NETWORK_BASE_URL,
         timeout=settings.FACTORS_NETWORK_TIMEOUT_SECONDS,
         verify=settings.FACTORS_NETWORK_VERIFY_SSL,
+        limits=httpx.Limits(max_connections=args.concurrency),
     ) as client:
-        while total_records is None or first_result < total_records:
-            debtors, total_records = fetch_page(client, first_result, max_results)
-            total_records = 500000
-            if not debtors:
-                break
+        # A one-record request reports the current catalog size
+        _, total_records = await fetch_with_retry(client, limiter, 0, 1)
+        checkpoint.meta["total_records"] = total_records
+        offsets = [
+            offset
+            for offset in range(checkpoint.next_offset, total_records, args.page_size)
+            if not checkpoint.is_done(offset)
+        ]
+        if args.max_pages is not None:
+            offsets = offsets[: args.max_pages]
+        print(
+            f"Syncing {len(offsets)} pages from offset {checkpoint.next_offset} "
+            f"of {total_records} records (concurrency {args.concurrency}, {args.rate:.2f} req/s)"
+        )
+
+        def on_batch(pages: List[DebtorPage], counts: Dict[str, int]) -> None:
+            for page in pages:
+                checkpoint.mark_done(page.offset)
+            checkpoint.counters.update(counts)
+            checkpoint.save()
+
+        pipeline = Pipeline(
+            name="factorsnetwork_debtors",
+            source=fetch_pages(client, limiter, offsets, args.page_size, args.concurrency),
+            normalize=normalize_page,
+            sink=CallableSink(write_pages),
+            batch_size=1,
+            chunk_size=1,
+            on_batch=on_batch,
+            dry_run=args.dry_run,
+            expected_items=len(offsets),
+        )
+        await pipeline.run()
+
+    return checkpoint
+
+
+def load_state() -> SyncState:
+    session = SessionLocal()
+    try:
+        state = session.get(SyncState, SYNC_SOURCE) or SyncState(source=SYNC_SOURCE)
+        session.expunge_all()
+        return state
+    finally:
+        session.close()
+
+
+def start_run(mode: str) -> Tuple[SyncState, int]:
+    """Load (or create) the sync state and record a running sync_runs row"""
+    session = SessionLocal()
+    try:
+        state = session.get(SyncState, SYNC_SOURCE)
+        if state is None:
+            state = SyncState(source=SYNC_SOURCE)
+            session.add(state)
+        run = SyncRun(
+            source=SYNC_SOURCE,
+            mode=mode,
+            status="running",
+            pages=0,
+            fetched=0,
+            inserted=0,
+            updated=0,
+            unchanged=0,
+        )
+        session.add(run)
+        session.commit()
+        session.refresh(state)
+        session.expunge(state)
+        return state, run.id
+    finally:
+        session.close()
 
-            inserted, skipped = upsert_companies(debtors)
-            total_inserted += inserted
-            total_skipped += skipped
 
-            first_result += max_results
-            print(f"first_result: {first_result}, total_records: {total_records}")
-            time.sleep(30)
+def finish_run(run_id: int, stats: Dict[str, int], error: Optional[str] = None, state: Optional[SyncState] = None) -> None:
+    """Record run statistics and, on success, advance the watermark in the same transaction"""
+    session = SessionLocal()
+    try:
+        run = session.get(SyncRun, run_id)
+        run.status = "failed" if error else "succeeded"
+        run.finished_at = datetime.now(timezone.utc)
+        run.error = error
+        for key, value in stats.items():
+            setattr(run, key, value)
+        if state is not None and not error:
+            session.merge(state)
+        session.commit()
+    finally:
+        session.close()
+
+
+async def incremental_pages(
+    client: httpx.AsyncClient,
+    limiter: AdaptiveRateLimiter,
+    offset: int,
+    end: Optional[int],
+    page_size: int,
+    extra_params: Dict[str, str],
+) -> AsyncIterator[Tuple[int, List[Dict[str, Any]]]]:
+    """Yield pages from `offset` until `end`, or until the filtered result set is exhausted"""
+    while end is None or offset < end:
+        debtors, total_records = await fetch_with_retry(client, limiter, offset, page_size, extra_params)
+        if not debtors:
+            return
+        yield offset, debtors
+        offset += page_size
+        if end is None and offset >= total_records:
+            return
+
+
+async def sync_incremental(args: argparse.Namespace) -> Dict[str, int]:
+    if args.dry_run:
+        state, run_id = await asyncio.to_thread(load_state), None
+    else:
+        state, run_id = await asyncio.to_thread(start_run, "incremental")
+    limiter = AdaptiveRateLimiter(rate=args.rate, burst=1)
+    stats = {"pages": 0, "fetched": 0, "inserted": 0, "updated": 0, "unchanged": 0}
+    # Debtors modified while the run is in progress are picked up next time
+    run_started = datetime.now(timezone.utc)
+
+    def on_batch(pages: List[DebtorPage], counts: Dict[str, int]) -> None:
+        stats["pages"] += len(pages)
+        for key in ("fetched", "inserted", "updated", "unchanged"):
+            stats[key] += counts.get(key, 0)
+
+    try:
+        async with httpx.AsyncClient(
+            base_url=settings.FACTORS_NETWORK_BASE_URL,
+            timeout=settings.FACTORS_NETWORK_TIMEOUT_SECONDS,
+            verify=settings.FACTORS_NETWORK_VERIFY_SSL,
+        ) as client:
+            extra_params: Dict[str, str] = {}
+            if args.since_param:
+                if state.watermark is not None:
+                    since = state.watermark - timedelta(seconds=args.overlap)
+                    extra_params[args.since_param] = since.isoformat()
+                else:
+                    print("No watermark yet; the first filtered run reads the whole catalog.")
+                offset = 0
+                end = None
+            else:
+                _, total_records = await fetch_with_retry(client, limiter, 0, 1)
+                previous = state.position if state.position is not None else total_records
+                offset = max(0, min(previous, total_records) - args.window)
+                end = total_records
+
+            print(f"Incremental sync from offset {offset} ({extra_params or f'window {args.window}'})")
+            pipeline = Pipeline(
+                name="factorsnetwork_debtors_incremental",
+                source=incremental_pages(client, limiter, offset, end, args.page_size, extra_params),
+                normalize=normalize_page,
+                sink=CallableSink(write_changed_pages),
+                batch_size=1,
+                chunk_size=1,
+                on_batch=on_batch,
+                dry_run=args.dry_run,
+            )
+            result = await pipeline.run()
+            if args.dry_run:
+                stats["pages"] = result.stage("sink").items_out
+
+            if not args.since_param:
+                state.position = end
+            state.watermark = run_started
+    except BaseException as exc:
+        if run_id is not None:
+            await asyncio.to_thread(finish_run, run_id, stats, repr(exc))
+        raise
+
+    if run_id is not None:
+        await asyncio.to_thread(finish_run, run_id, stats, None, state)
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Sync FactorsNetwork debtors into companies.")
+    parser.add_argument("--page-size", type=int, default=1000, help="Debtors per page (maxResults).")
+    parser.add_argument("--concurrency", type=int, default=4, help="Pages fetched in parallel.")
+    parser.add_argument("--rate", type=float, default=1.0, help="Maximum page requests per second.")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT, help="Checkpoint file path.")
+    parser.add_argument("--start", type=int, default=None, help="Override the offset to start from.")
+    parser.add_argument("--reset", action="store_true", help="Ignore any existing checkpoint.")
+    parser.add_argument("--max-pages", type=int, default=None, help="Stop after this many pages.")
+    parser.add_argument("--dry-run", action="store_true", help="Fetch and normalize without writing anything.")
+    parser.add_argument("--incremental", action="store_true", help="Fetch and upsert only changed debtors.")
+    parser.add_argument(
+        "--since-param",
+        default=None,
+        help="Query parameter the API filters modification time by (incremental mode).",
+    )
+    parser.add_argument(
+        "--overlap",
+        type=int,
+        default=300,
+        help="Seconds to re-read before the watermark with --since-param, to absorb clock skew.",
+    )
+    parser.add_argument(
+        "--window",
+        type=int,
+        default=5000,
+        help="Newest records re-read each run when the API cannot filter (incremental mode).",
+    )
+    args = parser.parse_args()
+
+    if not settings.FACTORS_NETWORK_BASE_URL:
+        raise SystemExit("FACTORS_NETWORK_BASE_URL is required.")
+
+    if args.incremental:
+        stats = asyncio.run(sync_incremental(args))
+        print(
+            f"Pages: {stats['pages']}, Fetched: {stats['fetched']}, Inserted: {stats['inserted']}, "
+            f"Updated: {stats['updated']}, Unchanged: {stats['unchanged']}"
+        )
+        return
 
-    print(f"Inserted: {total_inserted}, Skipped: {total_skipped}")
+    checkpoint = asyncio.run(sync(args))
+    if args.dry_run:
+        print("Dry run: nothing was written.")
+        return
+    print(f"Inserted: {checkpoint.counters['inserted']}, Skipped: {checkpoint.counters['skipped']}")
 
 
 if __name__ == "__main__":
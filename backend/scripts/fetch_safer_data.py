@@ -5,21 +5,52 @@ Fetch SAFER/FMCSA data for companies missing safer_is_broker.
 Uses the FMCSA API to look up carriers by MC number and updates
 SAFER fields on the companies table.
 
+Lookups run concurrently, paced by a token bucket at the account quota
+(SAFER_REQUESTS_PER_SECOND, or --rate) that backs off on 429/5xx. Candidate
+companies are streamed in id order and results are committed in batches,
+so an interrupted run keeps its progress; rerunning picks up the companies
+that are still missing SAFER data, or pass --start-id to skip ahead.
+
+Successful lookup responses are cached on disk (SQLite, zlib-compressed
+JSON) keyed by cleaned MC number and reused while younger than --max-age.
+--offline answers from the cache only, and --remap re-applies cached
+payloads to every company, which re-runs extract_carrier/map_fields after
+a parser fix without any network calls.
+
+The run is an app.ingest pipeline: candidate ids -> SAFER lookup and
+map_fields() -> batched update by primary key.
+
+--snapshot applies a locally downloaded FMCSA census/authority CSV (e.g.
+Carrier-All-With-History) instead: rows are streamed with COPY into a
+staging table and every company with a matching MC number is updated in
+one statement. The API then only runs for companies the snapshot did not
+cover (skip it with --no-api-fallback).
+
 Required env var:
   SAFER_WEB_KEY=your_key
 
 Example:
   python scripts/fetch_safer_data.py --limit 100
+  python scripts/fetch_safer_data.py --limit 100000 --concurrency 8 --rate 2
+  python scripts/fetch_safer_data.py --limit 100 --max-age 7d --debug
+  python scripts/fetch_safer_data.py --limit 1000000 --remap
+  python scripts/fetch_safer_data.py --snapshot /path/to/carrier_all_with_history.csv --limit 1000
 """
 
 import argparse
+import asyncio
+import csv
 import json
 import os
+import re
+import sqlite3
 import sys
 import time
-from typing import Any, Dict, Optional, Tuple
+import zlib
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 import httpx
+from sqlalchemy import select, update
 
 # Ensure app imports resolve when running from repo root or backend/
 CURRENT_DIR = os.path.dirname(__file__)
@@ -27,11 +58,19 @@ BACKEND_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, ".."))
 sys.path.insert(0, BACKEND_ROOT)
 
 from app.core.config import settings
-from app.db.database import SessionLocal
+from app.core.rate_limit import AdaptiveRateLimiter
+from app.db.database import SessionLocal, engine
 from app.db.models import Company
+from app.core.identifiers import normalize_mc
+from app.ingest.pipeline import CallableSink, Pipeline
+from app.ingest.postgres import StagingCopySink
 
 
 BASE_URL = "https://mobile.fmcsa.dot.gov/qc/services/carriers"
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+MAX_ATTEMPTS = 6
+DEFAULT_CACHE = os.path.join(BACKEND_ROOT, ".safer_cache.sqlite3")
+DEFAULT_MAX_AGE = "30d"
 
 CANDIDATE_KEYS = {
     "legalName",
@@ -75,32 +114,133 @@ def truncate_json(payload: Any, limit: int = 800) -> str:
     return text if len(text) <= limit else f"{text[:limit]}...<truncated>"
 
 
-def fetch_json(
-    client: httpx.Client,
+class ResponseCache:
+    """
+    Raw SAFER lookup payloads stored in SQLite, keyed by cleaned MC number.
+
+    Used only from the event loop thread, so one connection suffices.
+    """
+
+    def __init__(self, path: str, max_age: Optional[float]):
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "mc TEXT PRIMARY KEY, fetched_at REAL NOT NULL, payload BLOB NOT NULL)"
+        )
+        self.connection.commit()
+
+    def get(self, mc: str) -> Optional[Dict[str, Any]]:
+        """Return the cached payload if it is younger than max_age (None: any age)"""
+        row = self.connection.execute(
+            "SELECT fetched_at, payload FROM responses WHERE mc = ?", (mc,)
+        ).fetchone()
+        if row is None or (self.max_age is not None and time.time() - row[0] > self.max_age):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(zlib.decompress(row[1]))
+
+    def put(self, mc: str, payload: Dict[str, Any]) -> None:
+        blob = zlib.compress(json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+        self.connection.execute(
+            "INSERT OR REPLACE INTO responses (mc, fetched_at, payload) VALUES (?, ?, ?)",
+            (mc, time.time(), blob),
+        )
+        self.connection.commit()
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+def parse_age(value: str) -> float:
+    """Parse a duration such as 3600, 90s, 12h or 30d into seconds"""
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([smhd]?)\s*", value.lower())
+    if not match:
+        raise argparse.ArgumentTypeError(f"invalid age: {value!r} (use e.g. 3600, 12h, 30d)")
+    amount, unit = match.groups()
+    return float(amount) * {"": 1, "s": 1, "m": 60, "h": 3600, "d": 86400}[unit]
+
+
+class RetryableError(Exception):
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+async def fetch_json(
+    client: httpx.AsyncClient,
     url: str,
     api_key: str,
     *,
     debug: bool = False,
     label: str = "SAFER",
 ) -> Optional[Dict[str, Any]]:
+    """GET a SAFER URL; raises RetryableError on throttling, 5xx and transport errors"""
     try:
-        response = client.get(url, params={"webKey": api_key}, timeout=30)
-        if debug:
-            print(f"{label} status: {response.status_code} url: {response.url}")
-        if response.status_code == 200:
+        response = await client.get(url, params={"webKey": api_key}, timeout=30)
+    except httpx.TransportError as exc:
+        raise RetryableError(f"transport error: {exc}") from exc
+    if debug:
+        print(f"{label} status: {response.status_code} url: {response.url}")
+    if response.status_code in RETRYABLE_STATUS:
+        raise RetryableError(
+            f"HTTP {response.status_code}",
+            retry_after=parse_retry_after(response.headers.get("Retry-After")),
+        )
+    if response.status_code == 200:
+        try:
             payload = response.json()
+        except ValueError:
             if debug:
-                print(f"{label} response preview: {truncate_json(payload)}")
-            return payload
+                print(f"{label} invalid JSON: {response.text[:500]}")
+            return None
         if debug:
-            print(f"{label} non-200 response: {response.text[:500]}")
-        return None
-    except httpx.HTTPError as exc:
-        if debug:
-            print(f"{label} http error: {exc}")
-        return None
-    finally:
-        time.sleep(2)
+            print(f"{label} response preview: {truncate_json(payload)}")
+        return payload
+    if debug:
+        print(f"{label} non-200 response: {response.text[:500]}")
+    return None
+
+
+async def fetch_with_retry(
+    client: httpx.AsyncClient,
+    limiter: AdaptiveRateLimiter,
+    url: str,
+    api_key: str,
+    *,
+    debug: bool = False,
+    label: str = "SAFER",
+) -> Optional[Dict[str, Any]]:
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        await limiter.acquire()
+        try:
+            payload = await fetch_json(client, url, api_key, debug=debug, label=label)
+        except RetryableError as exc:
+            if attempt == MAX_ATTEMPTS:
+                print(f"{label} giving up after {attempt} attempts: {exc}")
+                return None
+            backoff = exc.retry_after if exc.retry_after is not None else min(2 ** attempt, 60)
+            if debug:
+                print(f"{label} {exc}; retrying in {backoff:.0f}s (attempt {attempt}/{MAX_ATTEMPTS})")
+            limiter.throttled(backoff)
+            continue
+        limiter.succeeded()
+        return payload
+    raise AssertionError("unreachable")
 
 
 def extract_carrier(payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
@@ -201,25 +341,40 @@ def map_fields(carrier: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
-def process_company(
-    client: httpx.Client,
+async def process_company(
+    client: httpx.AsyncClient,
+    limiter: AdaptiveRateLimiter,
     api_key: str,
-    company: Company,
+    company_id: int,
+    mc_number: Optional[int],
     *,
+    cache: Optional[ResponseCache] = None,
+    offline: bool = False,
     debug: bool = False,
-) -> Tuple[bool, str]:
-    mc_number = company.mc_number
+) -> Tuple[Optional[Dict[str, Any]], str]:
+    """Look up one company; returns the SAFER column values to save (or None) and a reason"""
     if not mc_number:
-        return False, "missing mc_number"
+        return None, "missing mc_number"
 
     mc_clean = str(mc_number).upper().replace("MC", "").lstrip("0") or "0"
-    lookup_url = f"{BASE_URL}/docket-number/{mc_clean}"
-    print(f"Fetching SAFER for company {company.id} MC {mc_number} (lookup: {lookup_url})")
-    payload = fetch_json(client, lookup_url, api_key, debug=debug, label="SAFER lookup")
-    if not payload:
-        return False, "lookup_failed"
+    payload = cache.get(mc_clean) if cache is not None else None
+    if payload is not None:
+        if debug:
+            print(f"Using cached SAFER lookup for company {company_id} MC {mc_number}")
+    elif offline:
+        return None, "not_cached"
+    else:
+        lookup_url = f"{BASE_URL}/docket-number/{mc_clean}"
+        if debug:
+            print(f"Fetching SAFER for company {company_id} MC {mc_number} (lookup: {lookup_url})")
+        payload = await fetch_with_retry(client, limiter, lookup_url, api_key, debug=debug, label="SAFER lookup")
+        if not payload:
+            return None, "lookup_failed"
+        if cache is not None:
+            cache.put(mc_clean, payload)
 
-    print(f"SAFER lookup response keys: {list(payload.keys())}")
+    if debug:
+        print(f"SAFER lookup response keys: {list(payload.keys())}")
     if debug and isinstance(payload.get("content"), list):
         print(f"SAFER lookup content count: {len(payload['content'])}")
         if payload["content"]:
@@ -234,59 +389,342 @@ def process_company(
 
     carrier = extract_carrier(payload)
     if not carrier:
-        company.safer_is_broker = 0
-        company.safer_active = 0
-        return True, "carrier_missing"
+        return {"safer_is_broker": 0, "safer_active": 0}, "carrier_missing"
     if debug:
         print(f"SAFER carrier keys: {list(carrier.keys())}")
         print(f"SAFER carrier preview: {truncate_json(carrier)}")
 
     mapped = map_fields(carrier)
-    print(f"Updating company {company.id} with SAFER fields: {mapped}")
+    if debug:
+        print(f"Updating company {company_id} with SAFER fields: {mapped}")
     if debug and all(value is None for value in mapped.values()):
         print("Mapped SAFER fields are empty; carrier payload may use unexpected keys.")
     if mapped.get("safer_is_broker") is None and mapped.get("safer_active") is None:
-        return False, "missing_safer_status"
-    for key, value in mapped.items():
-        setattr(company, key, value)
+        return None, "missing_safer_status"
+
+    return mapped, "updated"
+
+
+def iter_candidates(
+    start_id: int,
+    limit: int,
+    batch_size: int,
+    only_missing: bool = True,
+) -> Iterator[Tuple[int, Optional[int]]]:
+    """
+    Yield (id, mc_number) pairs from a server-side cursor.
+
+    Candidates are companies missing safer_is_broker, or every company with
+    an MC number when `only_missing` is false. Only about one `yield_per`
+    batch is held in memory at a time.
+    """
+    session = SessionLocal()
+    try:
+        statement = (
+            select(Company.id, Company.mc_number)
+            .where(
+                Company.safer_is_broker.is_(None) if only_missing else Company.mc_number.isnot(None),
+                Company.id >= start_id,
+            )
+            .order_by(Company.id)
+            .limit(limit)
+            .execution_options(yield_per=batch_size)
+        )
+        for company_id, mc_number in session.execute(statement):
+            yield company_id, mc_number
+    finally:
+        session.close()
+
 
-    return True, "updated"
+def save_results(rows: List[Dict[str, Any]]) -> Dict[str, int]:
+    """Apply a batch of SAFER updates by primary key in one transaction"""
+    session = SessionLocal()
+    try:
+        session.execute(update(Company), rows)
+        session.commit()
+    finally:
+        session.close()
+    return {"updated": len(rows)}
+
+
+async def enrich(
+    args: argparse.Namespace, api_key: str, cache: Optional[ResponseCache] = None
+) -> Tuple[int, int]:
+    limiter = AdaptiveRateLimiter(rate=args.rate, burst=args.concurrency)
+
+    async with httpx.AsyncClient(
+        headers={"Accept": "application/json", "User-Agent": "FMCSA-Python-Client/1.0"},
+        limits=httpx.Limits(max_connections=args.concurrency),
+    ) as client:
+
+        async def lookup(candidate: Tuple[int, Optional[int]]) -> Optional[Dict[str, Any]]:
+            company_id, mc_number = candidate
+            values, reason = await process_company(
+                client,
+                limiter,
+                api_key,
+                company_id,
+                mc_number,
+                cache=cache,
+                offline=args.offline,
+                debug=args.debug,
+            )
+            if values is None:
+                print(f"Skipped company {company_id}: {reason}")
+                return None
+            return {"id": company_id, **values}
+
+        pipeline = Pipeline(
+            name="safer_enrichment",
+            source=iter_candidates(args.start_id, args.limit, args.batch_size, not args.remap),
+            normalize=lookup,
+            normalize_concurrency=args.concurrency,
+            sink=CallableSink(save_results),
+            batch_size=args.batch_size,
+            chunk_size=1,
+            dry_run=args.dry_run,
+            expected_items=args.limit,
+        )
+        result = await pipeline.run()
+
+    normalize = result.stage("normalize")
+    return normalize.items_out, normalize.dropped
+
+
+# Snapshot header alternatives per field, across the census and authority extracts
+SNAPSHOT_COLUMNS = {
+    "mc_number": ("DOCKET_NUMBER", "MC_NUMBER", "MC_MX_FF_NUMBER"),
+    "safer_name": ("LEGAL_NAME",),
+    "safer_dba_name": ("DBA_NAME",),
+    "safer_address": ("BUS_STREET_PO", "PHY_STREET"),
+    "safer_city": ("BUS_CITY", "PHY_CITY"),
+    "safer_state": ("BUS_STATE_CODE", "PHY_STATE"),
+    "safer_zip": ("BUS_ZIP_CODE", "PHY_ZIP"),
+}
+AUTHORITY_STATUS_COLUMNS = ("COMMON_STAT", "CONTRACT_STAT", "BROKER_STAT")
+SNAPSHOT_TEXT_LIMITS = {
+    "safer_name": 255,
+    "safer_dba_name": 255,
+    "safer_address": 255,
+    "safer_city": 100,
+    "safer_state": 20,
+    "safer_zip": 20,
+}
+SNAPSHOT_STAGING_COLUMNS = (
+    "line_no",
+    "mc_number",
+    "safer_name",
+    "safer_dba_name",
+    "safer_address",
+    "safer_city",
+    "safer_state",
+    "safer_zip",
+    "safer_active",
+    "safer_is_broker",
+)
+SNAPSHOT_STAGING_DDL = """
+    line_no BIGINT NOT NULL,
+    mc_number INTEGER NOT NULL,
+    safer_name VARCHAR(255),
+    safer_dba_name VARCHAR(255),
+    safer_address VARCHAR(255),
+    safer_city VARCHAR(100),
+    safer_state VARCHAR(20),
+    safer_zip VARCHAR(20),
+    safer_active SMALLINT,
+    safer_is_broker SMALLINT
+"""
+
+# Latest snapshot row per MC; missing values keep what the company has.
+# Companies whose SAFER fields would not change are not written.
+SNAPSHOT_SOURCE_SQL = """
+    SELECT
+        c.id,
+        COALESCE(s.safer_name, c.safer_name) AS safer_name,
+        COALESCE(s.safer_dba_name, c.safer_dba_name) AS safer_dba_name,
+        COALESCE(s.safer_address, c.safer_address) AS safer_address,
+        COALESCE(s.safer_city, c.safer_city) AS safer_city,
+        COALESCE(s.safer_state, c.safer_state) AS safer_state,
+        COALESCE(s.safer_zip, c.safer_zip) AS safer_zip,
+        COALESCE(s.safer_active, c.safer_active) AS safer_active,
+        COALESCE(s.safer_is_broker, c.safer_is_broker) AS safer_is_broker,
+        (c.safer_name, c.safer_dba_name, c.safer_address, c.safer_city, c.safer_state,
+         c.safer_zip, c.safer_active, c.safer_is_broker)
+        IS DISTINCT FROM
+        (COALESCE(s.safer_name, c.safer_name), COALESCE(s.safer_dba_name, c.safer_dba_name),
+         COALESCE(s.safer_address, c.safer_address), COALESCE(s.safer_city, c.safer_city),
+         COALESCE(s.safer_state, c.safer_state), COALESCE(s.safer_zip, c.safer_zip),
+         COALESCE(s.safer_active, c.safer_active), COALESCE(s.safer_is_broker, c.safer_is_broker))
+        AS changed
+    FROM (
+        SELECT DISTINCT ON (mc_number) *
+        FROM {staging}
+        ORDER BY mc_number, line_no DESC
+    ) s
+    JOIN companies c ON c.mc_number = s.mc_number
+"""
+
+SNAPSHOT_APPLY_SQL = """
+    WITH src AS ({source}),
+    applied AS (
+        UPDATE companies c SET
+            safer_name = src.safer_name,
+            safer_dba_name = src.safer_dba_name,
+            safer_address = src.safer_address,
+            safer_city = src.safer_city,
+            safer_state = src.safer_state,
+            safer_zip = src.safer_zip,
+            safer_active = src.safer_active,
+            safer_is_broker = src.safer_is_broker,
+            updated_at = now()
+        FROM src
+        WHERE c.id = src.id AND src.changed
+        RETURNING c.id
+    )
+    SELECT (SELECT COUNT(*) FROM src), (SELECT COUNT(*) FROM applied)
+"""
+
+SNAPSHOT_DRY_RUN_SQL = """
+    WITH src AS ({source})
+    SELECT COUNT(*), COUNT(*) FILTER (WHERE changed) FROM src
+"""
+
+
+def _snapshot_value(row: Dict[str, str], names: Tuple[str, ...]) -> Optional[str]:
+    for name in names:
+        value = (row.get(name) or "").strip()
+        if value:
+            return value
+    return None
+
+
+def snapshot_row(item: Tuple[int, Dict[str, str]]) -> Optional[tuple]:
+    """Map one snapshot row to a staging tuple in SNAPSHOT_STAGING_COLUMNS order"""
+    line_no, row = item
+    mc_number = normalize_mc(_snapshot_value(row, SNAPSHOT_COLUMNS["mc_number"]))
+    if mc_number is None:
+        return None
+    values = []
+    for column in SNAPSHOT_STAGING_COLUMNS[2:8]:
+        value = _snapshot_value(row, SNAPSHOT_COLUMNS[column])
+        values.append(value[: SNAPSHOT_TEXT_LIMITS[column]] if value is not None else None)
+
+    # Authority status codes: A = active, I = inactive, N = none
+    statuses = {name: (row.get(name) or "").strip().upper() for name in AUTHORITY_STATUS_COLUMNS if name in row}
+    safer_active = int(any(status == "A" for status in statuses.values())) if statuses else None
+    safer_is_broker = int(statuses["BROKER_STAT"] == "A") if "BROKER_STAT" in statuses else None
+    return (line_no, mc_number, *values, safer_active, safer_is_broker)
+
+
+def iter_snapshot_rows(path: str) -> Iterator[Tuple[int, Dict[str, str]]]:
+    """Yield (line number, row) pairs with upper-cased headers"""
+    with open(path, newline="", encoding="utf-8") as handle:
+        reader = csv.reader(handle)
+        header = [name.strip().upper() for name in next(reader, [])]
+        for idx, values in enumerate(reader, start=1):
+            yield idx, dict(zip(header, values))
+
+
+class SnapshotSink(StagingCopySink):
+    """Apply staged snapshot rows to every company with a matching MC number"""
+
+    def __init__(self):
+        super().__init__(engine, "safer_snapshot", SNAPSHOT_STAGING_DDL, SNAPSHOT_STAGING_COLUMNS)
+
+    def apply(self, cursor) -> Dict[str, int]:
+        cursor.execute(f"ANALYZE {self.staging}")
+        source = SNAPSHOT_SOURCE_SQL.format(staging=self.staging)
+        if self.dry_run:
+            cursor.execute(SNAPSHOT_DRY_RUN_SQL.format(source=source))
+        else:
+            cursor.execute(SNAPSHOT_APPLY_SQL.format(source=source))
+        matched, updated = cursor.fetchone()
+        return {"matched": matched, "updated": updated}
+
+
+def apply_snapshot(path: str, dry_run: bool = False) -> Dict[str, int]:
+    pipeline = Pipeline(
+        name="safer_snapshot",
+        source=iter_snapshot_rows(path),
+        normalize=snapshot_row,
+        sink=SnapshotSink(),
+        batch_size=5000,
+        chunk_size=2000,
+        dry_run=dry_run,
+    )
+    result = asyncio.run(pipeline.run())
+    counts = dict(result.counters)
+    counts["rows"] = result.stage("source").items_out
+    counts["without_mc"] = result.stage("normalize").dropped
+    return counts
 
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="Populate SAFER fields for companies.")
     parser.add_argument("--limit", type=int, default=100, help="Max rows to process.")
+    parser.add_argument("--concurrency", type=int, default=4, help="Lookups in flight at once.")
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=settings.SAFER_REQUESTS_PER_SECOND,
+        help="Maximum SAFER requests per second (default: SAFER_REQUESTS_PER_SECOND).",
+    )
+    parser.add_argument("--batch-size", type=int, default=200, help="Updates per commit.")
+    parser.add_argument("--start-id", type=int, default=0, help="Skip companies with a lower id.")
     parser.add_argument("--debug", action="store_true", help="Log SAFER responses.")
+    parser.add_argument("--dry-run", action="store_true", help="Look up and map without saving.")
+    parser.add_argument("--cache", default=DEFAULT_CACHE, help="SQLite response cache path.")
+    parser.add_argument("--no-cache", action="store_true", help="Neither read nor write the cache.")
+    parser.add_argument(
+        "--max-age",
+        type=parse_age,
+        default=parse_age(DEFAULT_MAX_AGE),
+        help=f"Refetch cached responses older than this, e.g. 12h or 7d (default: {DEFAULT_MAX_AGE}).",
+    )
+    parser.add_argument("--offline", action="store_true", help="Use cached responses only; skip misses.")
+    parser.add_argument(
+        "--remap",
+        action="store_true",
+        help="Re-apply cached responses to all companies with an MC number (implies --offline, any age).",
+    )
+    parser.add_argument("--snapshot", default=None, help="FMCSA census/authority CSV to apply in bulk.")
+    parser.add_argument(
+        "--no-api-fallback",
+        action="store_true",
+        help="With --snapshot, skip API lookups for companies the snapshot did not cover.",
+    )
     args = parser.parse_args()
 
+    if args.snapshot:
+        counts = apply_snapshot(args.snapshot, dry_run=args.dry_run)
+        print(
+            f"Snapshot rows: {counts['rows']} (without MC: {counts['without_mc']}), "
+            f"Matched companies: {counts.get('matched', 0)}, Updated: {counts.get('updated', 0)}"
+        )
+        if args.no_api_fallback or args.dry_run:
+            return
+        if not settings.SAFER_WEB_KEY and not args.offline:
+            print("SAFER_WEB_KEY not set; skipping API fallback for companies missing from the snapshot.")
+            return
+        print("Looking up companies missing from the snapshot via the API...")
+
+    if args.remap:
+        args.offline = True
+        args.max_age = None
+    if args.offline and args.no_cache:
+        raise SystemExit("--offline and --remap need the cache; drop --no-cache.")
+
     api_key = settings.SAFER_WEB_KEY
-    if not api_key:
+    if not api_key and not args.offline:
         raise SystemExit("SAFER_WEB_KEY is required (env var or .env).")
 
-    session = SessionLocal()
-    updated = 0
-    skipped = 0
+    cache = None if args.no_cache else ResponseCache(args.cache, args.max_age)
     try:
-        companies = (
-            session.query(Company)
-            .filter(Company.safer_is_broker.is_(None))
-            .limit(args.limit)
-            .all()
-        )
-
-        with httpx.Client(headers={"Accept": "application/json", "User-Agent": "FMCSA-Python-Client/1.0"}) as client:
-            for company in companies:
-                ok, reason = process_company(client, api_key, company, debug=args.debug)
-                if ok:
-                    updated += 1
-                else:
-                    skipped += 1
-                    print(f"Skipped company {company.id}: {reason}")
-
-        session.commit()
+        updated, skipped = asyncio.run(enrich(args, api_key, cache))
     finally:
-        session.close()
-
+        if cache is not None:
+            print(f"Cache hits: {cache.hits}, misses: {cache.misses}")
+            cache.close()
     print(f"Updated: {updated}, Skipped: {skipped}")
 
 
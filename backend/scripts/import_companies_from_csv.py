@@ -6,6 +6,8 @@ Execution:
   python scripts/import_companies_from_csv.py --csv /path/to/file.csv
   python scripts/import_companies_from_csv.py --csv /path/to/file.csv --limit 100
   python scripts/import_companies_from_csv.py --csv /path/to/file.csv --dry-run
+  python scripts/import_companies_from_csv.py --csv /path/to/file.csv --workers 8
+  python scripts/import_companies_from_csv.py --csv /path/to/file.csv --mode orm
 
 CSV source file
     	 https://data.transportation.gov/Trucking-and-Motorcoaches/Carrier-All-With-History/6eyk-hxee/explore/query/SELECT%0A%20%20%60docket_number%60%2C%0A%20%20%60dot_number%60%2C%0A%20%20%60mx_type%60%2C%0A%20%20%60rfc_number%60%2C%0A%20%20%60common_stat%60%2C%0A%20%20%60contract_stat%60%2C%0A%20%20%60broker_stat%60%2C%0A%20%20%60common_app_pend%60%2C%0A%20%20%60contract_app_pend%60%2C%0A%20%20%60broker_app_pend%60%2C%0A%20%20%60common_rev_pend%60%2C%0A%20%20%60contract_rev_pend%60%2C%0A%20%20%60broker_rev_pend%60%2C%0A%20%20%60property_chk%60%2C%0A%20%20%60passenger_chk%60%2C%0A%20%20%60hhg_chk%60%2C%0A%20%20%60private_auth_chk%60%2C%0A%20%20%60enterprise_chk%60%2C%0A%20%20%60min_cov_amount%60%2C%0A%20%20%60cargo_req%60%2C%0A%20%20%60bond_req%60%2C%0A%20%20%60bipd_file%60%2C%0A%20%20%60cargo_file%60%2C%0A%20%20%60bond_file%60%2C%0A%20%20%60undeliverable_mail%60%2C%0A%20%20%60dba_name%60%2C%0A%20%20%60legal_name%60%2C%0A%20%20%60bus_street_po%60%2C%0A%20%20%60bus_colonia%60%2C%0A%20%20%60bus_city%60%2C%0A%20%20%60bus_state_code%60%2C%0A%20%20%60bus_ctry_code%60%2C%0A%20%20%60bus_zip_code%60%2C%0A%20%20%60bus_telno%60%2C%0A%20%20%60bus_fax%60%2C%0A%20%20%60mail_street_po%60%2C%0A%20%20%60mail_colonia%60%2C%0A%20%20%60mail_city%60%2C%0A%20%20%60mail_state_code%60%2C%0A%20%20%60mail_ctry_code%60%2C%0A%20%20%60mail_zip_code%60%2C%0A%20%20%60mail_telno%60%2C%0A%20%20%60mail_fax%60%0AWHERE%0A%20%20caseless_contains%28%60broker_stat%60%2C%20%22A%22%29%0A%20%20AND%20caseless_ne%28%60broker_app_pend%60%2C%20%22Y%22%29%0A%20%20AND%20caseless_ne%28%60broker_rev_pend%60%2C%20%22Y%22%29/page/filter
@@ -18,49 +20,137 @@ Rules:
   - Require both MC (DOCKET_NUMBER) and DOT_NUMBER to be present.
   - Update existing company only when both MC and DOT match.
   - Insert new company when both MC and DOT are present but no match exists.
+
+Modes:
+  copy (default) streams normalized rows with COPY into an unlogged
+    staging table, then merges them into companies with a single
+    INSERT ... ON CONFLICT DO UPDATE. When a file repeats an MC, one row
+    per MC is merged, and Updated counts companies rather than CSV rows.
+    --dry-run stages the rows and computes the same counts without
+    touching companies. With --workers N, the file is split into byte
+    ranges on line boundaries that N processes parse and normalize while
+    the main process streams their batches, in file order, into COPY.
+    The run is an app.ingest pipeline: CSV rows -> staging_row() -> COPY sink.
+  orm matches and writes row by row through the ORM.
 """
 
 import argparse
+import asyncio
 import csv
+import io
 import os
 import sys
-from typing import Dict, Optional, Tuple
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
 
 # Ensure app imports resolve when running from repo root or backend/
 CURRENT_DIR = os.path.dirname(__file__)
 BACKEND_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, ".."))
 sys.path.insert(0, BACKEND_ROOT)
 
-from app.db.database import SessionLocal
+from app.core.identifiers import normalize_dot, normalize_mc
+from app.db.database import SessionLocal, engine
 from app.db.models import Company
+from app.ingest.pipeline import Pipeline
+from app.ingest.postgres import StagingCopySink
 
+DEFAULT_CHUNK_MB = 16
+# Chunks are far below 2**32 rows, so chunk-based line numbers never collide
+CHUNK_LINE_STRIDE = 2 ** 32
 
-def normalize_mc(value: Optional[str]) -> Optional[int]:
-    if value is None:
-        return None
-    text = str(value).strip()
-    if not text:
-        return None
-    upper = text.upper()
-    if upper.startswith("MC"):
-        text = text[2:].strip()
-    text = text.lstrip("0")
-    if not text:
-        return None
-    if not text.isdigit():
-        return None
-    return int(text)
+STAGING_COLUMNS = (
+    "line_no",
+    "mc_number",
+    "dot_number",
+    "name",
+    "safer_name",
+    "safer_dba_name",
+    "safer_address",
+    "safer_city",
+    "safer_state",
+    "safer_zip",
+)
 
+STAGING_DDL = """
+    line_no BIGINT NOT NULL,
+    mc_number INTEGER NOT NULL,
+    dot_number INTEGER NOT NULL,
+    name VARCHAR(255) NOT NULL,
+    safer_name VARCHAR(255),
+    safer_dba_name VARCHAR(255),
+    safer_address VARCHAR(255),
+    safer_city VARCHAR(100),
+    safer_state VARCHAR(20),
+    safer_zip VARCHAR(20)
+"""
 
-def normalize_dot(value: Optional[str]) -> Optional[int]:
-    if value is None:
-        return None
-    text = str(value).strip()
-    if not text:
-        return None
-    if not text.isdigit():
-        return None
-    return int(text)
+# Text columns are truncated to the companies column sizes before COPY
+TEXT_LIMITS = {
+    "name": 255,
+    "safer_name": 255,
+    "safer_dba_name": 255,
+    "safer_address": 255,
+    "safer_city": 100,
+    "safer_state": 20,
+    "safer_zip": 20,
+}
+
+# One row per MC: the last row for each (MC, DOT) pair, preferring the DOT
+# that matches an existing company, otherwise the earliest pair in the file.
+MERGE_SOURCE_SQL = """
+    SELECT DISTINCT ON (s.mc_number) s.*
+    FROM (
+        SELECT DISTINCT ON (mc_number, dot_number) *
+        FROM {staging}
+        ORDER BY mc_number, dot_number, line_no DESC
+    ) s
+    LEFT JOIN companies c ON c.mc_number = s.mc_number
+    ORDER BY s.mc_number, (c.dot_number = s.dot_number) DESC NULLS LAST, s.line_no
+"""
+
+MERGE_SQL = """
+    WITH src AS ({source}),
+    merged AS (
+        INSERT INTO companies (
+            user_id, name, mc_number, dot_number,
+            safer_name, safer_dba_name, safer_address, safer_city, safer_state, safer_zip,
+            safer_active, safer_is_broker, status
+        )
+        SELECT
+            1, name, mc_number, dot_number,
+            safer_name, safer_dba_name, safer_address, safer_city, safer_state, safer_zip,
+            1, 1, NULL
+        FROM src
+        ON CONFLICT (mc_number) DO UPDATE SET
+            name = EXCLUDED.name,
+            safer_name = COALESCE(EXCLUDED.safer_name, companies.safer_name),
+            safer_dba_name = COALESCE(EXCLUDED.safer_dba_name, companies.safer_dba_name),
+            safer_address = COALESCE(EXCLUDED.safer_address, companies.safer_address),
+            safer_city = COALESCE(EXCLUDED.safer_city, companies.safer_city),
+            safer_state = COALESCE(EXCLUDED.safer_state, companies.safer_state),
+            safer_zip = COALESCE(EXCLUDED.safer_zip, companies.safer_zip),
+            safer_active = EXCLUDED.safer_active,
+            safer_is_broker = EXCLUDED.safer_is_broker,
+            updated_at = now()
+        WHERE companies.dot_number = EXCLUDED.dot_number
+        RETURNING (xmax = 0) AS inserted
+    )
+    SELECT
+        COUNT(*) FILTER (WHERE inserted),
+        COUNT(*) FILTER (WHERE NOT inserted)
+    FROM merged
+"""
+
+DRY_RUN_SQL = """
+    WITH src AS ({source})
+    SELECT
+        COUNT(*) FILTER (WHERE c.id IS NULL),
+        COUNT(*) FILTER (WHERE c.dot_number = src.dot_number)
+    FROM src
+    LEFT JOIN companies c ON c.mc_number = src.mc_number
+"""
 
 
 def extract_row_fields(row: Dict[str, str]) -> Tuple[Optional[int], Optional[int], str, Dict[str, str]]:
@@ -87,6 +177,7 @@ def upsert_from_csv(csv_path: str, limit: Optional[int] = None, dry_run: bool =
     updated = 0
     skipped = 0
 
+    pending: Dict[int, Company] = {}
     session = SessionLocal()
     try:
         with open(csv_path, newline="", encoding="utf-8") as handle:
@@ -105,11 +196,14 @@ def upsert_from_csv(csv_path: str, limit: Optional[int] = None, dry_run: bool =
                     skipped += 1
                     continue
 
-                company = (
-                    session.query(Company)
-                    .filter(Company.mc_number == mc_number, Company.dot_number == dot_number)
-                    .first()
+                # mc_number is unique, so look up by MC alone and require the DOT to agree.
+                # Rows inserted earlier in this run may not be flushed yet.
+                company = pending.get(mc_number) or (
+                    session.query(Company).filter(Company.mc_number == mc_number).first()
                 )
+                if company and company.dot_number != dot_number:
+                    skipped += 1
+                    continue
 
                 if company:
                     if name:
@@ -135,10 +229,12 @@ def upsert_from_csv(csv_path: str, limit: Optional[int] = None, dry_run: bool =
                         status=None,
                     )
                     session.add(company)
+                    pending[mc_number] = company
                     inserted += 1
                 if not dry_run and idx % 1000 == 0:
                     session.commit()
                     session.expunge_all()
+                    pending.clear()
 
         if dry_run:
             session.rollback()
@@ -150,14 +246,190 @@ def upsert_from_csv(csv_path: str, limit: Optional[int] = None, dry_run: bool =
     return inserted, updated, skipped
 
 
+def staging_row(line_no: int, row: Dict[str, str]) -> Optional[tuple]:
+    """Map one CSV row to a COPY tuple in STAGING_COLUMNS order, or None if it lacks an MC or DOT"""
+    mc_number, dot_number, name, safer_fields = extract_row_fields(row)
+    if mc_number is None or dot_number is None:
+        return None
+    return (line_no, mc_number, dot_number) + tuple(
+        _truncate(column, name if column == "name" else safer_fields[column])
+        for column in STAGING_COLUMNS[3:]
+    )
+
+
+def iter_csv_rows(csv_path: str, limit: Optional[int] = None) -> Iterator[Tuple[int, Dict[str, str]]]:
+    """Yield (line number, row) pairs from the CSV"""
+    with open(csv_path, newline="", encoding="utf-8") as handle:
+        reader = csv.DictReader(handle)
+        for idx, row in enumerate(reader, start=1):
+            if limit is not None and idx > limit:
+                break
+            yield idx, row
+
+
+def normalize_csv_row(item: Tuple[int, Dict[str, str]]) -> Optional[tuple]:
+    return staging_row(*item)
+
+
+def chunk_ranges(csv_path: str, chunk_bytes: int) -> Tuple[List[str], List[Tuple[int, int]]]:
+    """
+    Read the header and split the rest of the file into byte ranges.
+
+    Every range ends just after a newline, so no record is split as long as
+    quoted fields do not contain line breaks (true for the FMCSA extracts).
+    """
+    size = os.path.getsize(csv_path)
+    with open(csv_path, "rb") as handle:
+        header_line = handle.readline()
+        header = next(csv.reader([header_line.decode("utf-8")]))
+        ranges = []
+        start = handle.tell()
+        while start < size:
+            handle.seek(min(start + chunk_bytes, size))
+            handle.readline()
+            end = min(handle.tell(), size)
+            ranges.append((start, end))
+            start = end
+    return header, ranges
+
+
+def parse_chunk(csv_path: str, header: List[str], chunk_index: int, start: int, end: int) -> List[Optional[tuple]]:
+    """
+    Parse and normalize one byte range in a worker process.
+
+    Line numbers are `chunk_index * CHUNK_LINE_STRIDE + row`, which keeps
+    them increasing in file order without knowing earlier chunks' row counts.
+    """
+    with open(csv_path, "rb") as handle:
+        handle.seek(start)
+        text = handle.read(end - start).decode("utf-8")
+    reader = csv.DictReader(io.StringIO(text, newline=""), fieldnames=header)
+    base = chunk_index * CHUNK_LINE_STRIDE
+    return [staging_row(base + idx, row) for idx, row in enumerate(reader, start=1)]
+
+
+def iter_staging_rows_parallel(
+    csv_path: str,
+    workers: int,
+    chunk_bytes: int = DEFAULT_CHUNK_MB * 1024 * 1024,
+    limit: Optional[int] = None,
+) -> Iterator[Optional[tuple]]:
+    """
+    Yield staging_row() results for the whole file, parsing chunks in a process pool.
+
+    Batches are yielded in file order. At most `workers * 2` chunks are in
+    flight, so memory stays bounded by the chunk size, not the file size.
+    """
+    header, ranges = chunk_ranges(csv_path, chunk_bytes)
+    pending: Deque[Future] = deque()
+    remaining = limit
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        chunks = iter(enumerate(ranges))
+        for chunk_index, (start, end) in islice(chunks, workers * 2):
+            pending.append(pool.submit(parse_chunk, csv_path, header, chunk_index, start, end))
+        while pending:
+            batch = pending.popleft().result()
+            for chunk_index, (start, end) in islice(chunks, 1):
+                pending.append(pool.submit(parse_chunk, csv_path, header, chunk_index, start, end))
+            if remaining is not None:
+                batch = batch[:remaining]
+                remaining -= len(batch)
+            yield from batch
+            if remaining == 0:
+                for future in pending:
+                    future.cancel()
+                return
+
+
+def _truncate(column: str, value: Optional[str]) -> Optional[str]:
+    if value is None:
+        return None
+    return value[: TEXT_LIMITS[column]]
+
+
+class CopyMergeSink(StagingCopySink):
+    """
+    Merge staged CSV rows into companies.
+
+    In dry-run mode the merge counts are computed without touching companies.
+    """
+
+    def __init__(self):
+        super().__init__(engine, "companies_import", STAGING_DDL, STAGING_COLUMNS)
+
+    def apply(self, cursor) -> Dict[str, int]:
+        print("Rows staged; merging...")
+        source = MERGE_SOURCE_SQL.format(staging=self.staging)
+        if self.dry_run:
+            cursor.execute(DRY_RUN_SQL.format(source=source))
+        else:
+            cursor.execute(MERGE_SQL.format(source=source))
+        inserted, updated = cursor.fetchone()
+        return {"inserted": inserted, "updated": updated}
+
+
+def copy_import(args: argparse.Namespace) -> Tuple[int, int, int]:
+    """
+    Run the COPY import as an ingestion pipeline.
+
+    Returns (inserted, updated, skipped); skipped covers invalid rows,
+    repeated MCs collapsed before the merge, and MCs whose DOT disagrees
+    with the existing company.
+    """
+    if args.workers > 1:
+        # Workers already normalize; invalid rows arrive as None and are dropped
+        source = iter_staging_rows_parallel(
+            args.csv, args.workers, chunk_bytes=args.chunk_mb * 1024 * 1024, limit=args.limit
+        )
+        normalize = None
+    else:
+        source = iter_csv_rows(args.csv, limit=args.limit)
+        normalize = normalize_csv_row
+
+    pipeline = Pipeline(
+        name="companies_csv",
+        source=source,
+        normalize=normalize,
+        sink=CopyMergeSink(),
+        batch_size=5000,
+        chunk_size=2000,
+        dry_run=args.dry_run,
+    )
+    result = asyncio.run(pipeline.run())
+    inserted = result.counters["inserted"]
+    updated = result.counters["updated"]
+    return inserted, updated, result.stage("source").items_out - inserted - updated
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="Import companies from CSV.")
     parser.add_argument("--csv", required=True, help="Path to CSV file.")
     parser.add_argument("--limit", type=int, default=None, help="Max rows to process.")
     parser.add_argument("--dry-run", action="store_true", help="Parse and report without saving.")
+    parser.add_argument(
+        "--mode",
+        choices=("copy", "orm"),
+        default="copy",
+        help="copy: COPY into staging + set-based merge (default); orm: row-by-row.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Processes parsing the CSV in copy mode (default: 1, parse inline).",
+    )
+    parser.add_argument(
+        "--chunk-mb",
+        type=int,
+        default=DEFAULT_CHUNK_MB,
+        help="Size of the byte ranges handed to each worker.",
+    )
     args = parser.parse_args()
 
-    inserted, updated, skipped = upsert_from_csv(args.csv, limit=args.limit, dry_run=args.dry_run)
+    if args.mode == "copy":
+        inserted, updated, skipped = copy_import(args)
+    else:
+        inserted, updated, skipped = upsert_from_csv(args.csv, limit=args.limit, dry_run=args.dry_run)
     print(f"Inserted: {inserted}, Updated: {updated}, Skipped: {skipped}")
 
 
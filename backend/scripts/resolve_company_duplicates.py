@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Find and merge duplicate companies across import sources.
+
+Companies arrive from the CSV import (MC + DOT), FactorsNetwork (uuid +
+MC) and SAFER enrichment, so the same carrier can end up in several rows.
+This job groups live companies by blocking keys - DOT number and a hash of
+the normalized name - and only compares rows that share a block, which
+keeps the work roughly linear in the number of companies. MC numbers and
+FactorsNetwork uuids are unique per company, so they never form a block;
+they only guard against bad links.
+
+Rows are linked with union-find. A link is refused when it would put
+conflicting MC numbers, DOT numbers, FactorsNetwork uuids or states into
+one cluster, so a chain of weak matches cannot join two different carriers.
+Blocks larger than --max-block (e.g. thousands of "ABC TRUCKING") are
+skipped and reported.
+
+A cluster whose members are all joined by DOT matches has "identifier"
+confidence. One that needs a name match to hold together has "name"
+confidence: the same name with no conflicting identifiers, often because
+one side has none. Both are reported, with matched_on and confidence, but
+--apply only merges name clusters with --include-name-matches, after the
+report has been reviewed.
+
+Each cluster keeps one canonical row: the one with a FactorsNetwork uuid,
+then the most populated, then the oldest. By default the job only writes a
+CSV report of the proposed merges. With --apply, each duplicate:
+  - is copied to company_merges (matched_on + full JSON row) for provenance
+  - gives its identifiers and any fields the canonical row lacks to the
+    canonical row
+  - is soft-deleted with merged_into_id pointing at the canonical row
+Rows previously merged into a duplicate are repointed to the canonical row.
+Credit checks reference companies by MC number, so they follow the MC to
+the canonical row.
+
+Execution:
+  python scripts/resolve_company_duplicates.py --report duplicates.csv
+  python scripts/resolve_company_duplicates.py --report duplicates.csv --apply
+  python scripts/resolve_company_duplicates.py --report duplicates.csv --apply --include-name-matches
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import re
+import sys
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from sqlalchemy import select, update
+
+# Ensure app imports resolve when running from repo root or backend/
+CURRENT_DIR = os.path.dirname(__file__)
+BACKEND_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, ".."))
+sys.path.insert(0, BACKEND_ROOT)
+
+from app.db.database import SessionLocal
+from app.db.models import Company, CompanyMerge
+
+# Two rows may only share a cluster when these agree (or one side is empty)
+IDENTITY_FIELDS = ("mc_number", "dot_number", "factor_network_uuid", "safer_state")
+
+# Blocking keys that match on an identifier rather than the name
+IDENTIFIER_KINDS = {"dot"}
+
+# Copied from duplicates when the canonical row has no value
+FILL_FIELDS = (
+    "legal_name",
+    "search_text",
+    "mc_number",
+    "dot_number",
+    "factor_network_uuid",
+    "safer_name",
+    "safer_dba_name",
+    "safer_address",
+    "safer_city",
+    "safer_zip",
+    "safer_state",
+    "safer_active",
+    "safer_is_broker",
+    "status",
+)
+
+NAME_SUFFIXES = {
+    "INC", "INCORPORATED", "LLC", "LC", "LTD", "LIMITED", "CO", "COMPANY",
+    "CORP", "CORPORATION", "LP", "LLP", "PLLC", "THE",
+}
+# Placeholder names importers use when a source has none
+IGNORED_NAMES = {"", "UNKNOWN", "NA", "NONE"}
+
+COLUMNS = ("id", "user_id", "name") + FILL_FIELDS + ("created_at",)
+
+
+def name_key(name: Optional[str]) -> Optional[str]:
+    """Hash of the upper-cased name without punctuation or legal-form suffixes"""
+    words = re.sub(r"[^A-Z0-9 ]+", " ", (name or "").upper()).split()
+    words = [word for word in words if word not in NAME_SUFFIXES]
+    normalized = " ".join(words)
+    if normalized in IGNORED_NAMES:
+        return None
+    return hashlib.md5(normalized.encode("utf-8")).hexdigest()
+
+
+class Clusters:
+    """Union-find that refuses merges with conflicting identity fields"""
+
+    def __init__(self, rows: Dict[int, Dict[str, Any]]):
+        self.parent = {company_id: company_id for company_id in rows}
+        self.identity = {
+            company_id: {field: row[field] for field in IDENTITY_FIELDS if row[field] is not None}
+            for company_id, row in rows.items()
+        }
+        self.reasons: Dict[int, Set[str]] = defaultdict(set)
+        self.links: List[Tuple[int, int, str]] = []
+
+    def find(self, company_id: int) -> int:
+        root = company_id
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[company_id] != root:
+            self.parent[company_id], company_id = root, self.parent[company_id]
+        return root
+
+    def union(self, a: int, b: int, reason: str) -> bool:
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            self.reasons[root_a].add(reason)
+            self.links.append((a, b, reason))
+            return True
+        identity_a, identity_b = self.identity[root_a], self.identity[root_b]
+        for field, value in identity_b.items():
+            if identity_a.get(field, value) != value:
+                return False
+        if root_b < root_a:
+            root_a, root_b = root_b, root_a
+            identity_a, identity_b = identity_b, identity_a
+        self.parent[root_b] = root_a
+        identity_a.update(identity_b)
+        self.reasons[root_a] |= self.reasons.pop(root_b, set()) | {reason}
+        del self.identity[root_b]
+        self.links.append((a, b, reason))
+        return True
+
+    def groups(self) -> Dict[int, List[int]]:
+        members: Dict[int, List[int]] = defaultdict(list)
+        for company_id in self.parent:
+            members[self.find(company_id)].append(company_id)
+        return {root: ids for root, ids in members.items() if len(ids) > 1}
+
+    def identifier_roots(self, groups: Dict[int, List[int]]) -> Set[int]:
+        """Roots of clusters whose members stay connected using identifier links alone"""
+        parent: Dict[int, int] = {}
+
+        def find(company_id: int) -> int:
+            while parent.setdefault(company_id, company_id) != company_id:
+                parent[company_id] = parent[parent[company_id]]
+                company_id = parent[company_id]
+            return company_id
+
+        for a, b, reason in self.links:
+            if reason in IDENTIFIER_KINDS:
+                parent[find(a)] = find(b)
+        return {root for root, ids in groups.items() if len({find(company_id) for company_id in ids}) == 1}
+
+
+def load_companies(batch_size: int = 5000) -> Iterator[Dict[str, Any]]:
+    session = SessionLocal()
+    try:
+        statement = (
+            select(*(getattr(Company, column) for column in COLUMNS))
+            .where(Company.deleted_at.is_(None), Company.merged_into_id.is_(None))
+            .execution_options(yield_per=batch_size)
+        )
+        for row in session.execute(statement):
+            yield dict(row._mapping)
+    finally:
+        session.close()
+
+
+def find_clusters(
+    rows: Dict[int, Dict[str, Any]], max_block: int
+) -> Tuple[Dict[int, List[int]], Dict[int, Set[str]], Set[int], List[Tuple[str, int]]]:
+    """
+    Return (clusters by root id, matched keys by root, roots of identifier
+    confidence clusters, skipped oversized blocks)
+    """
+    blocks: Dict[Tuple[str, int, Any], List[int]] = defaultdict(list)
+    for company_id, row in rows.items():
+        if row["dot_number"] is not None:
+            blocks[("dot", row["user_id"], row["dot_number"])].append(company_id)
+        key = name_key(row["name"])
+        if key is not None:
+            blocks[("name", row["user_id"], key)].append(company_id)
+
+    clusters = Clusters(rows)
+    oversized = []
+    for (kind, _, value), ids in blocks.items():
+        if len(ids) < 2:
+            continue
+        if len(ids) > max_block:
+            oversized.append((f"{kind}={value}", len(ids)))
+            continue
+        # Link each row to the first compatible cluster already seen in this block
+        for position, company_id in enumerate(ids[1:], start=1):
+            tried: Set[int] = set()
+            for earlier in ids[:position]:
+                root = clusters.find(earlier)
+                if root in tried:
+                    continue
+                tried.add(root)
+                if clusters.union(earlier, company_id, kind):
+                    break
+
+    groups = clusters.groups()
+    return groups, clusters.reasons, clusters.identifier_roots(groups), oversized
+
+
+def canonical_order(row: Dict[str, Any]) -> Tuple:
+    populated = sum(row[field] is not None for field in FILL_FIELDS)
+    return (row["factor_network_uuid"] is None, -populated, row["id"])
+
+
+def write_report(path: str, plan: List[Tuple[Dict[str, Any], List[Dict[str, Any]], str, str]]) -> None:
+    with open(path, "w", newline="", encoding="utf-8") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(
+            ["cluster", "role", "id", "matched_on", "confidence", "name", "mc_number", "dot_number",
+             "factor_network_uuid", "safer_state", "created_at"]
+        )
+        for cluster_no, (canonical, duplicates, matched_on, confidence) in enumerate(plan, start=1):
+            for role, row in [("canonical", canonical)] + [("duplicate", row) for row in duplicates]:
+                writer.writerow(
+                    [cluster_no, role, row["id"], matched_on, confidence, row["name"], row["mc_number"],
+                     row["dot_number"], row["factor_network_uuid"], row["safer_state"], row["created_at"]]
+                )
+
+
+def _json_default(value: Any) -> str:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def apply_cluster(session, canonical_id: int, duplicate_ids: List[int], matched_on: str) -> None:
+    canonical = session.get(Company, canonical_id)
+    duplicates = [session.get(Company, duplicate_id) for duplicate_id in duplicate_ids]
+    now = datetime.now(timezone.utc)
+
+    fills: Dict[str, Any] = {}
+    for duplicate in duplicates:
+        snapshot = {column.name: getattr(duplicate, column.name) for column in Company.__table__.columns}
+        session.add(
+            CompanyMerge(
+                canonical_id=canonical_id,
+                duplicate_id=duplicate.id,
+                matched_on=matched_on,
+                duplicate_data=json.dumps(snapshot, default=_json_default),
+            )
+        )
+        for field in FILL_FIELDS:
+            value = getattr(duplicate, field)
+            if value is not None and getattr(canonical, field) is None and field not in fills:
+                fills[field] = value
+        # Release unique identifiers before the canonical row takes them
+        duplicate.mc_number = None
+        duplicate.factor_network_uuid = None
+        duplicate.merged_into_id = canonical_id
+        duplicate.deleted_at = now
+    session.flush()
+
+    for field, value in fills.items():
+        setattr(canonical, field, value)
+    session.execute(
+        update(Company)
+        .where(Company.merged_into_id.in_(duplicate_ids))
+        .values(merged_into_id=canonical_id)
+        .execution_options(synchronize_session=False)
+    )
+    session.execute(
+        update(CompanyMerge)
+        .where(CompanyMerge.canonical_id.in_(duplicate_ids))
+        .values(canonical_id=canonical_id)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Find and merge duplicate companies.")
+    parser.add_argument("--report", default="company_duplicates.csv", help="CSV report path.")
+    parser.add_argument("--max-block", type=int, default=50, help="Skip blocking groups larger than this.")
+    parser.add_argument("--apply", action="store_true", help="Merge the identifier-confidence clusters.")
+    parser.add_argument(
+        "--include-name-matches",
+        action="store_true",
+        help="With --apply, also merge clusters held together only by matching names.",
+    )
+    parser.add_argument("--batch-size", type=int, default=500, help="Clusters per commit with --apply.")
+    args = parser.parse_args()
+
+    rows = {row["id"]: row for row in load_companies()}
+    print(f"Loaded {len(rows)} companies")
+    groups, reasons, identifier_roots, oversized = find_clusters(rows, args.max_block)
+
+    plan = []
+    for root, ids in groups.items():
+        members = sorted((rows[company_id] for company_id in ids), key=canonical_order)
+        confidence = "identifier" if root in identifier_roots else "name"
+        plan.append((members[0], members[1:], ",".join(sorted(reasons[root])), confidence))
+    plan.sort(key=lambda item: item[0]["id"])
+
+    write_report(args.report, plan)
+    name_only = sum(confidence == "name" for *_, confidence in plan)
+    print(
+        f"Clusters: {len(plan)} ({name_only} name-only), "
+        f"Duplicates: {sum(len(duplicates) for _, duplicates, _, _ in plan)}, Report: {args.report}"
+    )
+    for block, size in sorted(oversized, key=lambda item: -item[1])[:20]:
+        print(f"Skipped oversized block {block} ({size} rows)")
+
+    if not args.apply:
+        return
+
+    if not args.include_name_matches:
+        plan = [cluster for cluster in plan if cluster[3] == "identifier"]
+        print(f"Skipping {name_only} name-only clusters (pass --include-name-matches to merge them)")
+    duplicate_count = sum(len(duplicates) for _, duplicates, _, _ in plan)
+
+    session = SessionLocal()
+    try:
+        for idx, (canonical, duplicates, matched_on, _) in enumerate(plan, start=1):
+            apply_cluster(session, canonical["id"], [row["id"] for row in duplicates], matched_on)
+            if idx % args.batch_size == 0:
+                session.commit()
+                print(f"Merged clusters: {idx}/{len(plan)}")
+        session.commit()
+    finally:
+        session.close()
+    print(f"Merged {duplicate_count} duplicates into {len(plan)} companies")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Nightly aging roll for receivables.
+
+Moves open invoices that aged past their bucket (0-30, 31-60, 61-90, 90+
+days) into the next one and adjusts each affected user's balance by the
+moved amounts. Invoices and payments update balances as they happen, so
+this is the only periodic work.
+
+--rebuild recomputes every balance from the ledger instead; use it once
+after the receivables migration to clear placeholder bucket values, or to
+reconcile.
+
+Execution:
+  python scripts/roll_receivable_aging.py
+  python scripts/roll_receivable_aging.py --date 2026-01-31
+  python scripts/roll_receivable_aging.py --rebuild
+"""
+
+import argparse
+import os
+import sys
+from datetime import date
+
+# Ensure app imports resolve when running from repo root or backend/
+CURRENT_DIR = os.path.dirname(__file__)
+BACKEND_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, ".."))
+sys.path.insert(0, BACKEND_ROOT)
+
+from app.core import aging
+from app.db.database import SessionLocal
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Roll receivables between aging buckets.")
+    parser.add_argument("--date", type=date.fromisoformat, default=None, help="Age as of this date (YYYY-MM-DD).")
+    parser.add_argument("--rebuild", action="store_true", help="Recompute all balances from the ledger.")
+    args = parser.parse_args()
+    today = args.date or date.today()
+
+    session = SessionLocal()
+    try:
+        if args.rebuild:
+            rebuilt = aging.rebuild_balances(session, today)
+            session.commit()
+            print(f"Rebuilt {rebuilt} balances as of {today}")
+            return
+        # Commits per chunk of users
+        for source, target, moved in aging.roll_buckets(session, today):
+            print(f"{source} -> {target}: {moved} receivables")
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
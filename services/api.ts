@@ -344,16 +344,64 @@ export const balanceApi = {
 // Dashboard / Home
 // ============================================
 
+export type CreditDecision = 'APPROVED' | 'REVIEW_REQUIRED' | 'DENIED' | 'INSUFFICIENT_DATA';
+
+export type CreditCheckSource = 'FactorsNetwork' | 'TransCredit' | 'Ansonia';
+
+export interface ReceivablesBalance {
+  total_account_receivable: number;
+  reserve: number;
+  age_0_30: number;
+  age_31_60: number;
+  age_61_90: number;
+  age_90_plus: number;
+  current_balance: number;
+  updated_at: string | null;
+}
+
+export interface LatestCreditDecision {
+  id: number;
+  user_id: number;
+  mc_number: number;
+  status: CreditDecision;
+  approved_amount: number;
+  credit_check_uuid: string;
+  source: CreditCheckSource;
+  created_at: string;
+}
+
+export interface CreditCheckRecord {
+  id: number;
+  user_id: number;
+  mc_number: number;
+  status: CreditDecision;
+  approved_amount: number;
+  factor_cloud_uuid: string | null;
+  credit_check_uuid: string | null;
+  source: CreditCheckSource;
+  expiration_date: string;
+  created_at: string;
+  updated_at: string | null;
+  deleted_at: string | null;
+}
+
+export interface CreditDecisionHistory {
+  month: string;
+  result: CreditDecision;
+}
+
+// Fuel savings and transactions are not included; use fuelApi.getSummary and balanceApi.getTransactions
 export interface DashboardData {
   user: User;
-  credit_score: number;
-  balance: number;
-  fuel_savings: number;
-  recent_transactions: Transaction[];
+  balance: ReceivablesBalance | null;
+  credit_score: LatestCreditDecision | null;
+  recent_checks: CreditCheckRecord[];
+  history: CreditDecisionHistory[];
 }
 
 export const dashboardApi = {
-  getData: () => apiRequest<DashboardData>('/dashboard'),
+  getData: (months: number = 6, checks: number = 5) =>
+    apiRequest<DashboardData>(`/dashboard?months=${months}&checks=${checks}`),
 };
 
 // ============================================